@@ -1,14 +1,22 @@
 import os
+import sys
 import time
 import google.generativeai as genai
 from dotenv import load_dotenv
 
+# Shared helpers live in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from model_discovery import load_models, profile_startup
+
 load_dotenv()  # Load API key from .env
 
 class MedicalChatbot:
-    def __init__(self):
+    def __init__(self, use_model_cache=True):
         genai.configure(api_key=os.environ.get("GEMINI_API_KEY"))
-        self.available_models = self.get_available_models()
+        # Start from the on-disk model list; a stale list is refreshed in the background
+        self.available_models, self.model_source = load_models(
+            self.get_available_models, on_refresh=self.set_available_models, use_cache=use_model_cache
+        )
         self.selected_model = self.choose_free_tier_model()
         self.retry_count = 0
         self.max_retries = 2
@@ -22,13 +30,17 @@ class MedicalChatbot:
                     models.append({
                         'name': model.name,
                         'description': getattr(model, 'description', 'No description'),
-                        'supported_methods': model.supported_generation_methods
+                        'supported_methods': list(model.supported_generation_methods)
                     })
             return models
         except Exception as e:
             print(f"Error fetching models: {e}")
             return []
 
+    def set_available_models(self, models):
+        """Replace the model list after a background refresh"""
+        self.available_models = models
+
     def choose_free_tier_model(self):
         """Select a model that's likely to be in free tier"""
         # Free tier models (avoid pro/preview models that have quotas)
@@ -178,6 +190,9 @@ class MedicalChatbot:
 
 # Run the medical chatbot
 if __name__ == "__main__":
+    if "--startup-profile" in sys.argv:
+        profile_startup(MedicalChatbot)
+        sys.exit(0)
     try:
         chatbot = MedicalChatbot()
         chatbot.medical_chat()
@@ -147,10 +147,16 @@
 
 
 # summarizer.py
-from transformers import pipeline
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def get_summarizer():
+    """Hugging Face summarization model, loaded on first use rather than at import"""
+    from transformers import pipeline
+
+    return pipeline("summarization", model="facebook/bart-large-cnn")
 
-# Initialize Hugging Face summarization model
-summarizer = pipeline("summarization", model="facebook/bart-large-cnn")
 
 def summarize_text(text, max_length=200, min_length=50):
     """
@@ -169,7 +175,7 @@ def summarize_text(text, max_length=200, min_length=50):
     if len(text) > 2000:
         text = text[:2000]
 
-    summary = summarizer(
+    summary = get_summarizer()(
         text, 
         max_length=max_length, 
         min_length=min_length, 
@@ -0,0 +1,234 @@
+"""Semantic cache of answers to general-health questions.
+
+Questions are turned into hashed TF-IDF vectors (stemmed words and word
+pairs folded into a fixed number of buckets), and a lookup is one NumPy
+matrix-vector product over every cached question. A stored answer is
+reused when its question's cosine similarity passes the threshold.
+
+Only answers at the severities in `severities` (mild by default) are
+stored or served; urgent and emergency queries always go to the model.
+"""
+import math
+import sqlite3
+import threading
+import time
+import zlib
+from collections import Counter, OrderedDict
+from functools import lru_cache
+
+from lazy_import import lazy_module
+from severity_cache import normalize_query, prompt_version
+from specialist_router import stem
+
+np = lazy_module("numpy")
+
+
+# Question framing that says nothing about the topic. Negations are kept.
+QUESTION_WORDS = frozenset({
+    "what", "whats", "how", "why", "when", "which", "who", "do", "does", "can", "could",
+    "should", "would", "will", "of", "to", "for", "and", "or", "about", "it", "that",
+    "there", "any", "some", "in", "on", "with", "tell", "know", "want", "way", "ways", "is", "are",
+})
+
+
+def question_terms(text):
+    """Stemmed topic words and adjacent word pairs of a question"""
+    words = [stem(word) for word in normalize_query(text).split() if word not in QUESTION_WORDS]
+    return words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+
+class AnswerCache:
+    """LRU cache of answers found by question similarity, optionally in SQLite.
+
+    Rows of a float32 matrix hold each cached question's term counts (log
+    scaled); document frequencies are kept per bucket so IDF weights follow
+    what is in the cache. Entries are keyed by normalized question and the
+    answer prompt's version; rows from other prompt versions are purged on
+    open.
+    """
+
+    def __init__(self, prompt_template, max_entries=2000, threshold=0.85, dimensions=1024,
+                 ttl_seconds=30 * 24 * 3600, severities=("mild",), db_path=None):
+        self.version = prompt_version(prompt_template)
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.dimensions = dimensions
+        self.ttl_seconds = ttl_seconds
+        self.severities = frozenset(severities)
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0
+        # normalized question -> slot; order is least recently used first
+        self._entries = OrderedDict()
+        # slot -> (question key, answer, severity, created_at)
+        self._records = {}
+        self._free = []
+        self._tf = np.zeros((0, dimensions), dtype=np.float32)
+        self._tf_squared = np.zeros((0, dimensions), dtype=np.float32)
+        self._df = np.zeros(dimensions, dtype=np.float32)
+        self._lock = threading.Lock()
+        self._db = None
+        if db_path:
+            self._open_db(db_path)
+
+    def _open_db(self, db_path):
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS answer_cache (
+                   question TEXT NOT NULL,
+                   prompt_version TEXT NOT NULL,
+                   answer TEXT NOT NULL,
+                   severity TEXT NOT NULL,
+                   created_at REAL NOT NULL,
+                   PRIMARY KEY (question, prompt_version)
+               )"""
+        )
+        self._db.execute("DELETE FROM answer_cache WHERE prompt_version != ?", (self.version,))
+        self._db.execute("DELETE FROM answer_cache WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+        self._db.commit()
+        rows = self._db.execute(
+            "SELECT question, answer, severity, created_at FROM answer_cache "
+            "WHERE prompt_version = ? ORDER BY created_at DESC LIMIT ?",
+            (self.version, self.max_entries),
+        ).fetchall()
+        with self._lock:
+            # Oldest first so the newest rows end up most recently used
+            for question, answer, severity, created_at in reversed(rows):
+                self._remember(question, answer, severity, created_at)
+
+    def vector(self, text):
+        """Log-scaled hashed term counts of a question"""
+        counts = Counter(zlib.crc32(term.encode("utf-8")) % self.dimensions for term in question_terms(text))
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for index, count in counts.items():
+            vector[index] = 1.0 + math.log(count)
+        return vector
+
+    def get(self, query, severity):
+        """Return (answer, similarity) for a close enough cached question, or None"""
+        if severity not in self.severities:
+            self.skipped += 1
+            return None
+        key = normalize_query(query)
+        now = time.time()
+        with self._lock:
+            slot = self._entries.get(key)
+            if slot is not None and self._fresh(slot, now):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._records[slot][1], 1.0
+
+            slot, similarity = self._nearest(self.vector(query))
+            if slot is not None and similarity >= self.threshold and self._fresh(slot, now):
+                self._entries.move_to_end(self._records[slot][0])
+                self.hits += 1
+                return self._records[slot][1], similarity
+
+            self.misses += 1
+            return None
+
+    def _fresh(self, slot, now):
+        """Drop an expired entry; True if the slot is still usable"""
+        if now - self._records[slot][3] <= self.ttl_seconds:
+            return True
+        self._forget(self._records[slot][0])
+        return False
+
+    def _nearest(self, query_vector):
+        if not self._entries:
+            return None, 0.0
+        # Smoothed IDF from the cached questions; cosine of the IDF-weighted vectors
+        idf = np.log((1.0 + len(self._entries)) / (1.0 + self._df)) + 1.0
+        idf_squared = idf * idf
+        query_norm = float(np.linalg.norm(query_vector * idf))
+        if query_norm == 0.0:
+            return None, 0.0
+        dots = self._tf @ (query_vector * idf_squared)
+        norms = np.sqrt(self._tf_squared @ idf_squared) * query_norm
+        scores = np.divide(dots, norms, out=np.zeros_like(dots), where=norms > 0)
+        slot = int(np.argmax(scores))
+        if slot not in self._records:
+            return None, 0.0
+        return slot, float(scores[slot])
+
+    def put(self, query, answer, severity):
+        if severity not in self.severities or not answer:
+            return
+        key = normalize_query(query)
+        if not key:
+            return
+        created_at = time.time()
+        with self._lock:
+            evicted = self._remember(key, answer, severity, created_at)
+            if self._db is not None:
+                self._db.executemany(
+                    "DELETE FROM answer_cache WHERE question = ? AND prompt_version = ?",
+                    [(question, self.version) for question in evicted],
+                )
+                self._db.execute(
+                    "INSERT OR REPLACE INTO answer_cache VALUES (?, ?, ?, ?, ?)",
+                    (key, self.version, answer, severity, created_at),
+                )
+                self._db.commit()
+
+    def _remember(self, key, answer, severity, created_at):
+        """Store an entry under the lock; returns the questions evicted to make room"""
+        if key in self._entries:
+            self._forget(key)
+        slot = self._free.pop() if self._free else self._grow()
+        vector = self.vector(key)
+        self._tf[slot] = vector
+        self._tf_squared[slot] = vector * vector
+        self._df += vector > 0
+        self._records[slot] = (key, answer, severity, created_at)
+        self._entries[key] = slot
+
+        evicted = []
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._forget(oldest)
+            evicted.append(oldest)
+        return evicted
+
+    def _grow(self):
+        """Double the vector matrices and return the first new slot"""
+        used = self._tf.shape[0]
+        capacity = min(max(64, used * 2), max(self.max_entries + 1, used + 1))
+        for name in ("_tf", "_tf_squared"):
+            grown = np.zeros((capacity, self.dimensions), dtype=np.float32)
+            grown[:used] = getattr(self, name)
+            setattr(self, name, grown)
+        self._free.extend(range(capacity - 1, used, -1))
+        return used
+
+    def _forget(self, key):
+        slot = self._entries.pop(key)
+        self._df -= self._tf[slot] > 0
+        self._tf[slot] = 0.0
+        self._tf_squared[slot] = 0.0
+        del self._records[slot]
+        self._free.append(slot)
+
+    def stats(self):
+        """Hit/miss counters for logging or metrics"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "skipped": self.skipped,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "prompt_version": self.version,
+        }
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+@lru_cache(maxsize=None)
+def get_answer_cache(prompt_template, max_entries, threshold, ttl_seconds, db_path=None):
+    """Process-wide AnswerCache for these settings, so every bot hits the same entries"""
+    return AnswerCache(prompt_template, max_entries=max_entries, threshold=threshold,
+                       ttl_seconds=ttl_seconds, db_path=db_path)
@@ -0,0 +1,67 @@
+"""Semantic answer cache: lookup latency by cache size and hit rate on rephrasings.
+
+Run from the repository root:
+    python -m benchmarks.bench_answer_cache --entries 100 1000 5000
+"""
+import argparse
+import random
+import time
+
+from answer_cache import AnswerCache
+
+FAQ = [
+    ("What are the benefits of regular exercise?", "Why is regular exercise good for me"),
+    ("How can I manage stress naturally?", "how do I manage my stress naturally"),
+    ("What is blood pressure and why is it important?", "why is blood pressure important"),
+    ("What are common symptoms of allergies?", "what are the common symptoms of allergies"),
+    ("How does a balanced diet help overall health?", "how does a balanced diet help health"),
+]
+
+# Different topics that must not be answered from the FAQ entries
+UNRELATED = [
+    "What are the benefits of yoga?",
+    "How can I manage back pain naturally?",
+    "What are common symptoms of the flu?",
+    "Is a low blood sugar level dangerous?",
+]
+
+TOPICS = ["sleep", "vitamin", "hydration", "posture", "caffeine", "sunscreen", "walking", "fiber",
+          "sugar", "salt", "screen time", "stretching", "protein", "iron", "meditation", "fasting"]
+
+
+def filler_questions(count, seed):
+    rng = random.Random(seed)
+    return [
+        f"{rng.choice(['what', 'how', 'why'])} {rng.choice(TOPICS)} {rng.choice(TOPICS)} tip {i}"
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, nargs="*", default=[100, 1000, 5000])
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--threshold", type=float, default=0.85)
+    args = parser.parse_args()
+
+    print(f"{'entries':>8} {'lookup us':>10} {'faq hits':>9} {'false hits':>11}")
+    for entries in args.entries:
+        cache = AnswerCache("bench", max_entries=entries, threshold=args.threshold)
+        for question in filler_questions(entries - len(FAQ), seed=entries):
+            cache.put(question, "filler answer", "mild")
+        for question, _ in FAQ:
+            cache.put(question, question, "mild")
+
+        queries = [rephrased for _, rephrased in FAQ] + UNRELATED
+        start = time.perf_counter()
+        for i in range(args.lookups):
+            cache.get(queries[i % len(queries)], "mild")
+        lookup_us = (time.perf_counter() - start) / args.lookups * 1e6
+
+        faq_hits = sum(1 for question, rephrased in FAQ if (cache.get(rephrased, "mild") or ("",))[0] == question)
+        false_hits = sum(1 for query in UNRELATED if cache.get(query, "mild") is not None)
+        print(f"{entries:>8} {lookup_us:>10.0f} {faq_hits:>5}/{len(FAQ)} {false_hits:>7}/{len(UNRELATED)}")
+
+
+if __name__ == "__main__":
+    main()
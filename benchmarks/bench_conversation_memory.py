@@ -0,0 +1,83 @@
+"""Prompt tokens per turn over simulated 20-turn sessions.
+
+Compares three ways of carrying context into get_medical_response:
+  repaste   - no memory, the patient re-pastes the whole story every turn
+  unbounded - every previous turn is sent back verbatim
+  bounded   - ConversationMemory with a token budget and running summary
+
+Run from the repository root:
+    python -m benchmarks.bench_conversation_memory --turns 20 --budget 1200
+"""
+import argparse
+import random
+import statistics
+
+from conversation_memory import ConversationMemory, estimate_tokens
+
+FACTS = [
+    "I'm 54 and have type 2 diabetes.",
+    "I take metformin twice a day.",
+    "For the last week my feet have been tingling at night.",
+    "My blood sugar readings were around 180 this morning.",
+    "I also have mild swelling in my left ankle.",
+    "My father had heart disease in his sixties.",
+    "I walk about 20 minutes a day but it hurts more lately.",
+]
+QUESTIONS = [
+    "Should I be worried about this?",
+    "What lifestyle changes could help?",
+    "Could my medication be causing it?",
+    "When should I see a doctor?",
+    "Is it related to what I said earlier?",
+]
+
+
+def simulated_reply(rng):
+    return " ".join(["Some general health information."] * rng.randint(15, 45))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--budget", type=int, default=1200)
+    args = parser.parse_args()
+
+    per_turn = {"repaste": [[] for _ in range(args.turns)],
+                "unbounded": [[] for _ in range(args.turns)],
+                "bounded": [[] for _ in range(args.turns)]}
+    peak_bounded = 0
+
+    for session in range(args.sessions):
+        rng = random.Random(session)
+        memory = ConversationMemory(budget_tokens=args.budget)
+        story = []
+        unbounded_tokens = 0
+        for turn in range(args.turns):
+            message = f"{rng.choice(FACTS)} {rng.choice(QUESTIONS)}"
+            story.append(message)
+            reply = simulated_reply(rng)
+
+            per_turn["repaste"][turn].append(estimate_tokens(" ".join(story)))
+            per_turn["unbounded"][turn].append(unbounded_tokens + estimate_tokens(message))
+            per_turn["bounded"][turn].append(memory.total_tokens + estimate_tokens(message))
+
+            unbounded_tokens += estimate_tokens(message) + estimate_tokens(reply)
+            memory.add_turn("user", message)
+            memory.add_turn("model", reply)
+            peak_bounded = max(peak_bounded, memory.total_tokens)
+
+    print(f"Mean prompt tokens per turn ({args.sessions} sessions, budget {args.budget})\n")
+    print(f"{'turn':>4} {'repaste':>9} {'unbounded':>10} {'bounded':>9}")
+    for turn in range(args.turns):
+        print(f"{turn + 1:>4} " + " ".join(
+            f"{statistics.mean(per_turn[name][turn]):>{width}.0f}"
+            for name, width in (("repaste", 9), ("unbounded", 10), ("bounded", 9))
+        ))
+    totals = {name: sum(sum(turns) for turns in values) / args.sessions for name, values in per_turn.items()}
+    print("\nTokens per session: " + ", ".join(f"{name} {total:,.0f}" for name, total in totals.items()))
+    print(f"Peak bounded history: {peak_bounded} tokens (budget {args.budget})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Compare the compiled emergency matcher against the old substring loop.
+
+Also times the typo-tolerant matcher and lists what it catches on
+misspelled messages that the exact matcher misses.
+
+Run from the repository root:
+    python -m benchmarks.bench_emergency_keywords --messages 100000
+"""
+import argparse
+import json
+import random
+import time
+
+from keyword_matcher import FuzzyKeywordMatcher, KeywordMatcher
+from triage_directory import DEFAULT_PATH
+
+
+SAMPLE_MESSAGES = [
+    "I have a mild headache since this morning",
+    "What are the benefits of regular exercise?",
+    "I'm cutting back on salt, is that good for blood pressure?",
+    "My father has chest pain and shortness of breath",
+    "How can I manage stress naturally?",
+    "My child has a fever and a rash on her arms",
+    "I think I took an overdose of my sleeping pills",
+    "Is it normal to feel tired after a flu shot?",
+    "my stomach hurts after eating spicy food",
+    "She can't breathe properly and her lips look blue",
+]
+
+TYPO_MESSAGES = [
+    "I cant breath properly",
+    "chest pian since this morning",
+    "my son just had a siezure",
+    "my dad is unconcious on the floor",
+    "I think I took an overdoes",
+    "heavy bleding from my leg",
+    "I painted my room and feel dizzy",
+    "cooking dinner gave me a small burn",
+    "I was painting my room and got a headache",
+    "I'm so stoked about my new bike",
+]
+
+
+def load_emergency_keywords():
+    """Read the keyword list from the shared triage directory file"""
+    with open(DEFAULT_PATH, encoding="utf-8") as f:
+        data = json.load(f)
+    return data["emergency_keywords"]
+
+
+def substring_loop(keywords, message):
+    return any(keyword in message.lower() for keyword in keywords)
+
+
+def run(label, func, messages):
+    start = time.perf_counter()
+    hits = 0
+    for message in messages:
+        if func(message):
+            hits += 1
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} {len(messages) / elapsed:>12,.0f} msg/s  "
+          f"{elapsed / len(messages) * 1e6:>7.2f} µs/msg  hits={hits}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    keywords = load_emergency_keywords()
+    rng = random.Random(args.seed)
+    messages = [rng.choice(SAMPLE_MESSAGES) for _ in range(args.messages)]
+
+    build_start = time.perf_counter()
+    matcher = KeywordMatcher(keywords)
+    print(f"Built automaton over {len(keywords)} keywords in "
+          f"{(time.perf_counter() - build_start) * 1e3:.2f} ms")
+
+    run("substring loop", lambda m: substring_loop(keywords, m), messages)
+    run("compiled matcher", matcher.contains_any, messages)
+    run("compiled (all spans)", matcher.search, messages)
+
+    fuzzy = FuzzyKeywordMatcher(keywords)
+    run("fuzzy matcher", fuzzy.search, messages)
+    typo_messages = [rng.choice(TYPO_MESSAGES) for _ in range(args.messages)]
+    run("fuzzy (typo messages)", fuzzy.search, typo_messages)
+
+    print("\nMisspelled messages:")
+    for message in TYPO_MESSAGES:
+        exact = [match.keyword for match in matcher.search(message)]
+        found = [f"{match.keyword} (distance {match.distance})" for match in fuzzy.search(message)]
+        print(f"  {message!r}: exact={exact} fuzzy={found}")
+
+    print("\nBehaviour differences on the sample set:")
+    for message in SAMPLE_MESSAGES:
+        old = substring_loop(keywords, message)
+        new = [match.keyword for match in matcher.search(message)]
+        if old != bool(new):
+            print(f"  {message!r}: loop={old} matcher={new}")
+
+
+if __name__ == "__main__":
+    main()
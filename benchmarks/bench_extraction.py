@@ -0,0 +1,51 @@
+"""Batch extraction throughput (pages/s) against the number of worker processes.
+
+Generates text-layer sample PDFs, then runs text_extraction's batch path
+over them once per worker count. Throughput should grow with workers up to
+the number of cores.
+
+Run from the repository root (requires pdfplumber):
+    python -m benchmarks.bench_extraction --files 16 --pages 25 --workers 1 2 4 8
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from sample_documents import write_samples
+from text_extraction import extract_batch, find_inputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=16)
+    parser.add_argument("--pages", type=int, default=25, help="Pages per file")
+    parser.add_argument("--workers", type=int, nargs="*", default=[1, 2, 4, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="bench_extraction_")
+    try:
+        inputs = os.path.join(root, "in")
+        write_samples(inputs, args.files, args.pages)
+        print(f"{args.files} files x {args.pages} pages, {os.cpu_count()} cores\n")
+        print(f"{'workers':>8} {'seconds':>8} {'pages/s':>8} {'speedup':>8}")
+        baseline = None
+        for workers in dict.fromkeys(args.workers):
+            output = os.path.join(root, f"out{workers}")
+            start = time.perf_counter()
+            results = list(extract_batch(find_inputs([inputs], output), workers))
+            elapsed = time.perf_counter() - start
+            failed = [result for result in results if result.error]
+            if failed:
+                print(f"{workers:>8} failed: {failed[0].error}")
+                continue
+            rate = sum(len(result.pages) for result in results) / elapsed
+            baseline = baseline or rate
+            print(f"{workers:>8} {elapsed:>8.2f} {rate:>8.1f} {rate / baseline:>7.2f}x")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Extraction cache: cold extraction vs repeat upload vs partially matching upload.
+
+For each document size the same text PDF is extracted cold, then again
+from the cache (same bytes), then a copy with a few extra pages appended
+is extracted, reusing the shared pages by their content hash.
+
+Run from the repository root (requires pdfplumber):
+    python -m benchmarks.bench_extraction_cache --pages 10 100 1000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from extraction_cache import ExtractionCache
+from sample_documents import write_text_pdf
+from text_extraction import extract_pages
+
+
+def timed(path, cache):
+    start = time.perf_counter()
+    pages = extract_pages(path, cache=cache)
+    return (time.perf_counter() - start) * 1000, pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="*", default=[10, 100, 1000])
+    parser.add_argument("--extra-pages", type=int, default=5, help="Pages appended for the partial match")
+    parser.add_argument("--lines", type=int, default=20, help="Text lines per page")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ExtractionCache(os.path.join(directory, "cache.db"))
+        print(f"{'pages':>6} {'cold ms':>10} {'hit ms':>8} {'partial ms':>11} {'reused':>8}")
+        for count in args.pages:
+            # Same seed: the longer file starts with exactly the same pages
+            original = write_text_pdf(os.path.join(directory, f"doc{count}.pdf"), count, args.lines, seed=count)
+            extended = write_text_pdf(os.path.join(directory, f"doc{count}b.pdf"), count + args.extra_pages,
+                                      args.lines, seed=count)
+            cold_ms, _ = timed(original, cache)
+            hit_ms, _ = timed(original, cache)
+            partial_ms, pages = timed(extended, cache)
+            reused = sum(1 for page in pages if page.cached)
+            print(f"{count:>6} {cold_ms:>10.0f} {hit_ms:>8.2f} {partial_ms:>11.0f} {reused:>4}/{len(pages)}")
+        print(f"\nCache: {cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Time to first page and total time: streamed iter_pages vs the whole-document list.
+
+Generates one long text-layer PDF and extracts it twice: extract_pages
+(nothing usable until the last page is done) and iter_pages (page 1 is
+handed over as soon as it is read). Also times assembling the full text
+with one join against repeated += on the same pages.
+
+Run from the repository root (requires pdfplumber):
+    python -m benchmarks.bench_incremental --pages 1000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from sample_documents import write_text_pdf
+from text_extraction import extract_pages, iter_pages
+
+
+def concatenate(texts):
+    """How the extractors used to build their output"""
+    text = ""
+    for page_text in texts:
+        text += page_text + "\n"
+    return text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--lines", type=int, default=40, help="Text lines per page")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        pdf = write_text_pdf(os.path.join(directory, "long.pdf"), args.pages, args.lines)
+        print(f"{args.pages} pages, {os.path.getsize(pdf) / 2 ** 20:.1f} MiB\n")
+        print(f"{'api':>14} {'first page s':>13} {'total s':>9}")
+
+        start = time.perf_counter()
+        pages = extract_pages(pdf)
+        total = time.perf_counter() - start
+        print(f"{'extract_pages':>14} {total:>13.3f} {total:>9.2f}")
+
+        start = time.perf_counter()
+        first = None
+        for page in iter_pages(pdf):
+            if first is None:
+                first = time.perf_counter() - start
+        total = time.perf_counter() - start
+        print(f"{'iter_pages':>14} {first:>13.3f} {total:>9.2f}")
+
+    texts = [page.text for page in pages]
+    rounds = 20
+    start = time.perf_counter()
+    for _ in range(rounds):
+        joined = "".join([text + "\n" for text in texts])
+    join_ms = (time.perf_counter() - start) / rounds * 1000
+    start = time.perf_counter()
+    for _ in range(rounds):
+        concatenated = concatenate(texts)
+    concat_ms = (time.perf_counter() - start) / rounds * 1000
+    assert joined == concatenated
+    print(f"\nAssembling {len(joined) / 2 ** 20:.1f} MiB of text: join {join_ms:.2f} ms, += {concat_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Per-call cost of the triage_metrics hooks, disabled and enabled.
+
+Run from the repository root:
+    python -m benchmarks.bench_metrics_overhead --calls 200000
+"""
+import argparse
+import time
+
+import triage_metrics
+
+
+def stage(value):
+    return value
+
+
+@triage_metrics.timed("bench")
+def timed_stage(value):
+    return value
+
+
+def per_call_ns(func, calls):
+    start = time.perf_counter_ns()
+    for i in range(calls):
+        func(i)
+    return (time.perf_counter_ns() - start) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200000)
+    args = parser.parse_args()
+
+    baseline = per_call_ns(stage, args.calls)
+    triage_metrics.enable(False)
+    disabled = per_call_ns(timed_stage, args.calls)
+    triage_metrics.enable()
+    enabled = per_call_ns(timed_stage, args.calls)
+    counter = per_call_ns(lambda i: triage_metrics.inc("bench_total", severity="mild"), args.calls)
+
+    print(f"plain call        {baseline:8.0f} ns")
+    print(f"timed, disabled   {disabled:8.0f} ns  (+{disabled - baseline:.0f} ns)")
+    print(f"timed, enabled    {enabled:8.0f} ns  (+{enabled - baseline:.0f} ns)")
+    print(f"labelled counter  {counter:8.0f} ns")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Scanned-PDF OCR throughput and peak memory against OCR worker count.
+
+Every run extracts the same image-only sample PDF in a fresh process and
+reports pages/s with the peak RSS of the parent and of the largest OCR
+worker. "unbounded" is the old behaviour: every page rendered up front,
+then OCRed one by one in the parent.
+
+Run from the repository root (requires pdfplumber, pdf2image + poppler
+and pytesseract + tesseract):
+    python -m benchmarks.bench_ocr --pages 60 --workers 1 2 4 8 --memory-mb 256
+
+Without poppler/tesseract, --renderer pdfium renders with pypdfium2
+(installed with pdfplumber) and --simulated-ocr-ms replaces tesseract with
+a CPU-bound loop of that length, which still measures the pipeline.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+CHILD = """
+import json, resource, sys, time
+sys.path.insert(0, {root!r})
+import text_extraction
+
+renderer, simulated_ms = {renderer!r}, {simulated_ms!r}
+if renderer == "pdfium":
+    import pypdfium2
+
+    def render(path, first, last, dpi):
+        pdf = pypdfium2.PdfDocument(path)
+        return [pdf[index].render(scale=dpi / 72.0).to_pil() for index in range(first - 1, last)]
+
+    text_extraction._render_pages = render
+if simulated_ms:
+    def ocr(image):
+        image.load()
+        end = time.perf_counter() + simulated_ms / 1000.0
+        while time.perf_counter() < end:
+            pass
+        return "simulated"
+
+    text_extraction._ocr = ocr
+
+start = time.perf_counter()
+pages = text_extraction.extract_pages({pdf!r}, ocr_workers={workers!r}, ocr_memory_mb={memory_mb!r})
+elapsed = time.perf_counter() - start
+if text_extraction.get_ocr_pool.cache_info().currsize:
+    # Workers must exit for their peak RSS to show up in RUSAGE_CHILDREN
+    text_extraction.get_ocr_pool({workers!r}).shutdown()
+print(json.dumps({{
+    "pages": len(pages), "seconds": elapsed,
+    "parent_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "worker_mb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+}}))
+"""
+
+
+def run(pdf, workers, memory_mb, args):
+    code = CHILD.format(root=os.getcwd(), pdf=pdf, workers=workers, memory_mb=memory_mb,
+                        renderer=args.renderer, simulated_ms=args.simulated_ocr_ms)
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=60)
+    parser.add_argument("--workers", type=int, nargs="*", default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument("--memory-mb", type=float, default=256, help="EXTRACT_OCR_MEMORY_MB for the windowed runs")
+    parser.add_argument("--renderer", choices=["poppler", "pdfium"], default="poppler")
+    parser.add_argument("--simulated-ocr-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    from sample_documents import write_text_pdf
+
+    with tempfile.TemporaryDirectory() as directory:
+        pdf = write_text_pdf(os.path.join(directory, "scan.pdf"), args.pages, scanned_every=1)
+        ocr = f"simulated {args.simulated_ocr_ms:g} ms" if args.simulated_ocr_ms else "tesseract"
+        print(f"{args.pages} scanned pages, renderer {args.renderer}, OCR {ocr}, {os.cpu_count()} cores\n")
+        print(f"{'run':>14} {'pages/s':>8} {'parent MB':>10} {'worker MB':>10}")
+        # One worker with room for every page reproduces render-everything-then-OCR
+        runs = [("unbounded", 1, 1e9)] + [(f"{workers} workers", workers, args.memory_mb)
+                                          for workers in dict.fromkeys(args.workers)]
+        for label, workers, memory_mb in runs:
+            result = run(pdf, workers, memory_mb, args)
+            print(f"{label:>14} {result['pages'] / result['seconds']:>8.1f} "
+                  f"{result['parent_mb']:>10.0f} {result['worker_mb']:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Memory per chat session: one MedicalChatbot per connected user.
+
+Every session is a real MedicalChatbot holding the same two-turn
+conversation. "before" empties the process-wide factories ahead of each
+construction, so every bot loads its own triage directory, severity
+classifier, severity and answer caches and FAQ store, as bots did before
+they were shared. "after" builds the bots normally, sharing all of them.
+
+Gemini calls go to the local fake server. Without --classifier a small
+severity model is trained on the spot so its weights are part of the
+measurement; an FAQ store (FAQ_STORE_PATH) is memory-mapped, which
+tracemalloc does not see. Unshared bots take hundreds of kilobytes each,
+so "before" is measured over --before-sessions bots and scaled up.
+
+Run from the repository root (requires google-generativeai):
+    python -m benchmarks.bench_session_memory --sessions 10000
+"""
+import argparse
+import contextlib
+import gc
+import io
+import os
+import tempfile
+import tracemalloc
+import warnings
+
+from fake_gemini_server import FakeGemini, start_server
+
+TRAINING = [
+    ("What are the benefits of regular exercise?", "mild"),
+    ("How can I manage stress naturally?", "mild"),
+    ("I have had a persistent cough for three weeks", "moderate"),
+    ("recurring headaches every afternoon", "moderate"),
+    ("my son has a high fever since yesterday", "urgent"),
+    ("a deep cut on my hand that keeps bleeding", "urgent"),
+    ("my father is not breathing", "emergency"),
+    ("she collapsed and is unconscious", "emergency"),
+]
+
+
+def shared_factories():
+    """The lru_cached loaders whose results every bot shares"""
+    from answer_cache import get_answer_cache
+    from faq_store import get_store
+    from keyword_matcher import get_fuzzy_matcher
+    from severity_cache import get_severity_cache
+    from severity_classifier import get_classifier
+    from specialist_router import get_router
+    from triage_directory import load_directory
+
+    return (load_directory, get_fuzzy_matcher, get_router, get_classifier, get_store,
+            get_severity_cache, get_answer_cache)
+
+
+def make_session(share):
+    from category import MedicalChatbot
+
+    if not share:
+        for factory in shared_factories():
+            factory.cache_clear()
+    bot = MedicalChatbot()
+    memory = bot.conversations.get("local")
+    memory.add_turn("user", "What are the benefits of regular exercise?")
+    memory.add_turn("model", "Regular exercise strengthens the heart and lifts mood.")
+    return bot
+
+
+def measure(share, sessions):
+    """Bytes per session"""
+    # Bots print the model they picked
+    with contextlib.redirect_stdout(io.StringIO()):
+        # The first bot fetches the model list and fills the on-disk model cache
+        make_session(share)
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        held = [make_session(share) for _ in range(sessions)]
+        gc.collect()
+        used = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+    del held
+    return used / sessions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=10000)
+    parser.add_argument("--before-sessions", type=int, default=500,
+                        help="Unshared bots to measure for the before figure")
+    parser.add_argument("--classifier", help="Trained severity model (default: train a small one)")
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore")
+    server, url = start_server(FakeGemini(latency_ms=0))
+    workdir = tempfile.mkdtemp(prefix="bench_session_memory_")
+    os.environ["GEMINI_API_ENDPOINT"] = url
+    os.environ["MODEL_CACHE_PATH"] = os.path.join(workdir, "models.json")
+    os.environ.setdefault("FAQ_STORE_PATH", os.path.join(workdir, "missing_faq.bin"))
+    for name in ("SEVERITY_CACHE_DB", "ANSWER_CACHE_DB"):
+        os.environ.pop(name, None)
+
+    classifier_path = args.classifier
+    if not classifier_path:
+        from severity_classifier import SeverityClassifier
+
+        classifier_path = os.path.join(workdir, "severity_model.json")
+        SeverityClassifier().fit(TRAINING * 4).save(classifier_path)
+    os.environ["SEVERITY_MODEL_PATH"] = classifier_path
+
+    before = measure(False, min(args.before_sessions, args.sessions))
+    after = measure(True, args.sessions)
+
+    print(f"{args.sessions} MedicalChatbot sessions")
+    print(f"before  {before * args.sessions / 2 ** 20:8.1f} MiB  {before:8.0f} bytes/session"
+          f"  (from {min(args.before_sessions, args.sessions)} sessions)")
+    print(f"after   {after * args.sessions / 2 ** 20:8.1f} MiB  {after:8.0f} bytes/session")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
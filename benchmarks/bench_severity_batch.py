@@ -0,0 +1,75 @@
+"""Throughput of assess_severity_batch against the serial assess_severity loop.
+
+Uses fake_gemini_server.py so no quota is spent; the fake adds a fixed
+latency per call plus a per-output-token cost.
+
+Run from the repository root (requires google-generativeai):
+    python -m benchmarks.bench_severity_batch --queries 200 --chunk-size 25
+"""
+import argparse
+import os
+import time
+
+from fake_gemini_server import FakeGemini, start_server
+
+COMPLAINTS = [
+    "persistent cough for three weeks",
+    "high fever since yesterday",
+    "runny nose and sneezing",
+    "recurring headaches in the afternoon",
+    "deep cut on my hand from a knife",
+    "mild back ache after gardening",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--chunk-size", type=int, default=25)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--ms-per-output-token", type=float, default=2.0)
+    args = parser.parse_args()
+
+    fake = FakeGemini(latency_ms=args.latency_ms, ms_per_output_token=args.ms_per_output_token)
+    server, url = start_server(fake)
+    os.environ["GEMINI_API_ENDPOINT"] = url
+    os.environ["SEVERITY_MODEL_PATH"] = ""
+    os.environ["GEMINI_RPM"] = "100000"
+
+    from category import MedicalChatbot
+
+    def fresh_bot():
+        bot = MedicalChatbot()
+        bot.severity_classifier = None
+        return bot
+
+    # Suffixes make every query unique so the severity cache stays cold
+    queries = [f"{COMPLAINTS[i % len(COMPLAINTS)]} (patient {i})" for i in range(args.queries)]
+
+    bot = fresh_bot()
+    before = fake.requests
+    start = time.perf_counter()
+    serial = [bot.assess_severity(query) for query in queries]
+    serial_time = time.perf_counter() - start
+    serial_calls = fake.requests - before
+
+    bot = fresh_bot()
+    before = fake.requests
+    start = time.perf_counter()
+    batched = bot.assess_severity_batch(queries, chunk_size=args.chunk_size, max_workers=args.workers)
+    batch_time = time.perf_counter() - start
+    batch_calls = fake.requests - before
+    server.shutdown()
+
+    agreement = sum(a == b for a, b in zip(serial, batched)) / len(queries)
+    print(f"{len(queries)} queries, fake latency {args.latency_ms:.0f} ms + "
+          f"{args.ms_per_output_token} ms/output token\n")
+    print(f"{'mode':<8} {'calls':>6} {'seconds':>8} {'queries/s':>10}")
+    print(f"{'serial':<8} {serial_calls:>6} {serial_time:>8.2f} {len(queries) / serial_time:>10.1f}")
+    print(f"{'batch':<8} {batch_calls:>6} {batch_time:>8.2f} {len(queries) / batch_time:>10.1f}")
+    print(f"\nAgreement between modes: {agreement:.1%}")
+
+
+if __name__ == "__main__":
+    main()
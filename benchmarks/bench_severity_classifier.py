@@ -0,0 +1,144 @@
+"""Measure how many Gemini severity calls the local classifier avoids.
+
+Trains on part of a (query, severity) log, then replays the rest and reports,
+per confidence threshold, the share of messages answered locally, their
+agreement with the logged label and the latency saved per message.
+
+Run from the repository root:
+    python -m benchmarks.bench_severity_classifier --data severity_log.jsonl
+Without --data the model is trained on a small built-in template set and
+tested on hand-written paraphrases that are not in it.
+"""
+import argparse
+import random
+import time
+
+from severity_classifier import SeverityClassifier, load_examples
+
+TEMPLATES = {
+    "emergency": [
+        "my {who} collapsed and is not breathing",
+        "{who} has crushing chest pain spreading to the arm",
+        "{who} is bleeding heavily after an accident",
+        "{who} took too many pills and won't wake up",
+    ],
+    "urgent": [
+        "{who} has a high fever of 40 for two days",
+        "severe pain in {who} lower right abdomen since morning",
+        "{who} has a deep cut that might need stitches",
+        "{who} has a painful swollen ankle and cannot walk",
+    ],
+    "moderate": [
+        "{who} has had a persistent cough for three weeks",
+        "{who} gets mild chest tightness when climbing stairs",
+        "recurring headaches for {who} every afternoon",
+        "{who} has a rash that keeps coming back",
+    ],
+    "mild": [
+        "{who} has a runny nose and a mild cold",
+        "what are the benefits of regular exercise for {who}",
+        "how can {who} manage stress naturally",
+        "{who} has a small paper cut on the finger",
+    ],
+}
+WHO = ["I", "my son", "my mother", "my friend", "my husband", "my grandmother", "she", "he"]
+
+# Hand-written paraphrases that share no template with the training data;
+# the built-in run is scored on these only
+HELD_OUT = {
+    "emergency": [
+        "my dad fell down and he isn't breathing at all",
+        "she suddenly can't speak and half her face is drooping",
+        "there is blood everywhere and it won't stop after the car crash",
+        "my baby swallowed bleach and is vomiting",
+        "he is clutching his chest and sweating, the pain goes into his jaw",
+        "my wife had a seizure and is still not responding",
+        "my throat is closing up after a bee sting",
+        "grandpa passed out and his lips are turning blue",
+    ],
+    "urgent": [
+        "my daughter has had a temperature of 39.8 since yesterday",
+        "sharp pain on the right side of my belly that is getting worse",
+        "I sliced my hand cooking and the wound is gaping",
+        "twisted my knee playing football and it is badly swollen",
+        "I have a burning pain when I pee and a fever",
+        "my eye is red, very painful and my vision is blurry",
+        "my son fell off his bike and his wrist looks bent",
+        "I have been vomiting all day and can't keep water down",
+    ],
+    "moderate": [
+        "I keep coughing at night and it has lasted a month",
+        "my back has been aching on and off for a few weeks",
+        "I get headaches most evenings lately",
+        "my eczema keeps flaring up despite the cream",
+        "I have been feeling low and tired for weeks",
+        "my knee clicks and hurts a bit when I climb stairs",
+        "heartburn after most meals for the past month",
+        "my periods have been irregular for a while",
+    ],
+    "mild": [
+        "how much water should I drink every day",
+        "is it ok to exercise with a slight cold",
+        "what foods are good for healthy skin",
+        "any tips to sleep better at night",
+        "I have a little sore throat and sniffles",
+        "how often should adults get a checkup",
+        "what is a normal resting heart rate",
+        "is green tea good for you",
+    ],
+}
+
+
+def builtin_examples(rng, count):
+    examples = []
+    for _ in range(count):
+        severity = rng.choice(list(TEMPLATES))
+        examples.append((rng.choice(TEMPLATES[severity]).format(who=rng.choice(WHO)), severity))
+    return examples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data", help="JSONL log of query/severity pairs")
+    parser.add_argument("--remote-latency-ms", type=float, default=700.0,
+                        help="Typical Gemini round trip for assess_severity")
+    parser.add_argument("--thresholds", type=float, nargs="*", default=[0.6, 0.75, 0.85, 0.95])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    if args.data:
+        examples = load_examples(args.data)
+        rng.shuffle(examples)
+        split = int(len(examples) * 0.8)
+        train, test = examples[:split], examples[split:]
+    else:
+        # Scoring on template sentences would only show the templates were memorised
+        train = builtin_examples(rng, 2000)
+        test = [(query, severity) for severity, queries in HELD_OUT.items() for query in queries]
+
+    start = time.perf_counter()
+    model = SeverityClassifier().fit(train)
+    print(f"Trained on {len(train)} examples in {time.perf_counter() - start:.2f} s, testing on {len(test)}")
+
+    start = time.perf_counter()
+    predictions = [model.predict(query) for query, _ in test]
+    local_ms = (time.perf_counter() - start) / len(test) * 1e3
+    print(f"Local prediction: {local_ms:.3f} ms/message\n")
+
+    print(f"{'threshold':>9} {'avoided':>8} {'agreement':>10} {'saved ms/msg':>13}")
+    for threshold in args.thresholds:
+        confident = [
+            (label, expected)
+            for (label, confidence), (_, expected) in zip(predictions, test)
+            if confidence >= threshold
+        ]
+        avoided = len(confident) / len(test)
+        agreement = sum(label == expected for label, expected in confident) / len(confident) if confident else 0.0
+        # Every message pays for the local prediction; avoided ones skip the round trip
+        saved = avoided * args.remote_latency_ms - local_ms
+        print(f"{threshold:>9.2f} {avoided:>8.1%} {agreement:>10.1%} {saved:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
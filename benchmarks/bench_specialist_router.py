@@ -0,0 +1,90 @@
+"""Compare the inverted-index specialist router with the old nested loop.
+
+The directory is padded with synthetic clinic-specific condition terms to
+show how each approach scales with directory size.
+
+Run from the repository root:
+    python -m benchmarks.bench_specialist_router --extra-terms 5000
+"""
+import argparse
+import json
+import random
+import time
+
+from specialist_router import SpecialistRouter, freeze_conditions
+from triage_directory import DEFAULT_PATH
+
+
+QUERIES = [
+    "I have had a migraine and numbness in my left hand",
+    "my baby has a rash and a fever",
+    "persistent stomach ache and diarrhea for two days",
+    "feeling anxiety and depression lately",
+    "my knee joint hurts after a sprain",
+    "what should I eat during pregnancy",
+    "how often should I get a checkup",
+    # No condition match: the nested loop has to walk the whole directory
+    "I feel tired all the time and sleep badly",
+    "is drinking coffee every morning bad for me",
+]
+
+
+def load_specialists():
+    """Read the specialists table from the shared triage directory file"""
+    with open(DEFAULT_PATH, encoding="utf-8") as f:
+        data = json.load(f)
+    return data["specialists"]
+
+
+def pad_directory(specialists, extra_terms, rng):
+    names = list(specialists)
+    for i in range(extra_terms):
+        name = f"Clinic {i % 500} Specialist"
+        entry = specialists.setdefault(name, {"contact": "", "conditions": []})
+        entry["conditions"].append(f"condition{i} {rng.choice(['syndrome', 'disorder', 'disease'])}")
+    return names
+
+
+def nested_loop(specialists, user_input):
+    user_input_lower = user_input.lower()
+    for specialist, info in specialists.items():
+        for condition in info["conditions"]:
+            if condition in user_input_lower and specialist != "Emergency Department":
+                return specialist
+    return "General Practitioner"
+
+
+def time_it(label, func, queries, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for query in queries:
+            func(query)
+    elapsed = time.perf_counter() - start
+    calls = repeat * len(queries)
+    print(f"{label:<16} {calls / elapsed:>12,.0f} queries/s  {elapsed / calls * 1e6:>9.2f} µs/query")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--extra-terms", type=int, nargs="*", default=[0, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    for extra in args.extra_terms:
+        specialists = load_specialists()
+        pad_directory(specialists, extra, random.Random(extra))
+        router = SpecialistRouter(freeze_conditions(specialists, exclude=("Emergency Department",)))
+        print(f"\nDirectory: {len(specialists)} specialists, {router.term_count} condition terms")
+        time_it("nested loop", lambda q: nested_loop(specialists, q), QUERIES, args.repeat)
+        time_it("inverted index", router.rank, QUERIES, args.repeat)
+
+    print("\nRanked candidates:")
+    for query in QUERIES:
+        ranked = router.rank(query, limit=3)
+        print(f"  {query!r}")
+        for candidate in ranked:
+            print(f"      {candidate.specialist:<20} {candidate.score:6.2f}  {', '.join(candidate.matched_terms)}")
+
+
+if __name__ == "__main__":
+    main()
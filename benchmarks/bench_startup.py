@@ -0,0 +1,96 @@
+"""Import time and first-request time for each Python entry point.
+
+Every measurement runs in a fresh interpreter so nothing is already
+imported. Gemini calls go to the local fake server; the PDF and summary
+entry points only run a first request when given a sample file or
+--with-models (which downloads BART on first use).
+
+Run from the repository root:
+    python -m benchmarks.bench_startup --runs 3 --pdf sample.pdf
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from fake_gemini_server import FakeGemini, start_server
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name -> (directory added to sys.path, module, first request or None)
+ENTRY_POINTS = {
+    "category.py": (ROOT, "category",
+                    "module.MedicalChatbot(use_model_cache=False)"
+                    ".get_medical_response('What is a healthy resting heart rate?', 'mild')"),
+    "chatBot.py": (ROOT, "chatBot",
+                   "module.MedicalChatbot(use_model_cache=False)"
+                   ".get_medical_response('What is a healthy resting heart rate?')"),
+    "pdfText.py": (ROOT, "pdfText", "module.extract_text({pdf!r})"),
+    "ai_summary.py": (os.path.join(ROOT, "ai_features", "summary"), "ai_summary",
+                      "module.summarize_text('Regular exercise strengthens the heart. ' * 40)"),
+    "summary/app.py": (os.path.join(ROOT, "ai_features", "summary"), "app", None),
+}
+
+CHILD = """
+import importlib, json, sys, time, warnings
+warnings.simplefilter("ignore")
+sys.path.insert(0, {path!r})
+start = time.perf_counter()
+module = importlib.import_module({module!r})
+imported = time.perf_counter()
+first = None
+if {request!r}:
+    exec({request!r})
+    first = time.perf_counter() - imported
+print(json.dumps({{"import_ms": (imported - start) * 1000, "first_request_ms": first and first * 1000}}))
+"""
+
+
+def measure(path, module, request, env):
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD.format(path=path, module=module, request=request or "")],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        return None, result.stderr.strip().splitlines()[-1]
+    return json.loads(result.stdout.strip().splitlines()[-1]), None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--pdf", help="Sample PDF for pdfText's first request")
+    parser.add_argument("--with-models", action="store_true", help="Run the BART summary first request")
+    args = parser.parse_args()
+
+    server, url = start_server(FakeGemini(latency_ms=0))
+    env = dict(os.environ, GEMINI_API_ENDPOINT=url, GEMINI_API_KEY="local", SEVERITY_MODEL_PATH="",
+               ANSWER_CACHE_SIZE="0", FAQ_STORE_PATH="",
+               MODEL_CACHE_PATH=os.path.join(tempfile.mkdtemp(), "models.json"))
+
+    print(f"{'entry point':<16} {'import ms':>10} {'first request ms':>17}")
+    for name, (path, module, request) in ENTRY_POINTS.items():
+        if name == "pdfText.py":
+            request = request.format(pdf=args.pdf) if args.pdf else None
+        if name == "ai_summary.py" and not args.with_models:
+            request = None
+        imports, firsts, error = [], [], None
+        for _ in range(args.runs):
+            timing, error = measure(path, module, request, env)
+            if timing is None:
+                break
+            imports.append(timing["import_ms"])
+            if timing["first_request_ms"] is not None:
+                firsts.append(timing["first_request_ms"])
+        if error:
+            print(f"{name:<16} failed: {error}")
+            continue
+        first = f"{min(firsts):>17.0f}" if firsts else f"{'-':>17}"
+        print(f"{name:<16} {min(imports):>10.1f} {first}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
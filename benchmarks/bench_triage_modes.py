@@ -0,0 +1,70 @@
+"""Side-by-side latency of the two-call and combined triage flows.
+
+Starts fake_gemini_server.py in-process, points MedicalChatbot at it and
+runs the same queries through both triage modes, so no quota is used.
+
+Run from the repository root (requires google-generativeai):
+    python -m benchmarks.bench_triage_modes --queries 30 --latency-ms 300
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from fake_gemini_server import FakeGemini, start_server
+
+QUERIES = [
+    "I have had a persistent cough for three weeks",
+    "my son has a high fever and a rash",
+    "what are the benefits of regular exercise",
+    "recurring headaches every afternoon",
+    "how can I manage stress naturally",
+]
+
+
+def run_mode(mode, queries, fake):
+    # Imported late so GEMINI_API_ENDPOINT is already set for genai.configure
+    from category import MedicalChatbot
+
+    bot = MedicalChatbot(triage_mode=mode)
+    bot.severity_classifier = None  # measure the remote path only
+    before = fake.requests
+    latencies = []
+    for index, query in enumerate(queries):
+        start = time.perf_counter()
+        # A fresh user per query, so no history builds up across the run
+        bot.respond_threadsafe(f"{mode}-user{index}", query).result()
+        latencies.append((time.perf_counter() - start) * 1e3)
+    return latencies, fake.requests - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=30)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    args = parser.parse_args()
+
+    fake = FakeGemini(latency_ms=args.latency_ms)
+    server, url = start_server(fake)
+    workdir = tempfile.mkdtemp(prefix="bench_triage_modes_")
+    os.environ["GEMINI_API_ENDPOINT"] = url
+    os.environ["SEVERITY_MODEL_PATH"] = ""
+    os.environ["MODEL_CACHE_PATH"] = os.path.join(workdir, "models.json")
+    # Measure the model calls, not the default 15 requests/minute throttle
+    os.environ.setdefault("GEMINI_RPM", "100000")
+
+    # Unique suffixes keep the severity cache from hiding remote calls
+    queries = [f"{QUERIES[i % len(QUERIES)]} (case {i})" for i in range(args.queries)]
+
+    print(f"Fake model latency {args.latency_ms:.0f} ms, {len(queries)} queries per mode\n")
+    print(f"{'mode':<10} {'calls/query':>11} {'mean ms':>9} {'p50 ms':>9} {'max ms':>9}")
+    for mode in ("two_call", "combined"):
+        latencies, calls = run_mode(mode, queries, fake)
+        print(f"{mode:<10} {calls / len(queries):>11.2f} {statistics.mean(latencies):>9.1f} "
+              f"{statistics.median(latencies):>9.1f} {max(latencies):>9.1f}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""Load test of the full triage flow against the local fake Gemini server.
+
+Each simulated user sends messages through MedicalChatbot.respond, the
+triage path of medical_chat and chat_server.py: emergency keyword screen,
+severity, specialist, contact and answer. The run reports throughput and
+p50/p95/p99 latency per concurrency level. By default users are threads
+handing messages to the bot's loop, as the chat server does; with --async
+they are coroutines on one event loop.
+
+Run from the repository root (requires google-generativeai):
+    python -m benchmarks.load_triage --concurrency 1 8 32 --requests 200 \\
+        --latency lognormal:400:0.6 --error-rate 0.02
+    python -m benchmarks.load_triage --async --concurrency 100 400 --requests 800
+    python -m benchmarks.load_triage --concurrency 1 8 --requests 400 --hedge 90
+
+With --hedge every concurrency level runs twice against the same fake,
+once without hedging and once hedging at that percentile, each with a
+fresh scheduler, so the p95/p99 rows can be compared directly. Use a
+long-tail --latency for this; against a fixed latency every hedge is
+wasted quota.
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fake_gemini_server import FakeGemini, start_server
+
+MESSAGES = [
+    "What are the benefits of regular exercise?",
+    "How can I manage stress naturally?",
+    "I have had a persistent cough for three weeks",
+    "my son has a high fever since yesterday",
+    "recurring headaches every afternoon",
+    "What is blood pressure and why is it important?",
+    "What are common symptoms of allergies?",
+    "I think my father is having chest pain",
+]
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return float("nan")
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def run_triage(bot, message, user_id):
+    """One message through respond() from a plain thread, as chat_server.py sends it; returns success"""
+    return bot.respond_threadsafe(user_id, message).result().success
+
+
+def make_work(concurrency, requests, seed, run):
+    """(message, user_id) pairs for one run; the same seed picks the same messages"""
+    rng = random.Random(seed)
+    # Suffixes and users unique to the run keep the severity cache and earlier
+    # runs' conversation history from turning this into a cache test
+    return [(f"{rng.choice(MESSAGES)} (visit {run}-{i})", f"{run}-user{i % (concurrency * 4)}")
+            for i in range(requests)]
+
+
+def run_level(bot, concurrency, requests, seed, run):
+    work = make_work(concurrency, requests, seed, run)
+
+    def timed(item):
+        start = time.perf_counter()
+        try:
+            ok = run_triage(bot, *item)
+        except Exception:
+            ok = False
+        return (time.perf_counter() - start) * 1000, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(timed, work))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for latency, _ in results)
+    failures = sum(1 for _, ok in results if not ok)
+    return elapsed, latencies, failures
+
+
+def run_level_async(bot, concurrency, requests, seed, run):
+    work = make_work(concurrency, requests, seed, run)
+
+    async def run():
+        # The fake server speaks REST, whose calls run in the loop's worker threads
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=concurrency))
+        slots = asyncio.Semaphore(concurrency)
+
+        async def timed(item):
+            async with slots:
+                start = time.perf_counter()
+                try:
+                    ok = (await bot.respond(item[1], item[0])).success
+                except Exception:
+                    ok = False
+                return (time.perf_counter() - start) * 1000, ok
+
+        return await asyncio.gather(*(timed(item) for item in work))
+
+    start = time.perf_counter()
+    results = asyncio.run(run())
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for latency, _ in results)
+    failures = sum(1 for _, ok in results if not ok)
+    return elapsed, latencies, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, nargs="*", default=[1, 4, 16, 64])
+    parser.add_argument("--requests", type=int, default=200, help="Messages per concurrency level")
+    parser.add_argument("--latency", default="lognormal:400:0.6")
+    parser.add_argument("--ms-per-output-token", type=float, default=1.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--mode", choices=["two_call", "combined"], default="two_call")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--metrics", action="store_true", help="Print per-stage metrics after the run")
+    parser.add_argument("--hedge", type=float, default=0.0, metavar="PCT",
+                        help="Hedge after this percentile of recent latency (sets GEMINI_HEDGE_PERCENTILE)")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="Drive MedicalChatbot.respond from coroutines instead of threads")
+    args = parser.parse_args()
+
+    fake = FakeGemini(latency=args.latency, ms_per_output_token=args.ms_per_output_token,
+                      error_rate=args.error_rate, retry_after=1.0, seed=args.seed)
+    server, url = start_server(fake)
+    os.environ["GEMINI_API_ENDPOINT"] = url
+    os.environ["SEVERITY_MODEL_PATH"] = ""
+    # Measure the model path, not answer cache hits
+    os.environ.setdefault("ANSWER_CACHE_SIZE", "0")
+    os.environ.setdefault("GEMINI_RPM", "100000")
+    # Enough loop workers that REST calls don't queue behind each other
+    os.environ.setdefault("RESPOND_WORKERS", str(max(args.concurrency + [1])))
+
+    import triage_metrics
+    from category import MedicalChatbot
+    from request_scheduler import get_scheduler
+
+    if args.metrics:
+        triage_metrics.enable()
+
+    bot = MedicalChatbot(triage_mode=args.mode, use_model_cache=False)
+    print(f"Fake latency {args.latency}, 429 rate {args.error_rate:.0%}, mode {args.mode}, "
+          f"{'async' if args.use_async else 'threads'}, hedge {f'p{args.hedge:g} vs off' if args.hedge else 'off'}\n")
+    print(f"{'conc':>5} {'hedge':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'fail':>5} "
+          f"{'calls':>6} {'429s':>5} {'hedges':>7} {'wins':>5}")
+    for level in args.concurrency:
+        for hedge in ([0.0, args.hedge] if args.hedge else [0.0]):
+            label = f"p{hedge:g}" if hedge else "off"
+            if hedge:
+                os.environ["GEMINI_HEDGE_PERCENTILE"] = str(hedge)
+            else:
+                os.environ.pop("GEMINI_HEDGE_PERCENTILE", None)
+            # A fresh scheduler per run: its own budgets, breakers and hedge latency samples
+            get_scheduler.cache_clear()
+            calls_before, limited_before = fake.requests, fake.rate_limited
+            run = run_level_async if args.use_async else run_level
+            elapsed, latencies, failures = run(bot, level, args.requests, args.seed + level, f"c{level}-{label}")
+            stats = get_scheduler().stats()
+            print(f"{level:>5} {label:>6} {args.requests / elapsed:>8.1f} "
+                  f"{percentile(latencies, 50):>8.0f} {percentile(latencies, 95):>8.0f} "
+                  f"{percentile(latencies, 99):>8.0f} {failures:>5} {fake.requests - calls_before:>6} "
+                  f"{fake.rate_limited - limited_before:>5} {stats.get('hedges', 0):>7} {stats.get('hedge_wins', 0):>5}")
+    if args.metrics:
+        print()
+        print(triage_metrics.render_prometheus(), end="")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,105 +1,234 @@
+import asyncio
+import json
 import os
+import re
+import sys
+import threading
 import time
-import google.generativeai as genai
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
-load_dotenv()  # Load API key from .env
+from answer_cache import get_answer_cache
+from conversation_memory import ConversationStore
+from faq_store import get_store
+from lazy_import import lazy_module
+from model_discovery import load_models, profile_startup
+from model_registry import ModelRegistry
+from request_scheduler import get_scheduler, is_rate_limit_error
+from response_stream import chunk_text, iterate_in_thread
+from severity_cache import get_severity_cache, prompt_version
+from severity_classifier import get_classifier, log_example
+from triage_directory import load_directory
+import triage_metrics
+from triage_metrics import timed
+
+# The SDK is imported on first use so importing this module stays cheap
+genai = lazy_module("google.generativeai")
+
+# Model objects are shared by every bot in the process
+MODEL_REGISTRY = ModelRegistry(lambda *args, **kwargs: genai.GenerativeModel(*args, **kwargs))
+
+# Editing this prompt changes its version, which invalidates cached severities
+SEVERITY_PROMPT = """
+        Analyze this medical query and categorize its severity level:
+        "{user_input}"
 
+        Respond ONLY with one of these exact severity levels:
+        - emergency: Life-threatening conditions (heart attack, stroke, severe bleeding, difficulty breathing, etc.)
+        - urgent: Requires prompt medical attention but not immediately life-threatening (high fever, severe pain, etc.)
+        - moderate: Concerning symptoms that should be evaluated but not urgent (persistent cough, mild pain, etc.)
+        - mild: Minor issues that can be addressed with general advice (common cold, minor cuts, etc.)
 
-class MedicalChatbot:
-    def __init__(self):
-        genai.configure(api_key=os.environ.get("GEMINI_API_KEY"))
-        self.available_models = self.get_available_models()
-        self.selected_model = self.choose_free_tier_model()
-        self.retry_count = 0
-        self.max_retries = 2
-
-        # Severity categories and routing
-        self.severity_levels = {
-            "emergency": "🚨 EMERGENCY: Immediate specialist care needed",
-            "urgent": "⚠️ URGENT: Specialist consultation recommended",
-            "moderate": "🔶 MODERATE: Can consult with specialist when available",
-            "mild": "🔷 MILD: Volunteer can provide general advice"
-        }
-
-        # Comprehensive emergency keywords
-        self.emergency_keywords = [
-            'emergency', '911', '112', '999', 'urgent', 'dying', 'heart attack',
-            'stroke', 'chest pain', 'bleeding heavily', 'can\'t breathe',
-            'difficulty breathing', 'choking', 'severe pain', 'unconscious',
-            'passed out', 'fainted', 'seizure', 'convulsion', 'suicidal',
-            'homicidal', 'severe burn', 'broken bone', 'compound fracture',
-            'heavy bleeding', 'blood loss', 'poison', 'overdose', 'allergic reaction',
-            'anaphylaxis', 'swelling tongue', 'swelling throat', 'paralysis',
-            'numbness', 'sudden weakness', 'vision loss', 'sudden blindness',
-            'severe headache', 'worst headache', 'electric shock', 'drowning',
-            'smoke inhalation', 'carbon monoxide', 'stab wound', 'gunshot',
-            'head injury', 'concussion', 'loss of consciousness', 'violent trauma',
-            'crush injury', 'amputation', 'severed limb', 'sudden confusion',
-            'disorientation', 'slurred speech', 'facial drooping', 'arm weakness',
-            'speech difficulty', 'chest pressure', 'jaw pain', 'arm pain',
-            'shortness of breath', 'suffocating', 'blue lips', 'blue skin',
-            'cyanosis', 'severe abdominal pain', 'rigid abdomen', 'vomiting blood',
-            'blood in stool', 'black stool', 'projectile vomiting',
-            'high fever with rash', 'meningitis', 'neck stiffness', 'light sensitivity',
-            'severe dehydration', 'not urinating', 'sunken eyes', 'rapid heartbeat',
-            'palpitations', 'irregular heartbeat', 'cardiac arrest', 'no pulse',
-            'not breathing', 'self harm', 'cutting', 'attempted suicide'
-        ]
+        Your response should be only one word: emergency, urgent, moderate, or mild.
+        """
 
-        # Specialist database with contact information
-        self.specialists = {
-            "Cardiologist": {
-                "contact": "Cardiology Department: 555-1001\nDr. Smith: 555-1002",
-                "conditions": ["heart", "chest pain", "palpitations", "blood pressure"]
-            },
-            "Neurologist": {
-                "contact": "Neurology Department: 555-2001\nDr. Johnson: 555-2002",
-                "conditions": ["headache", "migraine", "seizure", "stroke", "numbness"]
-            },
-            "Gastroenterologist": {
-                "contact": "Gastroenterology Department: 555-3001\nDr. Williams: 555-3002",
-                "conditions": ["stomach", "abdominal", "digestive", "vomiting", "diarrhea"]
-            },
-            "Dermatologist": {
-                "contact": "Dermatology Department: 555-4001\nDr. Brown: 555-4002",
-                "conditions": ["rash", "skin", "acne", "eczema", "psoriasis"]
-            },
-            "Orthopedist": {
-                "contact": "Orthopedics Department: 555-5001\nDr. Davis: 555-5002",
-                "conditions": ["bone", "fracture", "joint", "sprain", "arthritis"]
-            },
-            "Pediatrician": {
-                "contact": "Pediatrics Department: 555-6001\nDr. Miller: 555-6002",
-                "conditions": ["child", "baby", "infant", "pediatric", "kids"]
-            },
-            "Gynecologist": {
-                "contact": "Gynecology Department: 555-7001\nDr. Wilson: 555-7002",
-                "conditions": ["women", "gynecological", "menstrual", "pregnancy"]
-            },
-            "General Practitioner": {
-                "contact": "Primary Care: 555-8001\nDr. Anderson: 555-8002",
-                "conditions": ["general", "fever", "cold", "flu", "checkup"]
-            },
-            "Internist": {
-                "contact": "Internal Medicine: 555-9001\nDr. Taylor: 555-9002",
-                "conditions": ["internal", "adult medicine", "chronic conditions"]
-            },
-            "Psychiatrist": {
-                "contact": "Psychiatry Department: 555-0101\nDr. Martin: 555-0102",
-                "conditions": ["mental", "depression", "anxiety", "suicidal", "emotional"]
-            },
-            "Emergency Department": {
-                "contact": "🚨 EMERGENCY: 911 or your local emergency number\nHospital ER: 555-0001",
-                "conditions": ["emergency", "life-threatening", "critical", "urgent"]
-            }
-        }
+# Many queued complaints in one call; items are tagged q1, q2, ...
+SEVERITY_BATCH_PROMPT = """
+        Categorize the severity level of each numbered medical query below.
 
-        # Volunteer contacts for mild conditions
-        self.volunteer_contacts = {
-            "General Health Volunteers": "Health Helpline: 555-HELP\nVolunteer Coordinator: 555-VOLUNTEER",
-            "Mental Health Support": "Crisis Text Line: Text HOME to 741741\nMental Health Volunteers: 555-MHSUPPORT"
-        }
+        Severity levels:
+        - emergency: Life-threatening conditions (heart attack, stroke, severe bleeding, difficulty breathing, etc.)
+        - urgent: Requires prompt medical attention but not immediately life-threatening (high fever, severe pain, etc.)
+        - moderate: Concerning symptoms that should be evaluated but not urgent (persistent cough, mild pain, etc.)
+        - mild: Minor issues that can be addressed with general advice (common cold, minor cuts, etc.)
+
+        Respond ONLY with a JSON array containing one {{"id": ..., "severity": ...}} object per query.
+
+        Queries:
+        {items}
+        """
+
+SEVERITY_BATCH_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "id": {"type": "string"},
+            "severity": {"type": "string", "enum": ["emergency", "urgent", "moderate", "mild"]},
+        },
+        "required": ["id", "severity"],
+    },
+}
+
+BATCH_ITEM_RE = re.compile(r"\bq(\d+)\b\W{0,20}?(emergency|urgent|moderate|mild)\b", re.IGNORECASE)
+
+
+def parse_severity_batch(text, count):
+    """Map a batch reply back to item order; unparseable items are None.
+
+    Accepts the requested JSON array, a {"q1": "mild"} object, or any text
+    with "q<n> ... <severity>" pairs, since models do not always honour the
+    schema.
+    """
+    results = [None] * count
+
+    def store(item_id, severity):
+        match = re.fullmatch(r"q?(\d+)", str(item_id).strip(), re.IGNORECASE)
+        severity = str(severity).strip().lower()
+        if match and severity in ("emergency", "urgent", "moderate", "mild"):
+            number = int(match.group(1))
+            if 1 <= number <= count:
+                results[number - 1] = severity
+
+    try:
+        data = json.loads(text)
+    except ValueError:
+        data = None
+    if isinstance(data, list):
+        for item in data:
+            if isinstance(item, dict):
+                store(item.get("id", ""), item.get("severity", ""))
+    elif isinstance(data, dict):
+        for item_id, severity in data.items():
+            store(item_id, severity)
+    else:
+        for number, severity in BATCH_ITEM_RE.findall(text):
+            store(number, severity)
+    return results
+
+
+# Structured output for the single-call triage mode
+TRIAGE_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "severity": {"type": "string", "enum": ["emergency", "urgent", "moderate", "mild"]},
+        "specialist": {"type": "string"},
+        "answer": {"type": "string"},
+    },
+    "required": ["severity", "specialist", "answer"],
+}
+
+TRIAGE_MODES = ("two_call", "combined")
+
+
+class TriageContext:
+    """Everything about one message: filled in by MedicalChatbot.respond"""
+
+    __slots__ = ("user_id", "text", "models", "emergency_matches", "severity", "specialist", "contact",
+                 "response", "success", "source", "started_at", "first_chunk_at", "finished_at")
+
+    def __init__(self, user_id, text, models):
+        self.user_id = user_id
+        self.text = text
+        # Model preference order when the message arrived; later model switches don't affect it
+        self.models = models
+        self.emergency_matches = []
+        self.severity = None
+        self.specialist = None
+        self.contact = None
+        self.response = None
+        self.success = False
+        # "emergency" (keyword screen), "faq", "combined" or "model"
+        self.source = None
+        self.started_at = time.perf_counter()
+        self.first_chunk_at = None
+        self.finished_at = None
+
+    @property
+    def first_chunk_ms(self):
+        if self.first_chunk_at is None:
+            return None
+        return (self.first_chunk_at - self.started_at) * 1000
+
+    @property
+    def total_ms(self):
+        if self.finished_at is None:
+            return None
+        return (self.finished_at - self.started_at) * 1000
+
+
+class MedicalChatbot:
+    def __init__(self, triage_mode=None, use_model_cache=True):
+        load_dotenv()  # Load API key from .env
+        endpoint = os.environ.get("GEMINI_API_ENDPOINT")
+        # The SDK's REST transport has no async calls; respond() runs them in threads instead
+        self.rest_transport = bool(endpoint)
+        if endpoint:
+            # Local or proxy endpoint, e.g. fake_gemini_server.py
+            genai.configure(api_key=os.environ.get("GEMINI_API_KEY") or "local",
+                            transport="rest", client_options={"api_endpoint": endpoint})
+        else:
+            genai.configure(api_key=os.environ.get("GEMINI_API_KEY"))
+        # Start from the on-disk model list; a stale list is refreshed in the background
+        self.available_models, self.model_source = load_models(
+            self.get_available_models, on_refresh=self.set_available_models, use_cache=use_model_cache
+        )
+        self.selected_model = self.choose_free_tier_model()
+        # Follow-up questions keep their context within a token budget
+        self.conversations = ConversationStore(
+            budget_tokens=int(os.environ.get("CONVERSATION_TOKEN_BUDGET", "2000"))
+        )
+
+        # "two_call" asks for severity and answer separately, "combined" asks once
+        self.triage_mode = triage_mode or os.environ.get("TRIAGE_MODE", "two_call")
+        if self.triage_mode not in TRIAGE_MODES:
+            raise ValueError(f"Unknown triage mode: {self.triage_mode}")
+
+        # Severity labels, emergency keywords, specialists and volunteer contacts
+        # are loaded once per process and shared read-only by every instance
+        directory = load_directory()
+        self.severity_levels = directory.severity_levels
+        self.emergency_keywords = directory.emergency_keywords
+        self.emergency_matcher = directory.emergency_matcher
+        self.specialists = directory.specialists
+        self.specialist_router = directory.specialist_router
+        self.volunteer_contacts = directory.volunteer_contacts
+
+        # Like the directory, the classifier, caches and FAQ store below are shared
+        # by every instance with the same settings
+
+        # Local severity model; Gemini is only asked when it is unsure
+        self.severity_classifier = get_classifier(os.environ.get("SEVERITY_MODEL_PATH", "severity_model.json"))
+        self.severity_confidence = float(os.environ.get("SEVERITY_CONFIDENCE", "0.85"))
+        # Optional JSONL log of Gemini severity answers, used to train the local model
+        self.severity_log_path = os.environ.get("SEVERITY_LOG_PATH")
+        # Remembers Gemini severity answers; SEVERITY_CACHE_DB makes it survive restarts.
+        # Combined-mode replies are not cached: the severity comes with the answer.
+        self.severity_cache = get_severity_cache(
+            SEVERITY_PROMPT,
+            max_entries=int(os.environ.get("SEVERITY_CACHE_SIZE", "10000")),
+            ttl_seconds=float(os.environ.get("SEVERITY_CACHE_TTL", str(7 * 24 * 3600))),
+            db_path=os.environ.get("SEVERITY_CACHE_DB"),
+        )
+        # One in-flight respond() per user so turns reach the memory in order
+        self._user_locks = weakref.WeakValueDictionary()
+        # Event loop for callers on plain threads, see respond_threadsafe()
+        self._loop = None
+        self._loop_lock = threading.Lock()
+        # Reuses answers to near-identical mild questions; ANSWER_CACHE_SIZE=0 turns it off
+        answer_cache_size = int(os.environ.get("ANSWER_CACHE_SIZE", "2000"))
+        self.answer_cache = get_answer_cache(
+            self.create_medical_system_prompt(),
+            max_entries=answer_cache_size,
+            threshold=float(os.environ.get("ANSWER_CACHE_THRESHOLD", "0.85")),
+            ttl_seconds=float(os.environ.get("ANSWER_CACHE_TTL", str(30 * 24 * 3600))),
+            db_path=os.environ.get("ANSWER_CACHE_DB"),
+        ) if answer_cache_size > 0 else None
+        # Answers to curated questions built offline by faq_store.py; only entries
+        # generated with the current answer prompt are served
+        self.faq_store = get_store(os.environ.get("FAQ_STORE_PATH", "faq_answers.bin"))
+        self.faq_prompt_version = prompt_version(self.create_medical_system_prompt())
 
     def get_available_models(self):
         """Get all available models that support content generation"""
@@ -110,13 +239,17 @@ class MedicalChatbot:
                     models.append({
                         'name': model.name,
                         'description': getattr(model, 'description', 'No description'),
-                        'supported_methods': model.supported_generation_methods
+                        'supported_methods': list(model.supported_generation_methods)
                     })
             return models
         except Exception as e:
             print(f"Error fetching models: {e}")
             return []
 
+    def set_available_models(self, models):
+        """Replace the model list after a background refresh"""
+        self.available_models = models
+
     def choose_free_tier_model(self):
         """Select a model that's likely to be in free tier"""
         # Free tier models (avoid pro/preview models that have quotas)
@@ -154,11 +287,28 @@ class MedicalChatbot:
         for model in self.available_models:
             for free_model in free_models:
                 if free_model in model['name'] and model['name'] != self.selected_model:
-                    self.selected_model = model['name']
+                    self.select_model(model['name'])
                     print(f"🔄 Switched to free model: {self.selected_model}")
                     return True
         return False
 
+    def candidate_models(self):
+        """Selected model first, then free-tier models the scheduler can fail over to"""
+        free_models = ['gemini-1.0-pro', 'gemini-pro', 'gemini-1.5-flash', 'gemini-2.0-flash']
+        fallbacks = [
+            model['name'] for model in self.available_models
+            if any(free_model in model['name'] for free_model in free_models)
+        ]
+        return [self.selected_model] + fallbacks
+
+    def select_model(self, model_name):
+        """Change the active model and drop cached objects built for the old one"""
+        previous = self.selected_model
+        self.selected_model = model_name
+        if previous != model_name:
+            MODEL_REGISTRY.invalidate(previous)
+            triage_metrics.inc("model_switches_total")
+
     def create_medical_system_prompt(self):
         """Create a comprehensive medical system prompt"""
         return """You are a medical information assistant providing general health education.
@@ -169,61 +319,156 @@ class MedicalChatbot:
         Always include: "Consult healthcare professionals for personal medical advice."
         """
 
+    @timed("assess_severity")
     def assess_severity(self, user_input):
         """Assess the severity of the medical condition described"""
-        severity_prompt = f"""
-        Analyze this medical query and categorize its severity level:
-        "{user_input}"
+        severity = self.assess_severity_local(user_input)
+        if severity is None:
+            severity = self.assess_severity_remote(user_input)
+        triage_metrics.inc("triage_severity_total", severity=severity)
+        return severity
 
-        Respond ONLY with one of these exact severity levels:
-        - emergency: Life-threatening conditions (heart attack, stroke, severe bleeding, difficulty breathing, etc.)
-        - urgent: Requires prompt medical attention but not immediately life-threatening (high fever, severe pain, etc.)
-        - moderate: Concerning symptoms that should be evaluated but not urgent (persistent cough, mild pain, etc.)
-        - mild: Minor issues that can be addressed with general advice (common cold, minor cuts, etc.)
+    def assess_severity_local(self, user_input, model=None):
+        """Answer from the local classifier or the cache, or None if Gemini is needed.
 
-        Your response should be only one word: emergency, urgent, moderate, or mild.
+        Cached severities are keyed by the request's preferred model (default:
+        the selected one), whichever model the scheduler failed over to.
         """
+        if self.severity_classifier is not None:
+            severity, confidence = self.severity_classifier.predict(user_input)
+            if confidence >= self.severity_confidence:
+                return severity
 
-        try:
-            model = genai.GenerativeModel(
-                model_name=self.selected_model,
+        return self.severity_cache.get(user_input, model or self.selected_model)
+
+    def assess_severity_batch(self, queries, chunk_size=25, max_workers=4):
+        """Assess many queued complaints, packing the remote ones into chunked prompts.
+
+        Returns one severity per query, in order. Queries the local classifier
+        or cache can answer never leave the process; the rest are sent
+        chunk_size at a time with per-item ids. Items missing from a reply or
+        unparseable are retried one by one with assess_severity.
+        """
+        results = [self.assess_severity_local(query) for query in queries]
+        pending = [index for index, severity in enumerate(results) if severity is None]
+        chunks = [pending[i:i + chunk_size] for i in range(0, len(pending), chunk_size)]
+
+        def run_chunk(chunk):
+            return chunk, self.assess_severity_chunk([queries[index] for index in chunk])
+
+        if chunks:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as pool:
+                for chunk, (severities, _) in pool.map(run_chunk, chunks):
+                    for index, severity in zip(chunk, severities):
+                        if severity is not None:
+                            results[index] = severity
+                            self.severity_cache.put(queries[index], self.selected_model, severity)
+
+        for index, severity in enumerate(results):
+            if severity is None:
+                results[index] = self.assess_severity_remote(queries[index])
+        return results
+
+    def assess_severity_chunk(self, queries):
+        """One Gemini call for a chunk; returns ([severity or None, ...], model_used)"""
+        items = "\n".join(
+            f"q{number}: {' '.join(query.split())}" for number, query in enumerate(queries, 1)
+        )
+        prompt = SEVERITY_BATCH_PROMPT.format(items=items)
+
+        def send(model_name):
+            model = MODEL_REGISTRY.get(
+                model_name,
                 generation_config={
                     "temperature": 0.1,
-                    "max_output_tokens": 10,
+                    "max_output_tokens": 20 * len(queries) + 50,
+                    "response_mime_type": "application/json",
+                    "response_schema": SEVERITY_BATCH_SCHEMA,
                 }
             )
+            return model.generate_content(prompt).text
 
-            response = model.generate_content(severity_prompt)
-            severity = response.text.strip().lower()
+        try:
+            text, model_used = get_scheduler().call(send, self.candidate_models())
+        except Exception as e:
+            print(f"Error assessing severity batch: {e}")
+            return [None] * len(queries), None
+        return parse_severity_batch(text, len(queries)), model_used
+
+    def severity_model(self, model_name):
+        """Shared model object for single-query severity calls"""
+        return MODEL_REGISTRY.get(
+            model_name,
+            generation_config={
+                "temperature": 0.1,
+                "max_output_tokens": 10,
+            }
+        )
 
-            # Validate the response
-            if severity not in ["emergency", "urgent", "moderate", "mild"]:
-                # Default to moderate if the response is unclear
-                severity = "moderate"
+    def record_severity(self, user_input, text, model_used, model=None):
+        """Validate a severity reply; valid answers are cached and logged.
 
-            return severity
+        model is the request's preferred model, the cache key that
+        assess_severity_local reads; model_used answered and is logged.
+        """
+        severity = text.strip().lower()
 
-        except Exception as e:
-            print(f"Error assessing severity: {e}")
-            # Default to moderate in case of error
+        # Validate the response
+        if severity not in ["emergency", "urgent", "moderate", "mild"]:
+            # Default to moderate if the response is unclear
             return "moderate"
+        self.severity_cache.put(user_input, model or self.selected_model, severity)
+        if self.severity_log_path:
+            log_example(self.severity_log_path, user_input, severity, model_used)
+        return severity
+
+    def severity_error(self, error):
+        print(f"Error assessing severity: {error}")
+        triage_metrics.inc("triage_stage_errors_total", stage="assess_severity")
+        # Default to moderate in case of error
+        return "moderate"
+
+    def assess_severity_remote(self, user_input):
+        """Ask Gemini for the severity level through the shared scheduler"""
+        severity_prompt = SEVERITY_PROMPT.format(user_input=user_input)
+
+        def send(model_name):
+            return self.severity_model(model_name).generate_content(severity_prompt).text
 
+        models = self.candidate_models()
+        try:
+            text, model_used = get_scheduler().hedged_call(send, models, "assess_severity")
+        except Exception as e:
+            return self.severity_error(e)
+        return self.record_severity(user_input, text, model_used, models[0])
+
+    @timed("keyword_screen")
+    def detect_emergency(self, user_input):
+        """Return every emergency keyword found in the message with its span and edit distance"""
+        matches = self.emergency_matcher.search(user_input)
+        if matches:
+            triage_metrics.inc("triage_emergency_keyword_total",
+                               match="fuzzy" if all(match.distance for match in matches) else "exact")
+        return matches
+
+    def rank_specialists(self, user_input, limit=None):
+        """Return scored specialist candidates for the query, best first"""
+        return self.specialist_router.rank(user_input, limit=limit)
+
+    @timed("get_specialist_type")
     def get_specialist_type(self, user_input, severity):
         """Determine which specialist would be most appropriate"""
         if severity == "emergency":
             return "Emergency Department"
 
-        # Check for specific conditions that match specialist expertise
-        user_input_lower = user_input.lower()
-
-        for specialist, info in self.specialists.items():
-            for condition in info["conditions"]:
-                if condition in user_input_lower and specialist != "Emergency Department":
-                    return specialist
+        candidates = self.rank_specialists(user_input, limit=1)
+        if candidates:
+            return candidates[0].specialist
 
         # Default to General Practitioner if no specific match
         return "General Practitioner"
 
+    @timed("get_contact_info")
     def get_contact_info(self, specialist_type, severity):
         """Get contact information for the appropriate specialist or volunteer"""
         if severity in ["emergency", "urgent"]:
@@ -240,44 +485,394 @@ class MedicalChatbot:
             # Return volunteer contact information
             return "\n".join([f"{service}: {contact}" for service, contact in self.volunteer_contacts.items()])
 
-    def get_medical_response(self, user_input, severity):
-        """Get response with error handling and retry logic"""
-        try:
-            # Add severity context to the system prompt
-            enhanced_prompt = self.create_medical_system_prompt() + f"""
+    def answer_model(self, model_name, severity):
+        """Shared model object for answers at a given severity"""
+        # Add severity context to the system prompt
+        enhanced_prompt = self.create_medical_system_prompt() + f"""
             Note: This query has been assessed as {severity} severity.
             """
+        return MODEL_REGISTRY.get(
+            model_name,
+            system_instruction=enhanced_prompt,
+            generation_config={
+                "temperature": 0.2,
+                "max_output_tokens": 1024,
+            }
+        )
 
-            model = genai.GenerativeModel(
-                model_name=self.selected_model,
-                system_instruction=enhanced_prompt,
-                generation_config={
-                    "temperature": 0.2,
-                    "max_output_tokens": 1024,
-                }
+    def error_response(self, error):
+        """User-facing message for a failed answer"""
+        if is_rate_limit_error(error):
+            return "I'm experiencing high demand. Please try again in a minute."
+        return f"Sorry, I'm having trouble responding. Error: {error}"
+
+    def cached_answer(self, user_input, severity, memory):
+        """Stored answer to a near-identical mild question, or None.
+
+        Only a conversation's first question is looked up: a follow-up ("what
+        about for my son?") means something different in every conversation.
+        """
+        if self.answer_cache is None or not memory.is_empty:
+            return None
+        found = self.answer_cache.get(user_input, severity)
+        if severity in self.answer_cache.severities:
+            triage_metrics.inc("answer_cache_total", result="hit" if found else "miss")
+        return found[0] if found else None
+
+    def faq_answer(self, user_input, user_id="local"):
+        """(severity, answer) from the precomputed FAQ store, or None"""
+        if self.faq_store is None:
+            return None
+        found = self.faq_store.lookup(user_input)
+        if found is None or found[3] != self.faq_prompt_version:
+            return None
+        _, answer, severity, _ = found
+        triage_metrics.inc("faq_store_hits_total")
+        triage_metrics.inc("triage_severity_total", severity=severity)
+        memory = self.conversations.get(user_id)
+        memory.add_turn("user", user_input)
+        memory.add_turn("model", answer)
+        return severity, answer
+
+    def faq_entry(self, question):
+        """Generate (answer, severity) for the FAQ build; None for questions that need a person"""
+        severity = self.assess_severity(question)
+        if severity not in ("mild", "moderate"):
+            print(f"Skipping {severity} question: {question}")
+            return None
+        # A throwaway conversation so answers don't depend on each other
+        user_id = f"faq:{question}"
+        response, success = self.get_medical_response(question, severity, user_id)
+        self.conversations.forget(user_id)
+        return (response, severity) if success else None
+
+    @timed("get_medical_response")
+    def get_medical_response(self, user_input, severity, user_id="local"):
+        """Get response through the shared scheduler (rate limits, retries, failover)"""
+        # Recent turns and the running summary go ahead of the new message
+        memory = self.conversations.get(user_id)
+        cached = self.cached_answer(user_input, severity, memory)
+        if cached is not None:
+            self.remember_answer(memory, user_input, cached, severity)
+            return cached, True
+        standalone = memory.is_empty
+        contents = memory.history() + [{"role": "user", "parts": [user_input]}]
+
+        def send(model_name):
+            return self.answer_model(model_name, severity).generate_content(contents).text
+
+        try:
+            text, _ = get_scheduler().hedged_call(send, self.candidate_models(), "get_medical_response")
+        except Exception as e:
+            triage_metrics.inc("triage_stage_errors_total", stage="get_medical_response")
+            return self.error_response(e), False
+
+        self.remember_answer(memory, user_input, text, severity, cacheable=standalone)
+        return text, True
+
+    def remember_answer(self, memory, user_input, text, severity, cacheable=False):
+        """Add a finished exchange to the conversation, and to the answer cache if cacheable.
+
+        Only fresh answers to a conversation's first question are cacheable;
+        anything else was conditioned on this user's history.
+        """
+        memory.add_turn("user", user_input)
+        memory.add_turn("model", text)
+        if cacheable and self.answer_cache is not None:
+            self.answer_cache.put(user_input, text, severity)
+
+    def create_triage_system_prompt(self):
+        """System prompt for the single-call triage mode"""
+        specialists = ", ".join(name for name in self.specialists)
+        return self.create_medical_system_prompt() + f"""
+        Also triage the query. Reply with JSON only, with these fields:
+        - severity: one of emergency, urgent, moderate, mild
+        - specialist: the best match from: {specialists}
+        - answer: your general health information reply
+        """
+
+    def parse_triage_response(self, text):
+        """Validate the JSON reply of the combined call; returns None if unusable"""
+        text = text.strip()
+        if text.startswith("```"):
+            # Some models wrap JSON in a code fence despite the mime type
+            text = text.strip("`")
+            if text.startswith("json"):
+                text = text[4:]
+        try:
+            data = json.loads(text)
+        except ValueError:
+            return None
+        if not isinstance(data, dict):
+            return None
+
+        severity = str(data.get("severity", "")).strip().lower()
+        answer = data.get("answer")
+        if severity not in self.severity_levels or not isinstance(answer, str) or not answer.strip():
+            return None
+
+        specialist = data.get("specialist")
+        if severity == "emergency":
+            specialist = "Emergency Department"
+        elif specialist not in self.specialists or specialist == "Emergency Department":
+            # Unknown or implausible suggestion; the caller uses the local router
+            specialist = None
+        return severity, specialist, answer.strip()
+
+    def triage_model(self, model_name):
+        """Shared model object for the single-call triage mode"""
+        return MODEL_REGISTRY.get(
+            model_name,
+            system_instruction=self.create_triage_system_prompt(),
+            generation_config={
+                "temperature": 0.2,
+                "max_output_tokens": 1024,
+                "response_mime_type": "application/json",
+                "response_schema": TRIAGE_RESPONSE_SCHEMA,
+            }
+        )
+
+    def combined_error(self, error):
+        print(f"Error in combined triage call: {error}")
+        triage_metrics.inc("triage_stage_errors_total", stage="combined_triage")
+        return None
+
+    def record_combined(self, memory, user_input, text):
+        """(severity, specialist, answer) from a combined reply, or None to fall back"""
+        parsed = self.parse_triage_response(text) if text is not None else None
+        if parsed is None:
+            return None
+        severity, specialist, answer = parsed
+        memory.add_turn("user", user_input)
+        memory.add_turn("model", answer)
+        if specialist is None:
+            specialist = self.get_specialist_type(user_input, severity)
+        triage_metrics.inc("triage_severity_total", severity=severity)
+        return severity, specialist, answer
+
+    # -------- Async API: many conversations on one event loop --------
+
+    async def generate_async(self, model, contents, stream=False):
+        """generate_content without blocking the event loop.
+
+        gRPC uses the SDK's async calls; the REST transport has none, so the
+        call runs in a worker thread. With stream=True returns
+        (first_chunk, async iterator over the remaining chunks).
+        """
+        if not self.rest_transport:
+            response = await model.generate_content_async(contents, stream=stream)
+            if not stream:
+                return response
+            chunks = response.__aiter__()
+            return await anext(chunks, None), chunks
+        if not stream:
+            return await asyncio.to_thread(model.generate_content, contents)
+        chunks = await asyncio.to_thread(lambda: iter(model.generate_content(contents, stream=True)))
+        return await asyncio.to_thread(next, chunks, None), iterate_in_thread(chunks)
+
+    @timed("assess_severity")
+    async def assess_severity_async(self, user_input, models=None):
+        """assess_severity for the event loop"""
+        models = models or self.candidate_models()
+        severity = self.assess_severity_local(user_input, models[0])
+        if severity is None:
+            severity_prompt = SEVERITY_PROMPT.format(user_input=user_input)
+
+            async def send(model_name):
+                return (await self.generate_async(self.severity_model(model_name), severity_prompt)).text
+
+            try:
+                text, model_used = await get_scheduler().hedged_call_async(send, models, "assess_severity")
+            except Exception as e:
+                severity = self.severity_error(e)
+            else:
+                severity = self.record_severity(user_input, text, model_used, models[0])
+        triage_metrics.inc("triage_severity_total", severity=severity)
+        return severity
+
+    @timed("get_medical_response")
+    async def get_medical_response_async(self, user_input, severity, user_id="local", on_chunk=None, models=None):
+        """get_medical_response for the event loop; returns (response, success).
+
+        With on_chunk the answer is streamed and on_chunk(text) runs for every
+        chunk as it arrives.
+        """
+        memory = self.conversations.get(user_id)
+        cached = self.cached_answer(user_input, severity, memory)
+        if cached is not None:
+            self.remember_answer(memory, user_input, cached, severity)
+            if on_chunk is not None:
+                on_chunk(cached)
+            return cached, True
+        standalone = memory.is_empty
+        contents = memory.history() + [{"role": "user", "parts": [user_input]}]
+        stream = on_chunk is not None
+
+        async def send(model_name):
+            # Streams pull the first chunk here so rate limits are still retried
+            return await self.generate_async(self.answer_model(model_name, severity), contents, stream=stream)
+
+        started_at = time.perf_counter()
+        try:
+            # Streams hedge on the time to their first chunk
+            result, _ = await get_scheduler().hedged_call_async(
+                send, models or self.candidate_models(), "first_chunk" if stream else "get_medical_response"
             )
+            if stream:
+                first, rest = result
+                parts = []
+                if first is not None:
+                    parts.append(chunk_text(first))
+                    on_chunk(parts[-1])
+                    triage_metrics.observe("triage_stream_ttft_seconds", time.perf_counter() - started_at)
+                async for chunk in rest:
+                    parts.append(chunk_text(chunk))
+                    on_chunk(parts[-1])
+                text = "".join(parts)
+            else:
+                text = result.text
+        except Exception as e:
+            triage_metrics.inc("triage_stage_errors_total", stage="get_medical_response")
+            return self.error_response(e), False
 
-            chat_session = model.start_chat()
-            response = chat_session.send_message(user_input)
-            return response.text, True
+        self.remember_answer(memory, user_input, text, severity, cacheable=standalone)
+        return text, True
 
+    async def triage_combined_async(self, user_input, user_id, models=None):
+        """The combined-mode call of respond(); (severity, specialist, answer) or None"""
+        memory = self.conversations.get(user_id)
+        contents = memory.history() + [{"role": "user", "parts": [user_input]}]
+
+        async def send(model_name):
+            return (await self.generate_async(self.triage_model(model_name), contents)).text
+
+        models = models or self.candidate_models()
+        try:
+            text, _ = await get_scheduler().call_async(send, models)
         except Exception as e:
-            error_msg = str(e)
+            text = self.combined_error(e)
+        return self.record_combined(memory, user_input, text)
 
-            # Check if it's a rate limit error
-            if "429" in error_msg or "quota" in error_msg.lower() or "rate" in error_msg.lower():
-                print(f"⏳ Rate limit hit. Retrying in 5 seconds...")
-                time.sleep(5)
+    async def respond(self, user_id, text, on_chunk=None, on_triage=None):
+        """Triage and answer one message; returns its TriageContext.
+
+        Safe to run for many users at once on one event loop: everything about
+        the message lives in the context, and messages from the same user are
+        answered one at a time so the conversation stays in order.
+        on_triage(context) runs once severity and routing are known, before the
+        answer; on_chunk(text) receives the answer as it arrives.
+        """
+        lock = self._user_locks.get(user_id)
+        if lock is None:
+            lock = self._user_locks[user_id] = asyncio.Lock()
+        async with lock:
+            context = TriageContext(user_id, text, self.candidate_models())
+            try:
+                await self._respond(context, on_chunk, on_triage)
+            finally:
+                context.finished_at = time.perf_counter()
+        return context
+
+    async def respond_stream(self, user_id, text, on_triage=None):
+        """respond() as an async iterator of the answer's text chunks.
+
+        Chunks are yielded as they arrive. on_triage(context) runs as in
+        respond(); that context holds the outcome (success, error response,
+        timings) once the stream ends. Emergencies and failed answers yield
+        nothing. Leaving the loop early cancels the request.
+        """
+        chunks = asyncio.Queue()
+        done = object()
+        task = asyncio.ensure_future(self.respond(user_id, text, on_chunk=chunks.put_nowait, on_triage=on_triage))
+        task.add_done_callback(lambda _: chunks.put_nowait(done))
+        try:
+            while True:
+                chunk = await chunks.get()
+                if chunk is done:
+                    break
+                yield chunk
+            task.result()
+        finally:
+            if not task.done():
+                task.cancel()
 
-                if self.retry_count < self.max_retries:
-                    self.retry_count += 1
-                    # Try switching to free model
-                    if self.switch_to_free_model():
-                        return self.get_medical_response(user_input, severity)
-                else:
-                    return "I'm experiencing high demand. Please try again in a minute.", False
+    def event_loop(self):
+        """The bot's own event loop, started on a daemon thread on first use.
 
-            return f"Sorry, I'm having trouble responding. Error: {error_msg}", False
+        Its default executor is sized by RESPOND_WORKERS, since REST calls and
+        streams each hold a worker thread while they wait.
+        """
+        with self._loop_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                loop.set_default_executor(ThreadPoolExecutor(
+                    max_workers=int(os.environ.get("RESPOND_WORKERS", "64")), thread_name_prefix="respond"
+                ))
+                threading.Thread(target=loop.run_forever, name="respond-loop", daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    def respond_threadsafe(self, user_id, text, on_chunk=None, on_triage=None):
+        """respond() from a thread outside the loop; returns a concurrent Future.
+
+        The callbacks run on the loop thread and must not block.
+        """
+        return asyncio.run_coroutine_threadsafe(
+            self.respond(user_id, text, on_chunk=on_chunk, on_triage=on_triage), self.event_loop()
+        )
+
+    async def _respond(self, context, on_chunk, on_triage):
+        text, user_id = context.text, context.user_id
+
+        def route(severity, specialist):
+            context.severity, context.specialist = severity, specialist
+            context.contact = self.get_contact_info(specialist, severity)
+            if on_triage is not None:
+                on_triage(context)
+
+        def deliver(response, success=True):
+            context.response, context.success = response, success
+            context.first_chunk_at = time.perf_counter()
+            if on_chunk is not None and success:
+                on_chunk(response)
+
+        # Emergency keywords get an immediate answer without any model call
+        context.emergency_matches = self.detect_emergency(text)
+        if context.emergency_matches:
+            context.source = "emergency"
+            context.success = True
+            route("emergency", "Emergency Department")
+            return
+
+        # Like the answer cache, FAQ answers are for questions asked without history
+        faq = self.faq_answer(text, user_id) if self.conversations.get(user_id).is_empty else None
+        if faq is not None:
+            context.source = "faq"
+            route(faq[0], self.get_specialist_type(text, faq[0]))
+            deliver(faq[1])
+            return
+
+        if self.triage_mode == "combined":
+            triaged = await self.triage_combined_async(text, user_id, context.models)
+            if triaged is not None:
+                context.source = "combined"
+                route(triaged[0], triaged[1])
+                deliver(triaged[2])
+                return
+
+        # Route first, then stream the answer as it arrives
+        context.source = "model"
+        severity = await self.assess_severity_async(text, context.models)
+        route(severity, self.get_specialist_type(text, severity))
+
+        def chunk(part):
+            if context.first_chunk_at is None:
+                context.first_chunk_at = time.perf_counter()
+            on_chunk(part)
+
+        context.response, context.success = await self.get_medical_response_async(
+            text, severity, user_id, on_chunk=chunk if on_chunk is not None else None, models=context.models
+        )
 
     def medical_chat(self):
         """Main medical chat function"""
@@ -287,72 +882,85 @@ class MedicalChatbot:
         print("💡 I can help assess your medical concerns")
         print("⚠️  NOT for diagnoses or emergencies")
         print("📋 I'll direct you to appropriate care based on severity")
-        print("Type 'exit' to quit, 'model' to switch models")
+        print("Type 'exit' to quit, 'model' to switch models, 'new' to start a new conversation")
         print("=" * 60)
 
-        while True:
-            try:
-                user_input = input("\n👤 You: ").strip()
-
-                if user_input.lower() == 'exit':
-                    print("\nThank you! Stay healthy! 🌟")
+        # One loop for the whole session: async model clients stay bound to it
+        loop = asyncio.new_event_loop()
+        try:
+            while True:
+                try:
+                    user_input = input("\n👤 You: ").strip()
+
+                    if user_input.lower() == 'exit':
+                        print("\nThank you! Stay healthy! 🌟")
+                        break
+
+                    elif user_input.lower() == 'new':
+                        self.conversations.forget("local")
+                        print("🧹 Started a new conversation")
+                        continue
+
+                    elif user_input.lower() == 'model':
+                        self.show_available_models()
+                        new_model = input("Enter model name to switch: ").strip()
+                        if new_model:
+                            self.select_model(new_model)
+                            print(f"✅ Switched to: {self.selected_model}")
+                        continue
+
+                    print("🔍 Assessing your condition...")
+                    context = loop.run_until_complete(self.respond(
+                        "local", user_input, on_chunk=lambda text: print(text, end="", flush=True),
+                        on_triage=self.print_triage,
+                    ))
+                    if context.source == "emergency":
+                        continue
+                    if not context.success:
+                        print(f"\n❌ {context.response}")
+                    elif context.source == "model":
+                        print(f"\n⏱️  First token {context.first_chunk_ms or 0:.0f} ms, total {context.total_ms:.0f} ms")
+                    else:
+                        print()
+
+                except KeyboardInterrupt:
+                    print("\n\nGoodbye! 👋")
                     break
-
-                elif user_input.lower() == 'model':
-                    self.show_available_models()
-                    new_model = input("Enter model name to switch: ").strip()
-                    if new_model:
-                        self.selected_model = new_model
-                        print(f"✅ Switched to: {self.selected_model}")
-                    continue
-
-                # Check for emergency keywords - immediate response
-                if any(keyword in user_input.lower() for keyword in self.emergency_keywords):
-                    print("\n🚨 EMERGENCY DETECTED: Please call your local emergency number immediately!")
-                    print("💡 You should go to the Emergency Department right away")
-                    print(f"📞 {self.specialists['Emergency Department']['contact']}")
-                    continue
-
-                # Assess severity of the condition
-                print("🔍 Assessing your condition...")
-                severity = self.assess_severity(user_input)
-                print(f"\n{self.severity_levels[severity]}")
-
-                # Determine appropriate specialist
-                specialist = self.get_specialist_type(user_input, severity)
-                contact_info = self.get_contact_info(specialist, severity)
-
-                # Route to appropriate care based on severity
-                if severity == "emergency":
-                    print("🚨 Please go to the Emergency Department or call emergency services immediately!")
-                    print(f"📞 {contact_info}")
-                elif severity == "urgent":
-                    print(f"📞 Please contact a {specialist} as soon as possible:")
-                    print(f"   {contact_info}")
-                elif severity == "moderate":
-                    print(f"📅 Consider scheduling an appointment with a {specialist}:")
-                    print(f"   {contact_info}")
-                else:  # mild
-                    print("💬 A volunteer can help with general advice:")
-                    print(f"   {contact_info}")
-
-                # Get medical response
-                response, success = self.get_medical_response(user_input, severity)
-
-                if success:
-                    print(f"\n🩺 Medical Information: {response}")
-                else:
-                    print(f"\n❌ {response}")
-
-                # Reset retry count after successful response
-                if success:
-                    self.retry_count = 0
-
-            except KeyboardInterrupt:
-                print("\n\nGoodbye! 👋")
-                break
-            except Exception as e:
-                print(f"\n❌ Unexpected error: {e}")
+                except Exception as e:
+                    print(f"\n❌ Unexpected error: {e}")
+        finally:
+            loop.close()
+
+    def print_triage(self, context):
+        """Print the severity and where to get care, ahead of the answer"""
+        severity, specialist, contact_info = context.severity, context.specialist, context.contact
+        if context.source == "emergency":
+            matched = ", ".join(dict.fromkeys(
+                match.keyword if not match.distance
+                else f"{match.keyword} ~ '{context.text[match.start:match.end]}'"
+                for match in context.emergency_matches
+            ))
+            print(f"\n🚨 EMERGENCY DETECTED ({matched}): Please call your local emergency number immediately!")
+            print("💡 You should go to the Emergency Department right away")
+            print(f"📞 {contact_info}")
+            return
+
+        print(f"\n{self.severity_levels[severity]}")
+
+        # Route to appropriate care based on severity
+        if severity == "emergency":
+            print("🚨 Please go to the Emergency Department or call emergency services immediately!")
+            print(f"📞 {contact_info}")
+        elif severity == "urgent":
+            print(f"📞 Please contact a {specialist} as soon as possible:")
+            print(f"   {contact_info}")
+        elif severity == "moderate":
+            print(f"📅 Consider scheduling an appointment with a {specialist}:")
+            print(f"   {contact_info}")
+        else:  # mild
+            print("💬 A volunteer can help with general advice:")
+            print(f"   {contact_info}")
+        print("\n🩺 Medical Information: ", end="", flush=True)
 
     def show_available_models(self):
         """Display available models"""
@@ -362,11 +970,21 @@ class MedicalChatbot:
             status = "✅ CURRENT" if model['name'] == self.selected_model else "  Available"
             print(f"{status} - {model['name']}")
         print("-" * 50)
+        stats = MODEL_REGISTRY.stats()
+        print(f"♻️  Model objects built: {stats['constructions']}, reused: {stats['constructions_avoided']}")
+        if self.answer_cache is not None:
+            stats = self.answer_cache.stats()
+            print(f"💾 Answer cache: {stats['entries']} answers, hit rate {stats['hit_rate']:.0%}")
         print("💡 Tip: Use simpler models like 'gemini-pro' or 'gemini-1.5-flash' to avoid rate limits")
 
 
 # Run the medical chatbot
 if __name__ == "__main__":
+    if "--startup-profile" in sys.argv:
+        profile_startup(MedicalChatbot)
+        sys.exit(0)
+    if os.environ.get("TRIAGE_METRICS_PORT"):
+        triage_metrics.serve(int(os.environ["TRIAGE_METRICS_PORT"]))
     try:
         chatbot = MedicalChatbot()
         chatbot.medical_chat()
@@ -1,17 +1,41 @@
+import itertools
 import os
+import sys
 import time
-import google.generativeai as genai
 from dotenv import load_dotenv
 
-load_dotenv()  # Load API key from .env
+from conversation_memory import ConversationStore
+from lazy_import import lazy_module
+from model_discovery import load_models, profile_startup
+from model_registry import ModelRegistry
+from request_scheduler import get_scheduler, is_rate_limit_error
+from response_stream import chunk_text
+
+# The SDK is imported on first use so importing this module stays cheap
+genai = lazy_module("google.generativeai")
+
+# Model objects are shared by every bot in the process
+MODEL_REGISTRY = ModelRegistry(lambda *args, **kwargs: genai.GenerativeModel(*args, **kwargs))
 
 class MedicalChatbot:
-    def __init__(self):
-        genai.configure(api_key=os.environ.get("GEMINI_API_KEY"))
-        self.available_models = self.get_available_models()
+    def __init__(self, use_model_cache=True):
+        load_dotenv()  # Load API key from .env
+        endpoint = os.environ.get("GEMINI_API_ENDPOINT")
+        if endpoint:
+            # Local or proxy endpoint, e.g. fake_gemini_server.py
+            genai.configure(api_key=os.environ.get("GEMINI_API_KEY") or "local",
+                            transport="rest", client_options={"api_endpoint": endpoint})
+        else:
+            genai.configure(api_key=os.environ.get("GEMINI_API_KEY"))
+        # Start from the on-disk model list; a stale list is refreshed in the background
+        self.available_models, self.model_source = load_models(
+            self.get_available_models, on_refresh=self.set_available_models, use_cache=use_model_cache
+        )
         self.selected_model = self.choose_free_tier_model()
-        self.retry_count = 0
-        self.max_retries = 2
+        # Follow-up questions keep their context within a token budget
+        self.conversations = ConversationStore(
+            budget_tokens=int(os.environ.get("CONVERSATION_TOKEN_BUDGET", "2000"))
+        )
         
     def get_available_models(self):
         """Get all available models that support content generation"""
@@ -22,13 +46,17 @@ class MedicalChatbot:
                     models.append({
                         'name': model.name,
                         'description': getattr(model, 'description', 'No description'),
-                        'supported_methods': model.supported_generation_methods
+                        'supported_methods': list(model.supported_generation_methods)
                     })
             return models
         except Exception as e:
             print(f"Error fetching models: {e}")
             return []
 
+    def set_available_models(self, models):
+        """Replace the model list after a background refresh"""
+        self.available_models = models
+
     def choose_free_tier_model(self):
         """Select a model that's likely to be in free tier"""
         # Free tier models (avoid pro/preview models that have quotas)
@@ -66,11 +94,27 @@ class MedicalChatbot:
         for model in self.available_models:
             for free_model in free_models:
                 if free_model in model['name'] and model['name'] != self.selected_model:
-                    self.selected_model = model['name']
+                    self.select_model(model['name'])
                     print(f"🔄 Switched to free model: {self.selected_model}")
                     return True
         return False
 
+    def candidate_models(self):
+        """Selected model first, then free-tier models the scheduler can fail over to"""
+        free_models = ['gemini-1.0-pro', 'gemini-pro', 'gemini-1.5-flash', 'gemini-2.0-flash']
+        fallbacks = [
+            model['name'] for model in self.available_models
+            if any(free_model in model['name'] for free_model in free_models)
+        ]
+        return [self.selected_model] + fallbacks
+
+    def select_model(self, model_name):
+        """Change the active model and drop cached objects built for the old one"""
+        previous = self.selected_model
+        self.selected_model = model_name
+        if previous != model_name:
+            MODEL_REGISTRY.invalidate(previous)
+
     def create_medical_system_prompt(self):
         """Create a comprehensive medical system prompt"""
         return """You are a medical information assistant providing general health education.
@@ -81,39 +125,60 @@ class MedicalChatbot:
         Always include: "Consult healthcare professionals for personal medical advice."
         """
 
-    def get_medical_response(self, user_input):
-        """Get response with error handling and retry logic"""
+    def answer_model(self, model_name):
+        return MODEL_REGISTRY.get(
+            model_name,
+            system_instruction=self.create_medical_system_prompt(),
+            generation_config={
+                "temperature": 0.2,
+                "max_output_tokens": 1024,
+            }
+        )
+
+    def error_response(self, error):
+        if is_rate_limit_error(error):
+            return "I'm experiencing high demand. Please try again in a minute."
+        return f"Sorry, I'm having trouble responding. Error: {error}"
+
+    def get_medical_response(self, user_input, user_id="local"):
+        """Get response through the shared scheduler (rate limits, retries, failover)"""
+        # Recent turns and the running summary go ahead of the new message
+        memory = self.conversations.get(user_id)
+        contents = memory.history() + [{"role": "user", "parts": [user_input]}]
+
+        def send(model_name):
+            return self.answer_model(model_name).generate_content(contents).text
+
         try:
-            model = genai.GenerativeModel(
-                model_name=self.selected_model,
-                system_instruction=self.create_medical_system_prompt(),
-                generation_config={
-                    "temperature": 0.2,
-                    "max_output_tokens": 1024,
-                }
-            )
-            
-            chat_session = model.start_chat()
-            response = chat_session.send_message(user_input)
-            return response.text, True
-            
+            text, _ = get_scheduler().call(send, self.candidate_models())
         except Exception as e:
-            error_msg = str(e)
-            
-            # Check if it's a rate limit error
-            if "429" in error_msg or "quota" in error_msg.lower() or "rate" in error_msg.lower():
-                print(f"⏳ Rate limit hit. Retrying in 5 seconds...")
-                time.sleep(5)
-                
-                if self.retry_count < self.max_retries:
-                    self.retry_count += 1
-                    # Try switching to free model
-                    if self.switch_to_free_model():
-                        return self.get_medical_response(user_input)
-                else:
-                    return "I'm experiencing high demand. Please try again in a minute.", False
-                    
-            return f"Sorry, I'm having trouble responding. Error: {error_msg}", False
+            return self.error_response(e), False
+
+        memory.add_turn("user", user_input)
+        memory.add_turn("model", text)
+        return text, True
+
+    def stream_medical_response(self, user_input, user_id="local"):
+        """Like get_medical_response, but yields the answer's text chunks as they arrive.
+
+        Errors are raised from the loop; the turn is remembered once the last
+        chunk is in.
+        """
+        memory = self.conversations.get(user_id)
+        contents = memory.history() + [{"role": "user", "parts": [user_input]}]
+
+        def start(model_name):
+            chunks = iter(self.answer_model(model_name).generate_content(contents, stream=True))
+            # Pull the first chunk here so rate limits are still retried by the scheduler
+            return next(chunks, None), chunks
+
+        (first, rest), _ = get_scheduler().call(start, self.candidate_models())
+        parts = []
+        for chunk in itertools.chain([first] if first is not None else [], rest):
+            parts.append(chunk_text(chunk))
+            yield parts[-1]
+        memory.add_turn("user", user_input)
+        memory.add_turn("model", "".join(parts))
 
     def medical_chat(self):
         """Main medical chat function"""
@@ -123,7 +188,7 @@ class MedicalChatbot:
         print("💡 I can help with general health information")
         print("⚠️  NOT for diagnoses or emergencies")
         print("📋 Ask about: symptoms, medications, health topics")
-        print("Type 'exit' to quit, 'model' to switch models")
+        print("Type 'exit' to quit, 'model' to switch models, 'new' to start a new conversation")
         print("=" * 60)
 
         while True:
@@ -134,11 +199,16 @@ class MedicalChatbot:
                     print("\nThank you! Stay healthy! 🌟")
                     break
                     
+                elif user_input.lower() == 'new':
+                    self.conversations.forget("local")
+                    print("🧹 Started a new conversation")
+                    continue
+
                 elif user_input.lower() == 'model':
                     self.show_available_models()
                     new_model = input("Enter model name to switch: ").strip()
                     if new_model:
-                        self.selected_model = new_model
+                        self.select_model(new_model)
                         print(f"✅ Switched to: {self.selected_model}")
                     continue
                 
@@ -148,18 +218,21 @@ class MedicalChatbot:
                     print("\n🚨 If this is an emergency, call your local emergency number immediately!")
                     continue
 
-                # Get response with error handling
-                response, success = self.get_medical_response(user_input)
-                
-                if success:
-                    print(f"\n🩺 Assistant: {response}")
-                else:
-                    print(f"\n❌ {response}")
-                    
-                # Reset retry count after successful response
-                if success:
-                    self.retry_count = 0
-                
+                # Print the answer as it arrives, then how long it took
+                start = time.perf_counter()
+                first_chunk_at = None
+                try:
+                    for chunk in self.stream_medical_response(user_input):
+                        if first_chunk_at is None:
+                            first_chunk_at = time.perf_counter()
+                            print("\n🩺 Assistant: ", end="", flush=True)
+                        print(chunk, end="", flush=True)
+                except Exception as e:
+                    print(f"\n❌ {self.error_response(e)}")
+                    continue
+                ttft_ms = ((first_chunk_at or time.perf_counter()) - start) * 1000
+                print(f"\n⏱️  First token {ttft_ms:.0f} ms, total {(time.perf_counter() - start) * 1000:.0f} ms")
+
             except KeyboardInterrupt:
                 print("\n\nGoodbye! 👋")
                 break
@@ -174,10 +247,15 @@ class MedicalChatbot:
             status = "✅ CURRENT" if model['name'] == self.selected_model else "  Available"
             print(f"{status} - {model['name']}")
         print("-" * 50)
+        stats = MODEL_REGISTRY.stats()
+        print(f"♻️  Model objects built: {stats['constructions']}, reused: {stats['constructions_avoided']}")
         print("💡 Tip: Use simpler models like 'gemini-pro' or 'gemini-1.5-flash' to avoid rate limits")
 
 # Run the medical chatbot
 if __name__ == "__main__":
+    if "--startup-profile" in sys.argv:
+        profile_startup(MedicalChatbot)
+        sys.exit(0)
     try:
         chatbot = MedicalChatbot()
         chatbot.medical_chat()
@@ -0,0 +1,185 @@
+"""Server-sent-events endpoint for the triage chatbot.
+
+public/chatbot.html connects here to render answers token by token:
+
+    GET /api/health
+    GET /api/chat/stream?message=...
+    POST /api/chat/new            (forget the conversation, start a new session)
+    GET /metrics, /metrics.json   (when TRIAGE_METRICS=1)
+
+Each browser's conversation is keyed by a random HttpOnly session cookie the
+server issues, never by anything in the URL. Only CHAT_ALLOWED_ORIGIN (the
+Node app on http://localhost:5000 by default) may read responses and send
+the cookie along.
+
+Messages go through MedicalChatbot.respond, the same triage path as the
+command line chat. The stream sends one "triage" event (severity,
+specialist, contact and any emergency keyword matches with their edit
+distance), then unnamed events carrying {"text": chunk}, then a "done" event
+with time-to-first-token and total latency, or a "chat_error" event (a named
+"error" event would be indistinguishable from EventSource connection errors).
+Keyword emergencies get no answer text.
+
+    python chat_server.py --port 5001
+"""
+import argparse
+import json
+import os
+import queue
+import re
+import secrets
+from http.cookies import CookieError, SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import triage_metrics
+from category import MedicalChatbot
+
+ALLOWED_ORIGIN = os.environ.get("CHAT_ALLOWED_ORIGIN", "http://localhost:5000")
+SESSION_COOKIE = "chat_session"
+# secrets.token_urlsafe(32); anything else is replaced with a fresh session
+SESSION_RE = re.compile(r"[A-Za-z0-9_-]{43}")
+
+
+def make_handler(bot):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _session(self):
+            """Session id from the request cookie, or a new one issued with the response"""
+            cookie = SimpleCookie()
+            try:
+                cookie.load(self.headers.get("Cookie", ""))
+            except CookieError:
+                pass
+            morsel = cookie.get(SESSION_COOKIE)
+            if morsel is not None and SESSION_RE.fullmatch(morsel.value):
+                return morsel.value
+            self.issued_session = secrets.token_urlsafe(32)
+            return self.issued_session
+
+        def _send_common_headers(self):
+            self.send_header("Access-Control-Allow-Origin", ALLOWED_ORIGIN)
+            self.send_header("Access-Control-Allow-Credentials", "true")
+            if self.issued_session is not None:
+                self.send_header("Set-Cookie", f"{SESSION_COOKIE}={self.issued_session}; Path=/; HttpOnly; SameSite=Lax")
+
+        def _send_json(self, status, payload):
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self._send_common_headers()
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _event(self, payload, event=None):
+            message = f"event: {event}\n" if event else ""
+            message += f"data: {json.dumps(payload)}\n\n"
+            self.wfile.write(message.encode("utf-8"))
+            self.wfile.flush()
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            # Set per request: one handler serves every request on a kept-alive connection
+            self.issued_session = None
+            if url.path == "/api/health":
+                self._session()
+                self._send_json(200, {"ok": True, "model": bot.selected_model})
+            elif url.path == "/api/chat/stream":
+                user_id = f"web:{self._session()}"
+                message = (parse_qs(url.query).get("message") or [""])[0].strip()
+                if not message:
+                    self._send_json(400, {"error": "message is required"})
+                    return
+                self._stream_chat(message, user_id)
+            elif url.path == "/metrics" and triage_metrics.is_enabled():
+                data = triage_metrics.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            elif url.path == "/metrics.json" and triage_metrics.is_enabled():
+                self._send_json(200, triage_metrics.snapshot())
+            else:
+                self._send_json(404, {"error": f"Unknown path {url.path}"})
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            self.issued_session = None
+            # Any body is ignored, but must be read so the connection stays usable
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            if url.path == "/api/chat/new":
+                bot.conversations.forget(f"web:{self._session()}")
+                self.issued_session = secrets.token_urlsafe(32)
+                self._send_json(200, {"ok": True})
+            else:
+                self._send_json(404, {"error": f"Unknown path {url.path}"})
+
+        def _stream_chat(self, message, user_id):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self._send_common_headers()
+            # No Content-Length: the connection closes when the stream ends
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+
+            # respond() runs on the bot's loop; its callbacks hand events to this thread
+            events = queue.Queue()
+
+            def on_triage(context):
+                events.put(("triage", {
+                    "severity": context.severity,
+                    "label": bot.severity_levels[context.severity],
+                    "specialist": context.specialist,
+                    "contact": context.contact,
+                    "emergency_matches": [
+                        {"keyword": match.keyword, "text": message[match.start:match.end], "distance": match.distance}
+                        for match in context.emergency_matches
+                    ],
+                }))
+
+            future = bot.respond_threadsafe(user_id, message, on_chunk=lambda text: events.put((None, {"text": text})),
+                                            on_triage=on_triage)
+            future.add_done_callback(lambda _: events.put(None))
+            try:
+                for event, payload in iter(events.get, None):
+                    self._event(payload, event=event)
+                context = future.result()
+                if context.success:
+                    self._event({"ttft_ms": context.first_chunk_ms, "total_ms": context.total_ms}, event="done")
+                else:
+                    self._event({"message": context.response}, event="chat_error")
+            except (BrokenPipeError, ConnectionResetError):
+                # The browser went away mid-answer; respond() still finishes the turn
+                pass
+            except Exception as e:
+                self._event({"message": bot.error_response(e)}, event="chat_error")
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the triage chatbot over server-sent events")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("CHAT_SERVER_PORT", "5001")))
+    args = parser.parse_args()
+
+    bot = MedicalChatbot()
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(bot))
+    server.daemon_threads = True
+    print(f"🩺 Chat stream server on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
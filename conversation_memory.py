@@ -0,0 +1,162 @@
+"""Per-user conversation history kept under a token budget.
+
+Recent turns are sent back to the model verbatim; once they no longer fit,
+the oldest turns are folded into a short running summary so follow-up
+questions keep their context without the prompt growing without bound.
+"""
+import re
+import threading
+from collections import OrderedDict, namedtuple
+
+Turn = namedtuple("Turn", ["role", "text", "tokens"])
+
+SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+
+SUMMARY_PREFIX = "Summary of our earlier conversation:\n"
+SUMMARY_ACK = "Understood."
+
+
+def estimate_tokens(text):
+    """Cheap local token estimate (~4 characters per token for Gemini models)"""
+    return max(1, (len(text) + 3) // 4)
+
+
+def truncate_to_tokens(text, tokens, keep="head"):
+    """Cut text down to roughly the given number of tokens"""
+    limit = tokens * 4
+    if len(text) <= limit:
+        return text
+    return text[:limit] if keep == "head" else text[-limit:]
+
+
+def summarize_turns(turns, max_words=30):
+    """Default compaction: keep the first sentence of what the user said.
+
+    Patients front-load the important facts ("I'm 54, diabetic, and ..."),
+    and the assistant's own replies can be regenerated, so only user turns
+    are carried into the summary.
+    """
+    lines = []
+    for turn in turns:
+        if turn.role != "user":
+            continue
+        sentence = SENTENCE_END_RE.split(turn.text.strip(), 1)[0]
+        words = sentence.split()
+        if len(words) > max_words:
+            sentence = " ".join(words[:max_words]) + " ..."
+        lines.append(f"- {sentence}")
+    return "\n".join(lines)
+
+
+class ConversationMemory:
+    """Recent turns plus a running summary, never above budget_tokens.
+
+    One of these is kept per user, so it uses __slots__ to stay small.
+    """
+
+    __slots__ = ("budget_tokens", "summary_tokens", "summarizer", "count_tokens",
+                 "turns", "summary", "summary_token_count", "compactions")
+
+    def __init__(self, budget_tokens=2000, summary_tokens=300, summarizer=summarize_turns,
+                 token_counter=estimate_tokens):
+        self.budget_tokens = budget_tokens
+        self.summary_tokens = min(summary_tokens, budget_tokens // 2)
+        self.summarizer = summarizer
+        self.count_tokens = token_counter
+        self.turns = []
+        self.summary = ""
+        self.summary_token_count = 0
+        self.compactions = 0
+
+    @property
+    def is_empty(self):
+        """True before the first turn, and after clear()"""
+        return not self.turns and not self.summary
+
+    @property
+    def total_tokens(self):
+        return self.summary_token_count + sum(turn.tokens for turn in self.turns)
+
+    def add_turn(self, role, text):
+        """Record one message ("user" or "model") and compact if over budget"""
+        tokens = self.count_tokens(text)
+        turn_budget = self.budget_tokens - self.summary_tokens
+        if tokens > turn_budget:
+            # A single huge message keeps its most recent part
+            text = truncate_to_tokens(text, turn_budget, keep="tail")
+            tokens = self.count_tokens(text)
+        self.turns.append(Turn(role, text, tokens))
+        self._compact()
+
+    def _summary_cost(self, summary):
+        # Count the framing turns too, they are part of every prompt
+        return self.count_tokens(SUMMARY_PREFIX + summary) + self.count_tokens(SUMMARY_ACK)
+
+    def _compact(self):
+        if self.total_tokens <= self.budget_tokens:
+            return
+
+        # Recent turns must fit next to a full-size summary
+        turn_budget = self.budget_tokens - self.summary_tokens
+        turn_tokens = sum(turn.tokens for turn in self.turns)
+        evicted = []
+        while self.turns and turn_tokens > turn_budget:
+            evicted.append(self.turns.pop(0))
+            turn_tokens -= evicted[-1].tokens
+            # Keep history starting on a user turn
+            while self.turns and self.turns[0].role != "user":
+                evicted.append(self.turns.pop(0))
+                turn_tokens -= evicted[-1].tokens
+
+        new_summary = self.summarizer(evicted)
+        summary = "\n".join(part for part in (self.summary, new_summary) if part)
+        # The summary is bounded too; the oldest facts go first
+        while summary and self._summary_cost(summary) > self.summary_tokens:
+            if "\n" in summary:
+                summary = summary.split("\n", 1)[1]
+            else:
+                excess = self._summary_cost(summary) - self.summary_tokens
+                summary = summary[excess * 4:]
+        self.summary = summary
+        self.summary_token_count = self._summary_cost(summary) if summary else 0
+        self.compactions += 1
+
+    def history(self):
+        """Return the history as generate_content contents, summary first"""
+        contents = []
+        if self.summary:
+            contents.append({"role": "user", "parts": [SUMMARY_PREFIX + self.summary]})
+            contents.append({"role": "model", "parts": [SUMMARY_ACK]})
+        contents.extend({"role": turn.role, "parts": [turn.text]} for turn in self.turns)
+        return contents
+
+    def clear(self):
+        self.turns = []
+        self.summary = ""
+        self.summary_token_count = 0
+
+
+class ConversationStore:
+    """Thread-safe map of user id to ConversationMemory, capped at max_users"""
+
+    def __init__(self, max_users=10000, **memory_options):
+        self.max_users = max_users
+        self.memory_options = memory_options
+        self._memories = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            memory = self._memories.get(user_id)
+            if memory is None:
+                memory = ConversationMemory(**self.memory_options)
+                self._memories[user_id] = memory
+                while len(self._memories) > self.max_users:
+                    self._memories.popitem(last=False)
+            else:
+                self._memories.move_to_end(user_id)
+            return memory
+
+    def forget(self, user_id):
+        with self._lock:
+            self._memories.pop(user_id, None)
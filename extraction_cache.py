@@ -0,0 +1,194 @@
+"""Content-addressed cache of extracted page text, in SQLite.
+
+Keys are hashes, never file names:
+
+    document  hash of the file bytes + settings key
+    page      hash of one page's own content (drawing commands, images,
+              fonts) + settings key
+
+The settings key covers the extractor version and every option that
+changes the text, so an upgrade or a different OCR setting never serves
+old output. A repeat upload is one lookup and one query for its pages; a
+document that shares pages with an earlier one (a re-exported discharge
+summary with a page added) reuses those pages and only extracts the rest.
+
+Stored text is capped by size: past max_bytes the least recently used
+pages are evicted together with the entries of the documents that used
+them; those documents' remaining pages are still reused.
+"""
+import hashlib
+import sqlite3
+import threading
+import time
+
+# Recency of a document's pages is refreshed at most this often, so a hot
+# document's hits stay read-only
+TOUCH_INTERVAL = 60.0
+
+
+def settings_key(version, **settings):
+    """Short fingerprint of the extractor version and output-changing options"""
+    text = repr((version, sorted(settings.items())))
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """blake2b of a file's bytes, read in chunks"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def bytes_digest(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class ExtractionCache:
+    """Per-page extraction results shared by every document that contains the page.
+
+    Safe to share between threads; separate processes (batch workers) each
+    open their own connection to the same file.
+    """
+
+    def __init__(self, db_path, max_bytes=256 * 2 ** 20):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.page_hits = 0
+        self._lock = threading.Lock()
+        # WAL and a busy timeout let batch workers write to one file at once
+        self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            """CREATE TABLE IF NOT EXISTS extraction_pages (
+                   page_key TEXT PRIMARY KEY,
+                   text TEXT NOT NULL,
+                   method TEXT NOT NULL,
+                   seconds REAL NOT NULL,
+                   size INTEGER NOT NULL,
+                   used_at REAL NOT NULL
+               );
+               CREATE INDEX IF NOT EXISTS extraction_pages_used ON extraction_pages (used_at);
+               CREATE TABLE IF NOT EXISTS extraction_documents (
+                   document_key TEXT PRIMARY KEY,
+                   page_count INTEGER NOT NULL,
+                   used_at REAL NOT NULL
+               );
+               CREATE TABLE IF NOT EXISTS extraction_document_pages (
+                   document_key TEXT NOT NULL,
+                   number INTEGER NOT NULL,
+                   page_key TEXT NOT NULL,
+                   PRIMARY KEY (document_key, number)
+               );
+               CREATE INDEX IF NOT EXISTS extraction_document_pages_page
+                   ON extraction_document_pages (page_key);"""
+        )
+        self._db.commit()
+
+    def get_document(self, document_key):
+        """[(number, text, method, seconds)] for a fully cached document, or None"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT page_count, used_at FROM extraction_documents WHERE document_key = ?", (document_key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            pages = self._db.execute(
+                "SELECT d.number, p.text, p.method, p.seconds FROM extraction_document_pages d "
+                "JOIN extraction_pages p ON p.page_key = d.page_key "
+                "WHERE d.document_key = ? ORDER BY d.number",
+                (document_key,),
+            ).fetchall()
+            if len(pages) != row[0]:
+                # Some pages were evicted; the rest can still be reused page by page
+                self._db.execute("DELETE FROM extraction_documents WHERE document_key = ?", (document_key,))
+                self._db.execute("DELETE FROM extraction_document_pages WHERE document_key = ?", (document_key,))
+                self._db.commit()
+                self.misses += 1
+                return None
+            now = time.time()
+            if now - row[1] > TOUCH_INTERVAL:
+                self._db.execute("UPDATE extraction_documents SET used_at = ? WHERE document_key = ?",
+                                 (now, document_key))
+                self._db.execute(
+                    "UPDATE extraction_pages SET used_at = ? WHERE page_key IN "
+                    "(SELECT page_key FROM extraction_document_pages WHERE document_key = ?)",
+                    (now, document_key),
+                )
+                self._db.commit()
+            self.hits += 1
+            return pages
+
+    def get_page(self, page_key):
+        """(text, method, seconds) of a page seen in any earlier document, or None"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT text, method, seconds FROM extraction_pages WHERE page_key = ?", (page_key,)
+            ).fetchone()
+            if row is not None:
+                self.page_hits += 1
+            return row
+
+    def put_document(self, document_key, pages):
+        """Store a finished document: pages are (number, page_key, text, method, seconds)"""
+        now = time.time()
+        with self._lock:
+            with self._db:
+                self._db.executemany(
+                    "INSERT INTO extraction_pages VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (page_key) DO UPDATE SET used_at = excluded.used_at",
+                    [(page_key, text, method, seconds, len(text.encode("utf-8")), now)
+                     for _, page_key, text, method, seconds in pages],
+                )
+                self._db.execute("INSERT OR REPLACE INTO extraction_documents VALUES (?, ?, ?)",
+                                 (document_key, len(pages), now))
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO extraction_document_pages VALUES (?, ?, ?)",
+                    [(document_key, number, page_key) for number, page_key, _, _, _ in pages],
+                )
+            self._evict()
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM extraction_pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Evict down to 90% so the next few documents don't each trigger a pass
+        target = total - int(self.max_bytes * 0.9)
+        victims = []
+        for page_key, size in self._db.execute("SELECT page_key, size FROM extraction_pages ORDER BY used_at"):
+            victims.append((page_key,))
+            target -= size
+            if target <= 0:
+                break
+        # Documents that used an evicted page can no longer be served whole; their
+        # rows go in the same transaction so the database stays within max_bytes
+        documents = "SELECT document_key FROM extraction_document_pages WHERE page_key = ?"
+        with self._db:
+            self._db.executemany("DELETE FROM extraction_pages WHERE page_key = ?", victims)
+            self._db.executemany(f"DELETE FROM extraction_documents WHERE document_key IN ({documents})", victims)
+            self._db.executemany(f"DELETE FROM extraction_document_pages WHERE document_key IN ({documents})",
+                                 victims)
+
+    def stats(self):
+        """Hit/miss counters and stored size"""
+        with self._lock:
+            pages, size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM extraction_pages"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "page_hits": self.page_hits,
+            "pages": pages,
+            "bytes": size,
+        }
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
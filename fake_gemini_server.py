@@ -0,0 +1,320 @@
+"""Local stand-in for the Gemini REST API used by the chatbots.
+
+Point the bots at it with GEMINI_API_ENDPOINT=http://127.0.0.1:8765 and they
+go through the real google.generativeai SDK (REST transport) without using
+any quota. It serves list_models, generateContent (single and multi-turn
+chat) and streamGenerateContent, with configurable latency, injected 429s,
+models with no quota left and canned responses.
+
+    python fake_gemini_server.py --port 8765 --latency lognormal:400:0.6 --error-rate 0.05
+"""
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_MODELS = (
+    "models/gemini-1.5-flash",
+    "models/gemini-2.0-flash",
+    "models/gemini-1.5-pro",
+)
+
+DEFAULT_ANSWER = (
+    "Here is some general health information about your question. "
+    "Rest, stay hydrated and watch for changes in your symptoms. "
+    "Consult healthcare professionals for personal medical advice."
+)
+
+SEVERITY_WORDS = ("emergency", "urgent", "moderate", "mild")
+
+BATCH_ITEM_RE = re.compile(r"^\s*q(\d+): (.*)$", re.MULTILINE)
+
+GENERATE_RE = re.compile(r"^/v1beta/(models/[^:/]+):(generateContent|streamGenerateContent)$")
+
+
+def parse_latency(spec):
+    """Build a latency sampler (milliseconds) from a spec string.
+
+    "300"                   fixed 300 ms
+    "uniform:200:800"       uniform between 200 and 800 ms
+    "lognormal:400:0.6"     median 400 ms, sigma 0.6 (long right tail)
+    "exponential:300"       mean 300 ms
+    """
+    kind, _, params = str(spec).partition(":")
+    values = [float(value) for value in params.split(":") if value]
+    if not params:
+        fixed = float(kind)
+        return lambda rng: fixed
+    if kind == "uniform":
+        low, high = values
+        return lambda rng: rng.uniform(low, high)
+    if kind == "lognormal":
+        median, sigma = values
+        return lambda rng: rng.lognormvariate(math.log(median), sigma)
+    if kind == "exponential":
+        mean, = values
+        return lambda rng: rng.expovariate(1.0 / mean)
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+def request_text(body):
+    """Concatenate every text part of a generateContent request"""
+    parts = []
+    system = body.get("systemInstruction") or body.get("system_instruction") or {}
+    for part in system.get("parts", []):
+        parts.append(part.get("text", ""))
+    for content in body.get("contents", []):
+        for part in content.get("parts", []):
+            parts.append(part.get("text", ""))
+    return "\n".join(parts)
+
+
+def last_user_text(body):
+    contents = body.get("contents") or [{}]
+    return " ".join(part.get("text", "") for part in contents[-1].get("parts", []))
+
+
+class FakeGemini:
+    """Canned-response model behind the HTTP handler"""
+
+    def __init__(self, models=DEFAULT_MODELS, latency_ms=300.0, answer=DEFAULT_ANSWER, ms_per_output_token=0.0,
+                 latency=None, error_rate=0.0, retry_after=2.0, canned=None, seed=None, exhausted=()):
+        self.models = tuple(models)
+        self.latency_ms = latency_ms
+        # latency (a spec string) overrides the fixed latency_ms
+        self.sample_latency = parse_latency(latency if latency is not None else latency_ms)
+        self.ms_per_output_token = ms_per_output_token
+        self.answer = answer
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        # {substring of the user's message: reply}
+        self.canned = dict(canned or {})
+        # Models whose quota is always exhausted (429), to exercise failover
+        self.exhausted = frozenset(exhausted)
+        self.requests = 0
+        self.rate_limited = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def count_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def should_rate_limit(self):
+        with self._lock:
+            if self.error_rate and self._rng.random() < self.error_rate:
+                self.rate_limited += 1
+                return True
+            return False
+
+    def severity_for(self, text):
+        """Deterministic severity guess so repeated runs are comparable"""
+        lowered = text.lower()
+        if any(word in lowered for word in ("not breathing", "chest pain", "unconscious")):
+            return "emergency"
+        if any(word in lowered for word in ("high fever", "severe", "deep cut")):
+            return "urgent"
+        if any(word in lowered for word in ("persistent", "weeks", "recurring")):
+            return "moderate"
+        return "mild"
+
+    def generate(self, model, body):
+        """Return the reply text for a generateContent request"""
+        prompt = request_text(body)
+        config = body.get("generationConfig") or body.get("generation_config") or {}
+        user_text = last_user_text(body)
+
+        for trigger, reply in self.canned.items():
+            if trigger.lower() in user_text.lower():
+                return reply
+        if "Categorize the severity level of each numbered medical query" in prompt:
+            return json.dumps([
+                {"id": f"q{number}", "severity": self.severity_for(text)}
+                for number, text in BATCH_ITEM_RE.findall(prompt)
+            ])
+        if "json" in (config.get("responseMimeType") or config.get("response_mime_type") or ""):
+            return json.dumps({
+                "severity": self.severity_for(user_text),
+                "specialist": "General Practitioner",
+                "answer": self.answer,
+            })
+        if "Respond ONLY with one of these exact severity levels" in prompt:
+            return self.severity_for(prompt.split("Respond ONLY", 1)[0])
+        return self.answer
+
+    def stream_chunks(self, text, words_per_chunk=4):
+        """Split a reply into the word groups a streaming call sends"""
+        words = text.split(" ")
+        return [
+            " ".join(words[i:i + words_per_chunk]) + (" " if i + words_per_chunk < len(words) else "")
+            for i in range(0, len(words), words_per_chunk)
+        ]
+
+    def sleep(self, output_text=""):
+        with self._lock:
+            base_ms = self.sample_latency(self._rng)
+        delay_ms = max(0.0, base_ms) + self.ms_per_output_token * len(output_text.split())
+        if delay_ms:
+            time.sleep(delay_ms / 1000.0)
+
+
+def response_payload(text, body):
+    return {
+        "candidates": [{
+            "content": {"parts": [{"text": text}], "role": "model"},
+            "finishReason": "STOP",
+            "index": 0,
+        }],
+        "usageMetadata": {
+            "promptTokenCount": len(request_text(body).split()),
+            "candidatesTokenCount": len(text.split()),
+            "totalTokenCount": len(request_text(body).split()) + len(text.split()),
+        },
+    }
+
+
+def make_handler(fake):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status, payload):
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _read_json(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            return json.loads(self.rfile.read(length) or b"{}")
+
+        def do_GET(self):
+            path = self.path.split("?", 1)[0]
+            if path == "/v1beta/models":
+                fake.count_request()
+                self._send_json(200, {"models": [
+                    {
+                        "name": name,
+                        "displayName": name.split("/", 1)[1],
+                        "description": "Local fake model",
+                        "supportedGenerationMethods": ["generateContent", "countTokens"],
+                        "inputTokenLimit": 32768,
+                        "outputTokenLimit": 8192,
+                    }
+                    for name in fake.models
+                ]})
+                return
+            self._send_json(404, {"error": {"code": 404, "message": f"Unknown path {path}"}})
+
+        def do_POST(self):
+            path = self.path.split("?", 1)[0]
+            match = GENERATE_RE.match(path)
+            if not match:
+                self._send_json(404, {"error": {"code": 404, "message": f"Unknown path {path}"}})
+                return
+            model, method = match.groups()
+            body = self._read_json()
+            fake.count_request()
+            if model in fake.exhausted or fake.should_rate_limit():
+                self._send_rate_limit()
+                return
+            text = fake.generate(model, body)
+            if method == "streamGenerateContent":
+                self._stream(text, sse="alt=sse" in self.path)
+                return
+            fake.sleep(text)
+            self._send_json(200, response_payload(text, body))
+
+        def _send_rate_limit(self):
+            # Same shape and retry hint the real API uses for quota errors
+            payload = {"error": {
+                "code": 429,
+                "message": f"Resource has been exhausted (e.g. check quota). Please retry in {fake.retry_after}s.",
+                "status": "RESOURCE_EXHAUSTED",
+            }}
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(429)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.send_header("Retry-After", str(int(math.ceil(fake.retry_after))))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _write_chunk(self, data):
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+        def _stream(self, text, sse):
+            """First chunk after the base latency, the rest paced per output token"""
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream" if sse else "application/json")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            fake.sleep()
+            chunks = fake.stream_chunks(text)
+            for index, chunk in enumerate(chunks):
+                if index:
+                    time.sleep(fake.ms_per_output_token * len(chunk.split()) / 1000.0)
+                payload = json.dumps(response_payload(chunk, {}))
+                if sse:
+                    data = f"data: {payload}\r\n\r\n"
+                else:
+                    # The SDK's REST transport reads one JSON array, element by element
+                    data = ("[" if index == 0 else ",") + payload + ("]" if index == len(chunks) - 1 else "")
+                self._write_chunk(data.encode("utf-8"))
+            self._write_chunk(b"")
+
+    return Handler
+
+
+def start_server(fake=None, host="127.0.0.1", port=0):
+    """Start the fake server on a background thread; returns (server, base_url)"""
+    fake = fake or FakeGemini()
+    server = ThreadingHTTPServer((host, port), make_handler(fake))
+    server.daemon_threads = True
+    server.fake = fake
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local fake Gemini API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", default="300",
+                        help="ms, or uniform:LOW:HIGH, lognormal:MEDIAN:SIGMA, exponential:MEAN")
+    parser.add_argument("--ms-per-output-token", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of calls answered with a 429")
+    parser.add_argument("--retry-after", type=float, default=2.0, help="Retry hint sent with injected 429s")
+    parser.add_argument("--responses", help="JSON file of {message substring: canned reply}")
+    parser.add_argument("--exhausted", nargs="*", default=(), help="Models that always answer 429")
+    args = parser.parse_args()
+
+    canned = None
+    if args.responses:
+        with open(args.responses, encoding="utf-8") as f:
+            canned = json.load(f)
+    fake = FakeGemini(latency=args.latency, ms_per_output_token=args.ms_per_output_token,
+                      error_rate=args.error_rate, retry_after=args.retry_after, canned=canned,
+                      exhausted=args.exhausted)
+    server, url = start_server(fake, args.host, args.port)
+    print(f"Fake Gemini API listening on {url}")
+    print(f"Use: GEMINI_API_ENDPOINT={url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
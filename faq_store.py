@@ -0,0 +1,232 @@
+"""Precomputed answers to curated FAQ questions, read memory-mapped at startup.
+
+An offline job collects questions from guide files, generates each answer
+once with the bot's answer prompt and writes a compact indexed file:
+
+    header | entry table | key index (sorted by hash) | string blob
+
+Every entry is reachable by its exact question and by its normalized form,
+so a lookup is one hash, a binary search over the mmapped index and a byte
+comparison. Rebuilds reuse entries whose question and prompt version are
+unchanged and only ask the model for the rest.
+
+    python faq_store.py build ChatBot_guide.txt ai_features/guide.txt -o faq_answers.bin
+    python faq_store.py lookup faq_answers.bin "How can I manage stress naturally?"
+"""
+import argparse
+import hashlib
+import mmap
+import os
+import struct
+from functools import lru_cache
+
+from severity_cache import normalize_query
+
+MAGIC = b"TMFAQ\x00\x01\x00"
+# magic, entry count, key count, entry table offset, key index offset
+HEADER = struct.Struct("<8sIIII")
+# question offset/length, answer offset/length, severity offset/length, prompt version
+ENTRY = struct.Struct("<IIIIII12s")
+# key hash, key offset/length, entry number
+KEY = struct.Struct("<QIII")
+
+
+def exact_key(question):
+    return " ".join(question.split())
+
+
+def key_hash(key):
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def load_questions(paths):
+    """Questions from guide files: quoted lines, "You:" lines and lines ending in "?"."""
+    questions = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                text = line.strip()
+                if "You:" in text:
+                    text = text.split("You:", 1)[1].strip()
+                text = text.strip('"').strip()
+                if text.endswith("?"):
+                    questions.append(" ".join(text.split()))
+    return list(dict.fromkeys(questions))
+
+
+def write_store(path, entries):
+    """Write (question, answer, severity, prompt_version) tuples to path atomically"""
+    blob = bytearray()
+    strings = {}
+
+    def place(text):
+        data = text.encode("utf-8")
+        if data not in strings:
+            strings[data] = len(blob)
+            blob.extend(data)
+        return strings[data], len(data)
+
+    entry_rows = []
+    keys = {}
+    for number, (question, answer, severity, version) in enumerate(entries):
+        entry_rows.append((*place(question), *place(answer), *place(severity), version.encode("ascii")))
+        for key in (exact_key(question), normalize_query(question)):
+            # The first entry wins if two questions normalize the same way
+            keys.setdefault(key, number)
+
+    entries_offset = HEADER.size
+    keys_offset = entries_offset + ENTRY.size * len(entry_rows)
+    blob_offset = keys_offset + KEY.size * len(keys)
+    key_rows = sorted(
+        (key_hash(key), *place(key), number) for key, number in keys.items()
+    )
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(entry_rows), len(key_rows), entries_offset, keys_offset))
+        for q_off, q_len, a_off, a_len, s_off, s_len, version in entry_rows:
+            f.write(ENTRY.pack(q_off + blob_offset, q_len, a_off + blob_offset, a_len,
+                               s_off + blob_offset, s_len, version))
+        for hashed, k_off, k_len, number in key_rows:
+            f.write(KEY.pack(hashed, k_off + blob_offset, k_len, number))
+        f.write(blob)
+    os.replace(tmp_path, path)
+
+
+class FaqStore:
+    """Read-only view of a built FAQ file; the OS pages it in on demand"""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.entry_count, self.key_count, self._entries_offset, self._keys_offset = \
+            HEADER.unpack_from(self._data, 0)
+        if magic != MAGIC:
+            self._data.close()
+            raise ValueError(f"{path} is not an FAQ store")
+
+    def __len__(self):
+        return self.entry_count
+
+    def _text(self, offset, length):
+        return self._data[offset:offset + length].decode("utf-8")
+
+    def entry(self, number):
+        """(question, answer, severity, prompt_version) of one entry"""
+        q_off, q_len, a_off, a_len, s_off, s_len, version = \
+            ENTRY.unpack_from(self._data, self._entries_offset + number * ENTRY.size)
+        return (self._text(q_off, q_len), self._text(a_off, a_len),
+                self._text(s_off, s_len), version.decode("ascii"))
+
+    def entries(self):
+        return [self.entry(number) for number in range(self.entry_count)]
+
+    def _find(self, key):
+        target = key_hash(key)
+        encoded = key.encode("utf-8")
+        low, high = 0, self.key_count
+        while low < high:
+            middle = (low + high) // 2
+            if KEY.unpack_from(self._data, self._keys_offset + middle * KEY.size)[0] < target:
+                low = middle + 1
+            else:
+                high = middle
+        # Walk the (rare) run of equal hashes and compare the key bytes
+        while low < self.key_count:
+            hashed, k_off, k_len, number = KEY.unpack_from(self._data, self._keys_offset + low * KEY.size)
+            if hashed != target:
+                break
+            if self._data[k_off:k_off + k_len] == encoded:
+                return number
+            low += 1
+        return None
+
+    def lookup(self, question):
+        """Entry tuple for an exact or normalized match, or None"""
+        number = self._find(exact_key(question))
+        if number is None:
+            number = self._find(normalize_query(question))
+        return None if number is None else self.entry(number)
+
+    def close(self):
+        self._data.close()
+
+
+def load_store(path):
+    """Open a built store if the file exists, otherwise return None"""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        return FaqStore(path)
+    except (OSError, ValueError, struct.error) as e:
+        print(f"Error loading FAQ store: {e}")
+        return None
+
+
+@lru_cache(maxsize=None)
+def get_store(path):
+    """One mapping of the store per process for a given path, shared by every bot"""
+    return load_store(path)
+
+
+def build(questions, answer, version, path):
+    """Write the store for questions, reusing unchanged entries from an existing file.
+
+    answer(question) returns (answer_text, severity), or None to leave the
+    question out. Returns (generated, reused) counts.
+    """
+    previous = {}
+    store = load_store(path)
+    if store is not None:
+        previous = {question: (text, severity, old_version)
+                    for question, text, severity, old_version in store.entries()}
+        store.close()
+
+    entries = []
+    generated = reused = 0
+    for question in questions:
+        old = previous.get(question)
+        if old is not None and old[2] == version:
+            entries.append((question, old[0], old[1], version))
+            reused += 1
+            continue
+        result = answer(question)
+        generated += 1
+        if result is not None:
+            entries.append((question, result[0], result[1], version))
+    write_store(path, entries)
+    return generated, reused
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the precomputed FAQ answer store")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build_command = commands.add_parser("build", help="Generate answers for the questions in guide files")
+    build_command.add_argument("sources", nargs="+", help="Text files with one question per line")
+    build_command.add_argument("-o", "--output", default="faq_answers.bin")
+
+    lookup = commands.add_parser("lookup", help="Look a question up in a built store")
+    lookup.add_argument("store")
+    lookup.add_argument("question")
+
+    args = parser.parse_args()
+    if args.command == "lookup":
+        store = load_store(args.store)
+        found = store.lookup(args.question) if store is not None else None
+        print(found[1] if found else "No stored answer")
+        return
+
+    from category import MedicalChatbot
+
+    # The store is being rebuilt, so the bot must not answer from the old one
+    os.environ["FAQ_STORE_PATH"] = ""
+    os.environ["ANSWER_CACHE_SIZE"] = "0"
+    bot = MedicalChatbot()
+    questions = load_questions(args.sources)
+    generated, reused = build(questions, bot.faq_entry, bot.faq_prompt_version, args.output)
+    print(f"{len(questions)} questions: {generated} generated, {reused} unchanged -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
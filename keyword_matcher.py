@@ -0,0 +1,386 @@
+import re
+from collections import defaultdict, deque, namedtuple
+from functools import lru_cache
+
+# One word token: letters/digits with optional inner apostrophes ("can't", "i'm")
+TOKEN_RE = re.compile(r"[^\W_]+(?:['’][^\W_]+)*")
+
+# distance is the total edit distance of a fuzzy hit; exact hits have 0
+KeywordMatch = namedtuple("KeywordMatch", ["keyword", "start", "end", "distance"], defaults=(0,))
+
+# Phrases that contain an emergency keyword but are not emergencies.
+# A keyword hit that falls entirely inside one of these is dropped. Plurals
+# of their last word are excluded too ("cutting boards").
+DEFAULT_EXCLUSIONS = (
+    "cutting back", "cutting down", "cutting out", "cutting carbs",
+    "cutting sugar", "cutting salt", "cutting fat", "cutting calories", "cutting caffeine",
+    "cutting coffee", "cutting alcohol", "cutting meat", "cutting my hair", "cutting board",
+    "overdosing on coffee", "overdosing on caffeine", "overdosing on sugar", "overdosing on chocolate",
+    "stroke of luck", "strokes of luck", "stroke of genius", "strokes of genius", "brush stroke",
+    "non urgent", "non emergency",
+)
+
+# Other forms that count as the keyword itself. Only plurals are generated
+# (see plurals()); verb forms must be listed here, since "stroked" or
+# "urgenting" are not emergencies.
+KEYWORD_VARIANTS = (
+    ("fainted", ("fainting", "faints", "feel faint", "feeling faint", "felt faint")),
+    ("passed out", ("passing out", "passes out")),
+    ("unconscious", ("unconsciousness",)),
+    ("seizure", ("seizing",)),
+    ("convulsion", ("convulsing",)),
+    ("poison", ("poisoned", "poisoning")),
+    ("overdose", ("overdosed", "overdosing")),
+)
+
+# Keyword last words that are not nouns and so take no plural; words ending
+# in -s, -ed or -ing never get one either
+NOT_PLURALIZED = frozenset({
+    "urgent", "heavily", "breathe", "unconscious", "out", "suicidal", "homicidal",
+})
+
+# Endings that make a different form of a word, not a typo of it
+INFLECTION_ENDINGS = frozenset({"s", "es", "d", "ed", "ing"})
+
+# Everyday words one typo away from a keyword word; never corrected, and
+# neither are their -s/-ed/-ing forms ("paint" covers "painting")
+DEFAULT_FUZZY_IGNORE = (
+    "painted", "painting", "paints", "tainted", "putting", "gutting", "drying", "cooking",
+    "stoke", "stoked", "strokes", "strike", "prison", "breathy", "heavily", "paint", "taint",
+)
+
+# Fuzzy lookups are skipped for tokens longer than this and capped per message
+MAX_FUZZY_TOKEN_LENGTH = 24
+MAX_FUZZY_TOKENS = 64
+
+
+def normalize_token(token):
+    """Lowercase a token and drop apostrophes so "Can't" and "cant" compare equal"""
+    return token.lower().replace("'", "").replace("’", "")
+
+
+def tokenize(text):
+    """Yield (normalized_token, start, end) for every word in text"""
+    for match in TOKEN_RE.finditer(text):
+        yield normalize_token(match.group()), match.start(), match.end()
+
+
+def normalize_phrase(phrase):
+    """Turn a keyword phrase into the tuple of tokens the automaton walks"""
+    return tuple(token for token, _, _ in tokenize(phrase))
+
+
+def is_inflection(a, b):
+    """True if one word is the other plus a plural or verb ending ("pains", "palpitation")"""
+    short, long = sorted((a, b), key=len)
+    return long.startswith(short) and long[len(short):] in INFLECTION_ENDINGS
+
+
+def base_forms(word):
+    """Words that word could be an inflection of ("stroked" -> "stroke", "babies" -> "baby")"""
+    forms = set()
+    for ending in INFLECTION_ENDINGS:
+        stem = word[:-len(ending)]
+        if word.endswith(ending) and len(stem) >= 3:
+            forms |= {stem, stem + "e"}
+    if word.endswith("ies") and len(word) > 5:
+        forms.add(word[:-3] + "y")
+    return forms
+
+
+def plurals(word):
+    """Regular plural of a noun keyword's last word ("pains", "emergencies"), as a set"""
+    if (len(word) < 3 or not word.isalpha() or word in NOT_PLURALIZED
+            or word.endswith(("s", "ed", "ing"))):
+        return set()
+    if word.endswith("y") and word[-2] not in "aeiou":
+        return {word[:-1] + "ies"}
+    if word.endswith(("x", "z", "ch", "sh")):
+        return {word + "es"}
+    return {word + "s"}
+
+
+def plural_phrases(phrase):
+    """phrase with its last word made plural, if it takes one"""
+    tokens = normalize_phrase(phrase)
+    if not tokens:
+        return []
+    return [" ".join(tokens[:-1] + (form,)) for form in sorted(plurals(tokens[-1]))]
+
+
+def keyword_variants(keywords, variants=KEYWORD_VARIANTS):
+    """(keyword, variant phrase) pairs: plurals plus the forms listed in variants"""
+    pairs = [(keyword, phrase) for keyword in keywords for phrase in plural_phrases(keyword)]
+    present = set(keywords)
+    pairs.extend((keyword, phrase) for keyword, phrases in variants if keyword in present for phrase in phrases)
+    return pairs
+
+
+def exclusion_phrases(exclusions):
+    """Exclusions plus the plurals of their last word"""
+    return list(exclusions) + [plural for phrase in exclusions for plural in plural_phrases(phrase)]
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over word tokens.
+
+    Keywords only match on whole-word boundaries ("poison" does not fire on
+    "poisonous"), plus the plural of their last word ("heart attacks") and
+    the forms listed in variants ("poisoned"), and a single left-to-right pass over the
+    message reports every keyword with its character span in the original
+    text. A variant hit is reported under its keyword.
+    """
+
+    def __init__(self, keywords, exclusions=DEFAULT_EXCLUSIONS, variants=KEYWORD_VARIANTS):
+        # State 0 is the root; each state has a goto table, a fail link and
+        # the (keyword, token_length, is_exclusion) entries it completes.
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+
+        for keyword in keywords:
+            self._add(keyword, excluded=False)
+        for keyword, phrase in keyword_variants(keywords, variants):
+            self._add(phrase, excluded=False, keyword=keyword)
+        for phrase in exclusion_phrases(exclusions):
+            self._add(phrase, excluded=True)
+        self._build_fail_links()
+
+        self.keywords = tuple(keywords)
+
+    def _add(self, phrase, excluded, keyword=None):
+        tokens = normalize_phrase(phrase)
+        if not tokens:
+            return
+        state = 0
+        for token in tokens:
+            next_state = self._goto[state].get(token)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[state][token] = next_state
+            state = next_state
+        self._output[state].append((keyword or phrase, len(tokens), excluded))
+
+    def _build_fail_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(token, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                # Inherit outputs of the suffix state so one lookup per token is enough
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def search(self, text):
+        """Return every KeywordMatch in text, ordered by position"""
+        goto, fail, output = self._goto, self._fail, self._output
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # Rare case-mappings change length; keep spans aligned with the input
+            lowered = text
+        hits = []
+        excluded_spans = []
+        starts = []
+        state = 0
+
+        for match in TOKEN_RE.finditer(lowered):
+            token = match.group()
+            if "'" in token or "’" in token:
+                token = normalize_token(token)
+            starts.append(match.start())
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            if state:
+                outputs = output[state]
+                if outputs:
+                    end = match.end()
+                    for phrase, length, excluded in outputs:
+                        span = (starts[-length], end)
+                        if excluded:
+                            excluded_spans.append(span)
+                        else:
+                            hits.append(KeywordMatch(phrase, span[0], span[1]))
+
+        if excluded_spans and hits:
+            hits = [
+                hit for hit in hits
+                if not any(lo <= hit.start and hit.end <= hi for lo, hi in excluded_spans)
+            ]
+        if len(hits) > 1:
+            hits.sort(key=lambda hit: (hit.start, -hit.end))
+        return hits
+
+    def contains_any(self, text):
+        """True if text contains at least one keyword"""
+        return bool(self.search(text))
+
+
+@lru_cache(maxsize=None)
+def get_matcher(keywords, exclusions=DEFAULT_EXCLUSIONS, variants=KEYWORD_VARIANTS):
+    """Build the automaton once per process for a given keyword tuple"""
+    return KeywordMatcher(keywords, exclusions, variants)
+
+
+def edit_distance(a, b, limit):
+    """Optimal string alignment distance (adjacent swaps cost 1), or limit + 1 if above limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous_row = None
+    row = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        before, previous_row, row = previous_row, row, [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            row[j] = min(previous_row[j] + 1, row[j - 1] + 1, previous_row[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                row[j] = min(row[j], before[j - 2] + 1)
+        if min(row) > limit:
+            return limit + 1
+    return row[-1]
+
+
+def deletes(word, distance):
+    """word with up to `distance` characters removed, including word itself"""
+    variants = {word}
+    frontier = {word}
+    for _ in range(distance):
+        frontier = {
+            variant[:index] + variant[index + 1:]
+            for variant in frontier if len(variant) > 1
+            for index in range(len(variant))
+        }
+        variants |= frontier
+    return variants
+
+
+class FuzzyKeywordMatcher:
+    """Typo-tolerant keyword search on top of the exact automaton.
+
+    Every word of every keyword goes into a SymSpell-style deletion index, so
+    the keyword words within edit distance of a message word are found with a
+    bounded number of dictionary lookups instead of a scan. Phrases then match
+    word by word against those candidates ("chest pian", "cant breath").
+
+    Allowed distance grows with word length (none under 4 letters, 1 up to 8,
+    then max_distance), and single-word keywords need at least 6 letters to
+    match fuzzily, since short words sit close to everyday ones. Forms of
+    ignored words and of keyword words themselves are never corrected, and
+    nor is a different first letter on a keyword word under 9 letters.
+    """
+
+    def __init__(self, keywords, exclusions=DEFAULT_EXCLUSIONS, max_distance=2, ignore=DEFAULT_FUZZY_IGNORE,
+                 variants=KEYWORD_VARIANTS):
+        self.exact = get_matcher(tuple(keywords), tuple(exclusions), tuple(variants))
+        self.keywords = self.exact.keywords
+        self.max_distance = max_distance
+        self.ignore = frozenset(ignore)
+        self._phrases = defaultdict(list)
+        self._exclusions = defaultdict(list)
+        self._deletes = defaultdict(set)
+        self._vocabulary = set()
+
+        for keyword, phrase in [(keyword, keyword) for keyword in keywords] + keyword_variants(keywords, variants):
+            tokens = normalize_phrase(phrase)
+            if tokens:
+                self._phrases[tokens[0]].append((keyword, tokens))
+                self._vocabulary.update(tokens)
+        for phrase in exclusion_phrases(exclusions):
+            tokens = normalize_phrase(phrase)
+            if tokens:
+                self._exclusions[tokens[0]].append(tokens)
+        for word in self._vocabulary:
+            for variant in deletes(word, self.allowed_distance(word)):
+                self._deletes[variant].add(word)
+        self.candidates = lru_cache(maxsize=8192)(self._candidates)
+
+    def allowed_distance(self, word):
+        if len(word) < 4 or not word.isalpha():
+            return 0
+        return min(self.max_distance, 1 if len(word) < 9 else 2)
+
+    def _candidates(self, token):
+        """Keyword words within their allowed distance of token, as {word: distance}"""
+        if token in self._vocabulary:
+            found = {token: 0}
+        else:
+            found = {}
+            # Another form of a keyword word ("stroked") is not a typo of it
+            if not base_forms(token).isdisjoint(self._vocabulary):
+                return found
+        if (not self.max_distance or not token.isalpha() or not 4 <= len(token) <= MAX_FUZZY_TOKEN_LENGTH
+                or token in self.ignore or not base_forms(token).isdisjoint(self.ignore)):
+            return found
+        seen = set()
+        # Distance 2 is only allowed for keyword words of 9+ letters, so shorter
+        # tokens need only single deletes
+        for variant in deletes(token, min(self.max_distance, 1 if len(token) < 7 else 2)):
+            for word in self._deletes.get(variant, ()):
+                if word in seen or word == token or is_inflection(word, token):
+                    continue
+                # A different first letter on a short word is another word ("painting", "fainting")
+                if len(word) < 9 and token[1:] == word[1:]:
+                    continue
+                seen.add(word)
+                distance = edit_distance(token, word, self.allowed_distance(word))
+                if distance <= self.allowed_distance(word):
+                    found[word] = distance
+        return found
+
+    def search(self, text):
+        """Exact hits plus fuzzy hits (with their distance), ordered by position"""
+        hits = {(hit.keyword, hit.start, hit.end): hit for hit in self.exact.search(text)}
+        if not self.max_distance:
+            return list(hits.values())
+
+        tokens = list(tokenize(text))
+        # Past the cap, words only match exactly
+        candidates = [
+            self.candidates(token) if index < MAX_FUZZY_TOKENS else {token: 0}
+            for index, (token, _, _) in enumerate(tokens)
+        ]
+        excluded_spans = [
+            (tokens[index][1], tokens[index + len(phrase) - 1][2])
+            for index, (token, _, _) in enumerate(tokens)
+            for phrase in self._exclusions.get(token, ())
+            if tuple(t for t, _, _ in tokens[index:index + len(phrase)]) == phrase
+        ]
+
+        for index in range(len(tokens)):
+            for word, first_distance in candidates[index].items():
+                for keyword, phrase in self._phrases.get(word, ()):
+                    if index + len(phrase) > len(tokens):
+                        continue
+                    distance = first_distance
+                    for offset in range(1, len(phrase)):
+                        step = candidates[index + offset].get(phrase[offset])
+                        if step is None:
+                            break
+                        distance += step
+                    else:
+                        if distance == 0 or (len(phrase) == 1 and len(word) < 6):
+                            continue
+                        start, end = tokens[index][1], tokens[index + len(phrase) - 1][2]
+                        if any(lo <= start and end <= hi for lo, hi in excluded_spans):
+                            continue
+                        key = (keyword, start, end)
+                        if key not in hits or hits[key].distance > distance:
+                            hits[key] = KeywordMatch(keyword, start, end, distance)
+
+        return sorted(hits.values(), key=lambda hit: (hit.start, -hit.end, hit.distance))
+
+    def contains_any(self, text):
+        return bool(self.search(text))
+
+
+@lru_cache(maxsize=None)
+def get_fuzzy_matcher(keywords, max_distance=2, exclusions=DEFAULT_EXCLUSIONS, variants=KEYWORD_VARIANTS):
+    """Build the fuzzy index once per process for a given keyword tuple"""
+    return FuzzyKeywordMatcher(keywords, exclusions, max_distance=max_distance, variants=variants)
@@ -0,0 +1,38 @@
+"""Deferred imports for heavy dependencies.
+
+    genai = lazy_module("google.generativeai")
+
+binds a stand-in whose first attribute access imports the real module, so
+importing an entry point as a library stays cheap and the SDK is only
+loaded when a bot actually talks to Gemini.
+"""
+import importlib
+
+
+class LazyModule:
+    """Module placeholder that imports on first attribute access"""
+
+    def __init__(self, name):
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+
+    def _load(self):
+        module = self.__dict__["_module"]
+        if module is None:
+            # import_module holds the import lock, so concurrent first uses are safe
+            module = self.__dict__["_module"] = importlib.import_module(self.__dict__["_name"])
+        return module
+
+    def __getattr__(self, attribute):
+        return getattr(self._load(), attribute)
+
+    def __setattr__(self, attribute, value):
+        setattr(self._load(), attribute, value)
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_module"] is not None else "not loaded"
+        return f"<lazy module {self.__dict__['_name']!r} ({state})>"
+
+
+def lazy_module(name):
+    return LazyModule(name)
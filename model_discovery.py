@@ -0,0 +1,108 @@
+"""Disk cache for the Gemini model list so the chatbots start without a network call.
+
+The first start fetches genai.list_models() and writes the result to disk.
+Later starts read the file immediately; if it is older than the TTL the
+list is refreshed on a background thread and the file rewritten.
+"""
+import json
+import os
+import threading
+import time
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "telemed", "gemini_models.json")
+DEFAULT_TTL_SECONDS = 24 * 3600
+
+
+def cache_path():
+    return os.environ.get("MODEL_CACHE_PATH", DEFAULT_CACHE_PATH)
+
+
+def cache_ttl():
+    return float(os.environ.get("MODEL_CACHE_TTL", DEFAULT_TTL_SECONDS))
+
+
+def read_cache(path, endpoint):
+    """Return (models, fetched_at) from the cache file, or (None, 0)"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None, 0
+    # A list fetched from another endpoint (e.g. the fake server) doesn't count
+    if data.get("endpoint") != endpoint or not data.get("models"):
+        return None, 0
+    return data["models"], data.get("fetched_at", 0)
+
+
+def write_cache(path, endpoint, models):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"endpoint": endpoint, "fetched_at": time.time(), "models": models}, f)
+    os.replace(tmp_path, path)
+
+
+def load_models(fetch, on_refresh=None, path=None, ttl=None, use_cache=True):
+    """Return (models, source) where source is "cache", "stale-cache" or "network".
+
+    fetch() does the real list_models() round trip and returns a list of
+    JSON-serialisable dicts. A stale cache is returned at once and refreshed
+    in the background; on_refresh(models) is called with the new list.
+    """
+    path = path or cache_path()
+    ttl = cache_ttl() if ttl is None else ttl
+    endpoint = os.environ.get("GEMINI_API_ENDPOINT")
+
+    if use_cache:
+        models, fetched_at = read_cache(path, endpoint)
+        if models is not None:
+            if time.time() - fetched_at <= ttl:
+                return models, "cache"
+            threading.Thread(
+                target=_refresh, args=(fetch, on_refresh, path, endpoint), daemon=True
+            ).start()
+            return models, "stale-cache"
+
+    models = fetch()
+    if models:
+        _write_quietly(path, endpoint, models)
+    return models, "network"
+
+
+def _refresh(fetch, on_refresh, path, endpoint):
+    models = fetch()
+    if not models:
+        return
+    _write_quietly(path, endpoint, models)
+    if on_refresh is not None:
+        on_refresh(models)
+
+
+def _write_quietly(path, endpoint, models):
+    try:
+        write_cache(path, endpoint, models)
+    except OSError as e:
+        print(f"Could not write model cache: {e}")
+
+
+def profile_startup(bot_factory):
+    """Time a cold (network) and a warm (disk cache) start of a chatbot.
+
+    Used by the --startup-profile option of the chatbot scripts. The bot is
+    only constructed, the chat loop is not started.
+    """
+    timings = []
+    for label, use_cache in (("cold", False), ("warm", True)):
+        start = time.perf_counter()
+        bot = bot_factory(use_model_cache=use_cache)
+        elapsed = time.perf_counter() - start
+        timings.append((label, elapsed, bot.model_source, len(bot.available_models)))
+
+    print("\n⏱️  Startup profile")
+    print("-" * 50)
+    for label, elapsed, source, count in timings:
+        print(f"{label:<5} {elapsed * 1000:>9.1f} ms  models from {source:<11} ({count} models)")
+    print("-" * 50)
+    print(f"Model cache: {cache_path()}")
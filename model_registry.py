@@ -0,0 +1,60 @@
+import json
+import threading
+
+
+class ModelRegistry:
+    """Thread-safe cache of model objects keyed on how they were configured.
+
+    Building a GenerativeModel is cheap compared to a request but not free,
+    and the chatbots used to build one for every message. The registry
+    builds each (model name, system prompt, generation config) once and
+    hands the same object back afterwards.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._models = {}
+        self._lock = threading.Lock()
+        self.constructions = 0
+        self.reuses = 0
+
+    @staticmethod
+    def _key(model_name, system_instruction, generation_config):
+        config = json.dumps(generation_config or {}, sort_keys=True, default=str)
+        return model_name, system_instruction, config
+
+    def get(self, model_name, system_instruction=None, generation_config=None):
+        """Return the shared model object for this configuration, building it once"""
+        key = self._key(model_name, system_instruction, generation_config)
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self.reuses += 1
+                return model
+
+            kwargs = {"model_name": model_name}
+            if system_instruction is not None:
+                kwargs["system_instruction"] = system_instruction
+            if generation_config is not None:
+                kwargs["generation_config"] = generation_config
+            model = self._factory(**kwargs)
+            self._models[key] = model
+            self.constructions += 1
+            return model
+
+    def invalidate(self, model_name=None):
+        """Drop cached objects for one model, or all of them"""
+        with self._lock:
+            if model_name is None:
+                self._models.clear()
+            else:
+                for key in [key for key in self._models if key[0] == model_name]:
+                    del self._models[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "cached": len(self._models),
+                "constructions": self.constructions,
+                "constructions_avoided": self.reuses,
+            }
@@ -1,70 +1,64 @@
-import os
-import pytesseract
-from pdf2image import convert_from_path
-import pdfplumber
-from PIL import Image
-import tkinter as tk
-from tkinter import filedialog, messagebox
 import sys
 
-# Ensure UTF-8 output (Windows-friendly)
-sys.stdout.reconfigure(encoding='utf-8')
+from text_extraction import IMAGE_EXTENSIONS, PDF_EXTENSIONS, extract, file_type_of
+
+# The extraction itself lives in text_extraction (no GUI); this script is the
+# desktop front end. tkinter is imported where it is used.
+
 
 # -------------------- File Selection --------------------
-root = tk.Tk()
-root.withdraw()  # Hide main window
-
-file_path = filedialog.askopenfilename(
-    title="Select a PDF or Image file",
-    filetypes=[("PDF files", "*.pdf"), 
-               ("Image files", "*.png *.jpg *.jpeg *.tiff *.bmp")]
-)
-
-if not file_path:
-    messagebox.showerror("Error", "No file selected. Exiting...")
-    exit()
-
-# -------------------- Determine File Type --------------------
-ext = os.path.splitext(file_path)[1].lower()
-if ext == ".pdf":
-    file_type = "pdf"
-elif ext in [".png", ".jpg", ".jpeg", ".tiff", ".bmp"]:
-    file_type = "image"
-else:
-    messagebox.showerror("Error", "Unsupported file type!")
-    exit()
-
-# -------------------- Optional: Set Tesseract Path (Windows) --------------------
-# Uncomment and set your path if Tesseract is not in PATH
-# pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+def select_file():
+    """Ask for a PDF or image with a file dialog; returns the path or ''"""
+    import tkinter as tk
+    from tkinter import filedialog
+
+    root = tk.Tk()
+    root.withdraw()  # Hide main window
+    return filedialog.askopenfilename(
+        title="Select a PDF or Image file",
+        filetypes=[("PDF files", " ".join("*" + ext for ext in PDF_EXTENSIONS)),
+                   ("Image files", " ".join("*" + ext for ext in IMAGE_EXTENSIONS))]
+    )
+
 
 # -------------------- Text Extraction --------------------
-text = ""
-
-try:
-    if file_type == "pdf":
-        # First try pdfplumber for text-based PDFs
-        with pdfplumber.open(file_path) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
-
-        # If no text found, fallback to OCR
-        if not text.strip():
-            print("No text found in PDF. Using OCR...")
-            # If on Windows, ensure poppler_path is set
-            pages = convert_from_path(file_path)  # Add poppler_path=r"C:\path\to\poppler\bin" if needed
-            for page in pages:
-                text += pytesseract.image_to_string(page) + "\n"
-
-    elif file_type == "image":
-        text = pytesseract.image_to_string(Image.open(file_path))
-
-except Exception as e:
-    messagebox.showerror("Error", f"Failed to extract text:\n{e}")
-    exit()
-
-# -------------------- Display Extracted Text --------------------
-print("Extracted Text:\n")
-print(text)
+def extract_text(file_path):
+    """Text of a PDF or an image (OCR).
+
+    PDF pages are routed one by one (text_extraction.route_page): a page with
+    fewer than MIN_TEXT_CHARS characters and some images is OCRed, one whose
+    images cover at least OCR_IMAGE_COVERAGE of it gets its text layer plus
+    OCR of the images, and any other page uses its text layer (a page with
+    neither text nor images is empty).
+    """
+    return extract(file_path)
+
+
+def main():
+    from tkinter import messagebox
+
+    # Ensure UTF-8 output (Windows-friendly)
+    sys.stdout.reconfigure(encoding='utf-8')
+
+    file_path = select_file()
+    if not file_path:
+        messagebox.showerror("Error", "No file selected. Exiting...")
+        sys.exit()
+
+    if file_type_of(file_path) is None:
+        messagebox.showerror("Error", "Unsupported file type!")
+        sys.exit()
+
+    try:
+        text = extract_text(file_path)
+    except Exception as e:
+        messagebox.showerror("Error", f"Failed to extract text:\n{e}")
+        sys.exit()
+
+    # -------------------- Display Extracted Text --------------------
+    print("Extracted Text:\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,492 @@
+"""Rate-limit-aware scheduling for every Gemini call.
+
+Each model gets a token bucket (requests per minute) and a circuit breaker.
+A call tries the preferred model first and fails over to the others; rate
+limits and transient errors are retried with exponential backoff and full
+jitter, honouring any retry delay the server suggests. When every model's
+breaker is open the call fails at once with a "circuit open" error. Locks
+are only held for bookkeeping, so a caller waiting on one model never
+blocks requests to another. call() blocks the calling thread while it
+waits; call_async() awaits instead, so one event loop can keep many
+requests in flight.
+
+Hedging is opt-in (GEMINI_HEDGE_PERCENTILE): hedged_call() sends a second
+request to an alternate model when the first has not answered by that
+percentile of recent latency for the stage, and keeps whichever answers
+first. Hedges take a token like any other request and are skipped when no
+model has one to spare. It stays off by default: against the fake server
+with a long-tail latency (benchmarks/load_triage.py --hedge 90) it moved
+p95/p99 by under 10% either way, for 6-17% more calls.
+"""
+import asyncio
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from contextlib import closing
+from functools import lru_cache
+
+import triage_metrics
+
+RETRY_HINT_RES = (
+    re.compile(r"retry in ([\d.]+)\s*s", re.IGNORECASE),
+    re.compile(r"retry_delay\s*\{\s*seconds:\s*(\d+)", re.IGNORECASE),
+    re.compile(r"retry-after:?\s*([\d.]+)", re.IGNORECASE),
+)
+
+SERVER_ERROR_RE = re.compile(r"\b50[0234]\b")
+
+TRANSIENT_ERROR_NAMES = {
+    "ResourceExhausted", "TooManyRequests", "ServiceUnavailable",
+    "InternalServerError", "DeadlineExceeded", "GatewayTimeout",
+}
+
+
+RATE_LIMIT_RE = re.compile(r"\b429\b|quota|rate.?limit|too many requests", re.IGNORECASE)
+
+
+def is_rate_limit_error(error):
+    """429s and quota errors, by exception type or message"""
+    return type(error).__name__ in ("ResourceExhausted", "TooManyRequests") or \
+        bool(RATE_LIMIT_RE.search(str(error)))
+
+
+def is_retryable(error):
+    if is_rate_limit_error(error) or type(error).__name__ in TRANSIENT_ERROR_NAMES:
+        return True
+    return bool(SERVER_ERROR_RE.search(str(error)))
+
+
+def retry_hint(error):
+    """Seconds the server asked us to wait, if it said"""
+    for pattern in RETRY_HINT_RES:
+        match = pattern.search(str(error))
+        if match:
+            return float(match.group(1))
+    return None
+
+
+class TokenBucket:
+    """Requests-per-minute budget for one model"""
+
+    def __init__(self, rate_per_minute, burst=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = burst or max(1.0, rate_per_minute / 6.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _wait(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        wait = max(0.0, self.blocked_until - now)
+        if self.tokens < 1:
+            wait = max(wait, (1 - self.tokens) / self.rate)
+        return wait
+
+    def peek(self):
+        """Seconds until a request could start, without taking a token"""
+        with self._lock:
+            return self._wait()
+
+    def reserve(self, max_wait):
+        """Take one token; return the seconds to wait first, or None if longer than max_wait"""
+        with self._lock:
+            wait = self._wait()
+            if wait > max_wait:
+                return None
+            self.tokens -= 1
+            return wait
+
+    def block_for(self, seconds):
+        """Honour a server retry hint for everyone using this model"""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class CircuitBreaker:
+    """Stops sending traffic to a model after repeated failures.
+
+    Closed -> open after failure_threshold consecutive failures; after
+    reset_timeout one trial request is let through (half-open) and its
+    outcome closes or re-opens the breaker.
+    """
+
+    def __init__(self, failure_threshold=3, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """"closed" to call freely, "trial" for the half-open trial slot, or None"""
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            if time.monotonic() - self.opened_at < self.reset_timeout or self.trial_in_flight:
+                return None
+            self.trial_in_flight = True
+            return "trial"
+
+    def allow(self):
+        return self.acquire() is not None
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def release(self):
+        """Give back a half-open trial slot that was not used"""
+        with self._lock:
+            self.trial_in_flight = False
+
+    def record_failure(self, trial=True):
+        """Count a failure; trial=False leaves another caller's trial slot alone"""
+        with self._lock:
+            self.failures += 1
+            if trial:
+                self.trial_in_flight = False
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.reset_timeout else "open"
+
+
+class HedgeCancelled(Exception):
+    """The other request of a hedged pair answered first"""
+
+
+class HedgePolicy:
+    """When to hedge: after the given percentile of recent call latency per stage.
+
+    Nothing is hedged for a stage until it has min_samples successful calls.
+    """
+
+    def __init__(self, percentile=95.0, window=500, min_samples=20, min_delay=0.0):
+        self.percentile = percentile
+        self.window = window
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds):
+        with self._lock:
+            samples = self._samples.get(stage)
+            if samples is None:
+                samples = self._samples[stage] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def deadline(self, stage):
+        """Seconds to wait before hedging, or None while there is too little data"""
+        with self._lock:
+            samples = sorted(self._samples.get(stage, ()))
+        if len(samples) < self.min_samples:
+            return None
+        rank = max(1, int(round(self.percentile / 100.0 * len(samples))))
+        return max(self.min_delay, samples[min(rank, len(samples)) - 1])
+
+
+def run_in_thread(func, *args):
+    """Start func(*args) on a daemon thread; returns a Future for its result"""
+    future = Future()
+    future.set_running_or_notify_cancel()
+
+    def run():
+        try:
+            future.set_result(func(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, daemon=True).start()
+    return future
+
+
+def hedge_models(models):
+    """Alternates first for the second request; the same model if there is no other"""
+    models = [model for model in dict.fromkeys(models) if model]
+    return models[1:] + models[:1]
+
+
+class RequestScheduler:
+    """Runs model calls under per-model rate limits, retries and failover"""
+
+    def __init__(self, rate_per_minute=15, max_attempts=3, base_delay=1.0, max_delay=30.0,
+                 max_queue_wait=10.0, failure_threshold=3, reset_timeout=30.0, sleep=time.sleep,
+                 hedging=None):
+        self.rate_per_minute = rate_per_minute
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_queue_wait = max_queue_wait
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.sleep = sleep
+        self._buckets = {}
+        self._breakers = {}
+        self._lock = threading.Lock()
+        # A HedgePolicy turns on hedged_call; None sends one request at a time
+        self.hedging = hedging
+        self.retries = 0
+        self.failovers = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def bucket(self, model):
+        with self._lock:
+            bucket = self._buckets.get(model)
+            if bucket is None:
+                bucket = self._buckets[model] = TokenBucket(self.rate_per_minute)
+            return bucket
+
+    def breaker(self, model):
+        with self._lock:
+            breaker = self._breakers.get(model)
+            if breaker is None:
+                breaker = self._breakers[model] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return breaker
+
+    def call(self, func, models, stage=None, cancelled=None, max_attempts=None, max_wait=None):
+        """Call func(model_name) on the first model that succeeds.
+
+        models is the preference order; the first entry is the selected model.
+        Returns (result, model_used). Non-retryable errors are raised at once;
+        if every attempt fails the last error is raised. With a stage name,
+        call latencies feed the hedging deadline; setting the cancelled event
+        stops further attempts.
+        """
+        steps = self._steps(models, max_attempts, max_wait)
+        # Closing the steps on any exit frees a half-open trial slot left mid-attempt
+        with closing(steps):
+            action, value = next(steps)
+            while True:
+                outcome = None
+                if cancelled is not None and cancelled.is_set():
+                    raise HedgeCancelled()
+                if action == "sleep":
+                    if cancelled is not None:
+                        cancelled.wait(value)
+                    else:
+                        self.sleep(value)
+                else:
+                    started = time.perf_counter()
+                    try:
+                        result, model_used = func(value), value
+                    except Exception as e:
+                        outcome = e
+                    else:
+                        self._record(stage, time.perf_counter() - started)
+                try:
+                    action, value = steps.send(outcome)
+                except StopIteration:
+                    return result, model_used
+
+    async def call_async(self, func, models, stage=None, max_attempts=None, max_wait=None):
+        """Like call, for a coroutine function; waits without blocking the event loop"""
+        steps = self._steps(models, max_attempts, max_wait)
+        # A cancelled task (a hedge loser) exits here with CancelledError
+        with closing(steps):
+            action, value = next(steps)
+            while True:
+                outcome = None
+                if action == "sleep":
+                    await asyncio.sleep(value)
+                else:
+                    started = time.perf_counter()
+                    try:
+                        result, model_used = await func(value), value
+                    except Exception as e:
+                        outcome = e
+                    else:
+                        self._record(stage, time.perf_counter() - started)
+                try:
+                    action, value = steps.send(outcome)
+                except StopIteration:
+                    return result, model_used
+
+    def _record(self, stage, seconds):
+        if stage is not None and self.hedging is not None:
+            self.hedging.record(stage, seconds)
+
+    def _hedge_deadline(self, stage):
+        if self.hedging is None:
+            return None
+        return self.hedging.deadline(stage)
+
+    def _count_hedge(self, stage, winner):
+        with self._lock:
+            if winner == "hedge":
+                self.hedge_wins += 1
+        triage_metrics.inc("gemini_hedges_total", stage=stage, winner=winner)
+
+    def hedged_call(self, func, models, stage):
+        """call() with a second request to an alternate model past the stage's deadline.
+
+        The first success wins. The loser is cancelled: it makes no further
+        attempts, and a response it is still waiting on is discarded.
+        """
+        deadline = self._hedge_deadline(stage)
+        if deadline is None:
+            return self.call(func, models, stage=stage)
+
+        primary_cancelled, hedge_cancelled = threading.Event(), threading.Event()
+        primary = run_in_thread(self.call, func, models, stage, primary_cancelled)
+        if wait([primary], timeout=deadline).done:
+            return primary.result()
+
+        with self._lock:
+            self.hedges += 1
+        # A hedge only helps if it can start now, and it never retries
+        hedge = run_in_thread(self.call, func, hedge_models(models), stage, hedge_cancelled, 1, 0.0)
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    (hedge_cancelled if future is primary else primary_cancelled).set()
+                    self._count_hedge(stage, "primary" if future is primary else "hedge")
+                    return future.result()
+        self._count_hedge(stage, "none")
+        return primary.result()
+
+    async def hedged_call_async(self, func, models, stage):
+        """hedged_call for a coroutine function; the losing task is cancelled"""
+        deadline = self._hedge_deadline(stage)
+        if deadline is None:
+            return await self.call_async(func, models, stage=stage)
+
+        primary = asyncio.ensure_future(self.call_async(func, models, stage=stage))
+        done, _ = await asyncio.wait([primary], timeout=deadline)
+        if done:
+            return primary.result()
+
+        with self._lock:
+            self.hedges += 1
+        hedge = asyncio.ensure_future(self.call_async(func, hedge_models(models), stage=stage,
+                                                      max_attempts=1, max_wait=0.0))
+        pending = {primary, hedge}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        self._count_hedge(stage, "primary" if task is primary else "hedge")
+                        return task.result()
+            self._count_hedge(stage, "none")
+            return primary.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _steps(self, models, max_attempts=None, max_wait=None):
+        """Scheduling decisions for one call, shared by call and call_async.
+
+        Yields ("sleep", seconds) or ("call", model); after a call the driver
+        sends back the exception it raised, or None on success. A driver that
+        stops early closes the generator, which gives back the breaker slot
+        of the attempt in progress.
+        """
+        models = [model for model in dict.fromkeys(models) if model]
+        max_attempts = self.max_attempts if max_attempts is None else max_attempts
+        max_wait = self.max_queue_wait if max_wait is None else max_wait
+        last_error = None
+        breakers_open = False
+        for attempt in range(max_attempts):
+            hinted_wait = None
+            open_count = 0
+            # Models that can start now go first; preference order breaks ties
+            ready = sorted(models, key=lambda model: self.bucket(model).peek() > 0)
+            for model in ready:
+                breaker = self.breaker(model)
+                slot = breaker.acquire()
+                if slot is None:
+                    breakers_open = True
+                    open_count += 1
+                    continue
+                owns_trial = slot == "trial"
+                delay = self.bucket(model).reserve(max_wait)
+                if delay is None:
+                    if owns_trial:
+                        breaker.release()
+                    continue
+                try:
+                    if delay:
+                        yield "sleep", delay
+                    if model != models[0]:
+                        with self._lock:
+                            self.failovers += 1
+                        triage_metrics.inc("gemini_failovers_total", model=model)
+                    error = yield "call", model
+                except GeneratorExit:
+                    # Cancelled before the outcome was known
+                    if owns_trial:
+                        breaker.release()
+                    raise
+                if error is None:
+                    breaker.record_success()
+                    return
+                if not is_retryable(error):
+                    # The request was bad, not the model
+                    if owns_trial:
+                        breaker.release()
+                    raise error
+                last_error = error
+                breaker.record_failure(trial=owns_trial)
+                hint = retry_hint(error)
+                if hint is not None:
+                    self.bucket(model).block_for(hint)
+                    hinted_wait = hint if hinted_wait is None else min(hinted_wait, hint)
+
+            if open_count == len(ready):
+                # Every breaker is open; waiting out the backoff would not change that
+                break
+            if attempt + 1 < max_attempts:
+                with self._lock:
+                    self.retries += 1
+                triage_metrics.inc("gemini_retries_total")
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                if hinted_wait is not None:
+                    delay = max(delay, min(hinted_wait, self.max_delay))
+                yield "sleep", delay
+
+        if last_error is None and breakers_open:
+            last_error = Exception("503 circuit open: the model is failing, try again shortly")
+        elif last_error is None:
+            last_error = Exception("429 rate limit: no model had capacity within the queue wait")
+        raise last_error
+
+    def stats(self):
+        with self._lock:
+            breakers = {model: breaker.state for model, breaker in self._breakers.items()}
+        stats = {"retries": self.retries, "failovers": self.failovers, "breakers": breakers}
+        if self.hedging is not None:
+            stats.update(hedges=self.hedges, hedge_wins=self.hedge_wins)
+        return stats
+
+
+@lru_cache(maxsize=None)
+def get_scheduler():
+    """Process-wide scheduler so every bot shares the same per-model budgets"""
+    hedge_percentile = float(os.environ.get("GEMINI_HEDGE_PERCENTILE", "0"))
+    return RequestScheduler(
+        rate_per_minute=float(os.environ.get("GEMINI_RPM", "15")),
+        max_attempts=int(os.environ.get("GEMINI_MAX_ATTEMPTS", "3")),
+        hedging=HedgePolicy(
+            percentile=hedge_percentile,
+            min_samples=int(os.environ.get("GEMINI_HEDGE_MIN_SAMPLES", "20")),
+            min_delay=float(os.environ.get("GEMINI_HEDGE_MIN_DELAY", "0.05")),
+        ) if hedge_percentile else None,
+    )
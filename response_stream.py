@@ -0,0 +1,22 @@
+import asyncio
+
+
+def chunk_text(chunk):
+    """Text of one streamed chunk; safety-blocked or empty chunks have none"""
+    if isinstance(chunk, str):
+        return chunk
+    try:
+        return chunk.text
+    except (ValueError, AttributeError, IndexError):
+        return ""
+
+
+async def iterate_in_thread(iterator):
+    """Async iteration over a blocking iterator, one worker-thread hop per item"""
+    done = object()
+    while True:
+        item = await asyncio.to_thread(next, iterator, done)
+        if item is done:
+            return
+        yield item
+
@@ -0,0 +1,95 @@
+"""Synthetic PDFs for extraction benchmarks, with no PDF library needed.
+
+Pages carry a text layer of fake visit notes (Helvetica, one text object
+per line), so pdfplumber reads them without OCR. With scanned_every=N every
+Nth page is instead a full-page grayscale image with no text layer, like a
+scanned lab sheet.
+
+    python sample_documents.py samples/ --files 20 --pages 50 --scanned-every 10
+"""
+import argparse
+import os
+import random
+
+WORDS = (
+    "patient reports persistent cough fever headache fatigue mild moderate "
+    "blood pressure heart rate normal follow up recommended prescribed rest "
+    "fluids review symptoms history allergies medication dose daily weekly"
+).split()
+
+
+def page_lines(rng, lines):
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 14))).capitalize() + "."
+            for _ in range(lines)]
+
+
+def escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_text_pdf(path, pages, lines_per_page=40, seed=0, scanned_every=0, rotate=0):
+    """Write a PDF of `pages` US Letter pages; every scanned_every-th page is image only.
+
+    rotate sets /Rotate on every page; the drawn content is the same.
+    """
+    rng = random.Random(seed)
+    # 1 catalog, 2 page tree, 3 font, 4 the "scan" image, then a page and a content stream per page
+    pixels = bytes(rng.randrange(180, 256) for _ in range(64 * 64))
+    objects = {1: b"<< /Type /Catalog /Pages 2 0 R >>",
+               3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+               4: b"<< /Type /XObject /Subtype /Image /Width 64 /Height 64 /ColorSpace /DeviceGray "
+                  b"/BitsPerComponent 8 /Length %d >>\nstream\n%s\nendstream" % (len(pixels), pixels)}
+    kids = []
+    for number in range(pages):
+        page_id, content_id = 5 + 2 * number, 6 + 2 * number
+        kids.append(f"{page_id} 0 R")
+        if scanned_every and (number + 1) % scanned_every == 0:
+            stream = b"q 612 0 0 792 0 0 cm /Scan Do Q"
+        else:
+            text = [f"BT /F1 10 Tf 14 TL 50 750 Td (Page {number + 1}) Tj"]
+            text += [f"T* ({escape(line)}) Tj" for line in page_lines(rng, lines_per_page)]
+            stream = ("\n".join(text) + "\nET").encode("latin-1")
+        objects[page_id] = (f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Rotate {rotate} "
+                            f"/Resources << /Font << /F1 3 0 R >> /XObject << /Scan 4 0 R >> >> "
+                            f"/Contents {content_id} 0 R >>").encode()
+        objects[content_id] = b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+    objects[2] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for number in sorted(objects):
+        offsets[number] = len(out)
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, objects[number])
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offsets[number] for number in sorted(objects))
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as f:
+        f.write(out)
+    return path
+
+
+def write_samples(directory, files, pages, lines_per_page=40, scanned_every=0):
+    """files PDFs of `pages` pages each under directory; returns their paths"""
+    os.makedirs(directory, exist_ok=True)
+    return [
+        write_text_pdf(os.path.join(directory, f"visit_notes_{number:03d}.pdf"), pages, lines_per_page,
+                       seed=number, scanned_every=scanned_every)
+        for number in range(files)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("directory")
+    parser.add_argument("--files", type=int, default=10)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--lines", type=int, default=40, help="Text lines per page")
+    parser.add_argument("--scanned-every", type=int, default=0, help="Make every Nth page an image-only scan")
+    args = parser.parse_args()
+    paths = write_samples(args.directory, args.files, args.pages, args.lines, args.scanned_every)
+    print(f"Wrote {len(paths)} PDFs of {args.pages} pages to {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
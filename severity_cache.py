@@ -0,0 +1,148 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from keyword_matcher import tokenize
+
+# Filler words that don't change the severity of a complaint.
+# Negations and intensifiers ("not", "very", "severe") are deliberately kept,
+# and so are tense and aspect ("had" chest pain last year is not "am having" it).
+FILLER_WORDS = frozenset({
+    "i", "a", "an", "the", "my", "me", "just", "please", "hi", "hello",
+})
+
+# Contractions spelled out, so "I'm having" and "I am having" share a key
+CONTRACTIONS = {"im": "am", "ive": "have"}
+
+# Part of every stored key's version; bump when normalize_query changes
+NORMALIZATION_VERSION = 2
+
+
+def normalize_query(text):
+    """Canonical form used for cache keys: lowercase words without filler"""
+    return " ".join(
+        CONTRACTIONS.get(token, token) for token, _, _ in tokenize(text) if token not in FILLER_WORDS
+    )
+
+
+def prompt_version(prompt_template):
+    """Short fingerprint of a prompt; editing the prompt changes every key"""
+    return hashlib.sha1(prompt_template.encode("utf-8")).hexdigest()[:12]
+
+
+def cache_version(prompt_template):
+    """Version stored with severity rows: the prompt and the key normalization"""
+    return prompt_version(f"{NORMALIZATION_VERSION}:{prompt_template}")
+
+
+class SeverityCache:
+    """LRU + TTL cache of severity answers, optionally backed by SQLite.
+
+    Keys are (normalized query, model name, prompt version). The in-memory
+    layer is always used; when db_path is set, entries are also written to
+    SQLite so they survive restarts, and rows from other prompt versions are
+    purged on open.
+    """
+
+    def __init__(self, prompt_template, max_entries=10000, ttl_seconds=7 * 24 * 3600, db_path=None):
+        # Rows written under an older normalization are purged like an old prompt's
+        self.version = cache_version(prompt_template)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if db_path:
+            self._open_db(db_path)
+
+    def _open_db(self, db_path):
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS severity_cache (
+                   query TEXT NOT NULL,
+                   model TEXT NOT NULL,
+                   prompt_version TEXT NOT NULL,
+                   severity TEXT NOT NULL,
+                   created_at REAL NOT NULL,
+                   PRIMARY KEY (query, model, prompt_version)
+               )"""
+        )
+        self._db.execute("DELETE FROM severity_cache WHERE prompt_version != ?", (self.version,))
+        self._db.execute("DELETE FROM severity_cache WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+        self._db.commit()
+
+    def _key(self, query, model):
+        return normalize_query(query), model, self.version
+
+    def get(self, query, model):
+        """Return the cached severity or None"""
+        key = self._key(query, model)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                severity, created_at = entry
+                if now - created_at <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return severity
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT severity, created_at FROM severity_cache "
+                    "WHERE query = ? AND model = ? AND prompt_version = ?",
+                    key,
+                ).fetchone()
+                if row and now - row[1] <= self.ttl_seconds:
+                    self._remember(key, row[0], row[1])
+                    self.hits += 1
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def put(self, query, model, severity):
+        key = self._key(query, model)
+        created_at = time.time()
+        with self._lock:
+            self._remember(key, severity, created_at)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO severity_cache VALUES (?, ?, ?, ?, ?)",
+                    key + (severity, created_at),
+                )
+                self._db.commit()
+
+    def _remember(self, key, severity, created_at):
+        self._entries[key] = (severity, created_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self):
+        """Hit/miss counters for logging or metrics"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "prompt_version": self.version,
+        }
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+@lru_cache(maxsize=None)
+def get_severity_cache(prompt_template, max_entries, ttl_seconds, db_path=None):
+    """Process-wide SeverityCache for these settings, so every bot hits the same entries"""
+    return SeverityCache(prompt_template, max_entries=max_entries, ttl_seconds=ttl_seconds, db_path=db_path)
@@ -0,0 +1,202 @@
+"""Local CPU severity classifier used to skip the Gemini call in assess_severity.
+
+A multinomial logistic regression over hashed word and character n-grams.
+It is trained from logged (query, severity) pairs and exported as a small
+JSON file of non-zero weights.
+
+    python severity_classifier.py train severity_log.jsonl -o severity_model.json
+    python severity_classifier.py predict severity_model.json "I have a mild cough"
+"""
+import argparse
+import json
+import math
+import os
+import random
+import zlib
+from collections import defaultdict
+from functools import lru_cache
+
+from keyword_matcher import tokenize
+
+SEVERITY_LABELS = ("emergency", "urgent", "moderate", "mild")
+MODEL_FORMAT_VERSION = 1
+
+
+def extract_features(text, dimensions):
+    """Hash word unigrams, bigrams and in-word character trigrams into feature counts"""
+    words = [token for token, _, _ in tokenize(text)]
+    grams = ["w:" + word for word in words]
+    grams += ["b:" + a + " " + b for a, b in zip(words, words[1:])]
+    for word in words:
+        padded = "<" + word + ">"
+        grams += ["c:" + padded[i:i + 3] for i in range(len(padded) - 2)]
+
+    features = defaultdict(float)
+    for gram in grams:
+        features[zlib.crc32(gram.encode("utf-8")) % dimensions] += 1.0
+    # L2-normalise so long messages don't get overconfident
+    norm = math.sqrt(sum(value * value for value in features.values())) or 1.0
+    return {index: value / norm for index, value in features.items()}
+
+
+class SeverityClassifier:
+    """Hashed n-gram linear model predicting one of SEVERITY_LABELS"""
+
+    def __init__(self, dimensions=2 ** 18, labels=SEVERITY_LABELS):
+        self.dimensions = dimensions
+        self.labels = tuple(labels)
+        self.weights = {label: {} for label in self.labels}
+        self.bias = {label: 0.0 for label in self.labels}
+
+    def _scores(self, features):
+        scores = {}
+        for label in self.labels:
+            weights = self.weights[label]
+            total = self.bias[label]
+            for index, value in features.items():
+                weight = weights.get(index)
+                if weight is not None:
+                    total += weight * value
+            scores[label] = total
+        return scores
+
+    def predict_proba(self, text):
+        """Return {label: probability} for text"""
+        scores = self._scores(extract_features(text, self.dimensions))
+        top = max(scores.values())
+        exps = {label: math.exp(score - top) for label, score in scores.items()}
+        total = sum(exps.values())
+        return {label: value / total for label, value in exps.items()}
+
+    def predict(self, text):
+        """Return (label, confidence) for the most likely severity"""
+        probabilities = self.predict_proba(text)
+        label = max(probabilities, key=probabilities.get)
+        return label, probabilities[label]
+
+    def fit(self, examples, epochs=10, learning_rate=0.5, l2=1e-5, seed=0):
+        """Train with plain SGD on (query, severity) pairs"""
+        rng = random.Random(seed)
+        data = [
+            (extract_features(query, self.dimensions), severity)
+            for query, severity in examples
+            if severity in self.labels
+        ]
+        for epoch in range(epochs):
+            rng.shuffle(data)
+            rate = learning_rate / (1 + epoch)
+            for features, severity in data:
+                scores = self._scores(features)
+                top = max(scores.values())
+                exps = {label: math.exp(score - top) for label, score in scores.items()}
+                total = sum(exps.values())
+                for label in self.labels:
+                    gradient = exps[label] / total - (1.0 if label == severity else 0.0)
+                    if abs(gradient) < 1e-6:
+                        continue
+                    weights = self.weights[label]
+                    for index, value in features.items():
+                        weights[index] = weights.get(index, 0.0) * (1 - rate * l2) - rate * gradient * value
+                    self.bias[label] -= rate * gradient
+        return self
+
+    def to_dict(self):
+        return {
+            "format_version": MODEL_FORMAT_VERSION,
+            "dimensions": self.dimensions,
+            "labels": list(self.labels),
+            "bias": self.bias,
+            "weights": {
+                label: {str(index): round(weight, 6) for index, weight in weights.items() if abs(weight) > 1e-6}
+                for label, weights in self.weights.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("format_version") != MODEL_FORMAT_VERSION:
+            raise ValueError(f"Unsupported severity model format: {data.get('format_version')}")
+        model = cls(dimensions=data["dimensions"], labels=data["labels"])
+        model.bias = {label: float(value) for label, value in data["bias"].items()}
+        model.weights = {
+            label: {int(index): float(weight) for index, weight in weights.items()}
+            for label, weights in data["weights"].items()
+        }
+        return model
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+
+def load_examples(path):
+    """Read logged {"query": ..., "severity": ...} JSON lines"""
+    examples = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if record.get("severity") in SEVERITY_LABELS and record.get("query"):
+                examples.append((record["query"], record["severity"]))
+    return examples
+
+
+def log_example(path, query, severity, source):
+    """Append one (query, severity) pair to the training log"""
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"query": query, "severity": severity, "source": source}) + "\n")
+
+
+def load_classifier(path):
+    """Load a trained model if the file exists, otherwise return None"""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        return SeverityClassifier.load(path)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error loading severity model: {e}")
+        return None
+
+
+@lru_cache(maxsize=None)
+def get_classifier(path):
+    """load_classifier once per process for a given path; bots only read the model"""
+    return load_classifier(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train or query the local severity classifier")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    train = commands.add_parser("train", help="Train from a JSONL log of (query, severity) pairs")
+    train.add_argument("log", help="JSONL file with query and severity fields")
+    train.add_argument("-o", "--output", default="severity_model.json")
+    train.add_argument("--epochs", type=int, default=10)
+    train.add_argument("--dimensions", type=int, default=2 ** 18)
+
+    predict = commands.add_parser("predict", help="Classify a query with a trained model")
+    predict.add_argument("model")
+    predict.add_argument("query")
+
+    args = parser.parse_args()
+    if args.command == "train":
+        examples = load_examples(args.log)
+        if not examples:
+            parser.error(f"No usable examples in {args.log}")
+        model = SeverityClassifier(dimensions=args.dimensions).fit(examples, epochs=args.epochs)
+        model.save(args.output)
+        print(f"Trained on {len(examples)} examples -> {args.output}")
+    else:
+        label, confidence = SeverityClassifier.load(args.model).predict(args.query)
+        print(f"{label} ({confidence:.2f})")
+
+
+if __name__ == "__main__":
+    main()
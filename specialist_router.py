@@ -0,0 +1,102 @@
+import math
+from collections import defaultdict, namedtuple
+from functools import lru_cache
+
+from keyword_matcher import tokenize
+
+SpecialistScore = namedtuple("SpecialistScore", ["specialist", "score", "matched_terms"])
+
+
+# Plurals the suffix rule below can't fold
+IRREGULAR_PLURALS = {
+    "children": "child", "teeth": "tooth", "feet": "foot", "women": "woman",
+    "men": "man", "people": "person", "mice": "mouse", "lice": "louse",
+}
+
+
+def stem(token):
+    """Very small plural folding so "headaches" and "headache" share a posting"""
+    if token in IRREGULAR_PLURALS:
+        return IRREGULAR_PLURALS[token]
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def term_tokens(text):
+    return tuple(stem(token) for token, _, _ in tokenize(text))
+
+
+class SpecialistRouter:
+    """Inverted index from condition terms and phrases to specialists.
+
+    Every condition is indexed under its first token, so routing a query
+    costs one dictionary lookup per query token plus a short phrase check,
+    regardless of how many specialists or condition terms are loaded.
+    Terms shared by many specialists weigh less (inverse document frequency)
+    and multi-word phrases weigh more than single words.
+    """
+
+    def __init__(self, specialist_conditions):
+        # first token -> [(phrase_tokens, term, specialist, weight), ...]
+        self._index = defaultdict(list)
+        # Dict order breaks ties, matching the old first-hit behaviour
+        self._order = {}
+
+        specialists_by_term = defaultdict(set)
+        for specialist, conditions in specialist_conditions:
+            self._order.setdefault(specialist, len(self._order))
+            for condition in conditions:
+                tokens = term_tokens(condition)
+                if tokens:
+                    specialists_by_term[tokens].add(specialist)
+
+        total = max(len(self._order), 1)
+        for specialist, conditions in specialist_conditions:
+            for condition in conditions:
+                tokens = term_tokens(condition)
+                if not tokens:
+                    continue
+                idf = math.log(1 + total / len(specialists_by_term[tokens]))
+                weight = idf * len(tokens)
+                self._index[tokens[0]].append((tokens, condition, specialist, weight))
+
+        self.term_count = sum(len(postings) for postings in self._index.values())
+
+    def rank(self, text, limit=None):
+        """Return SpecialistScore candidates for text, best first"""
+        tokens = term_tokens(text)
+        scores = defaultdict(float)
+        matched = defaultdict(list)
+
+        for position, token in enumerate(tokens):
+            postings = self._index.get(token)
+            if not postings:
+                continue
+            for phrase, term, specialist, weight in postings:
+                if len(phrase) > 1 and tokens[position:position + len(phrase)] != phrase:
+                    continue
+                scores[specialist] += weight
+                matched[specialist].append(term)
+
+        ranked = sorted(scores, key=lambda name: (-scores[name], self._order[name]))
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [SpecialistScore(name, round(scores[name], 4), tuple(matched[name])) for name in ranked]
+
+
+def freeze_conditions(specialists, exclude=()):
+    """Turn the specialists dict into the hashable shape get_router caches on"""
+    return tuple(
+        (name, tuple(info["conditions"]))
+        for name, info in specialists.items()
+        if name not in exclude
+    )
+
+
+@lru_cache(maxsize=None)
+def get_router(specialist_conditions):
+    """Build the index once per process for a given specialist directory"""
+    return SpecialistRouter(specialist_conditions)
@@ -0,0 +1,78 @@
+import os
+import sys
+
+import pytest
+
+# The modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_gemini_server import FakeGemini, start_server  # noqa: E402
+
+
+@pytest.fixture
+def fake_gemini():
+    """A zero-latency fake Gemini server; tests may change its settings"""
+    server, url = start_server(FakeGemini(latency_ms=0))
+    yield server.fake, url
+    server.shutdown()
+
+
+@pytest.fixture
+def gemini_env(fake_gemini, tmp_path, monkeypatch):
+    """Point both bots at the fake server with no caches carried over from outside"""
+    _, url = fake_gemini
+    monkeypatch.setenv("GEMINI_API_ENDPOINT", url)
+    monkeypatch.setenv("GEMINI_RPM", "100000")
+    monkeypatch.setenv("MODEL_CACHE_PATH", str(tmp_path / "models.json"))
+    monkeypatch.setenv("FAQ_STORE_PATH", str(tmp_path / "missing_faq.bin"))
+    monkeypatch.setenv("SEVERITY_MODEL_PATH", "")
+    for name in ("SEVERITY_CACHE_DB", "ANSWER_CACHE_DB", "GEMINI_HEDGE_PERCENTILE", "TRIAGE_MODE"):
+        monkeypatch.delenv(name, raising=False)
+
+    import category
+    import chatBot
+    from answer_cache import get_answer_cache
+    from faq_store import get_store
+    from request_scheduler import get_scheduler
+    from severity_cache import get_severity_cache
+    from severity_classifier import get_classifier
+
+    def reset():
+        # Fresh per-model budgets, breakers and caches, and no model objects
+        # whose clients point at another test's server
+        for factory in (get_scheduler, get_severity_cache, get_answer_cache, get_classifier, get_store):
+            factory.cache_clear()
+        category.MODEL_REGISTRY.invalidate()
+        chatBot.MODEL_REGISTRY.invalidate()
+
+    reset()
+    yield fake_gemini
+    reset()
+
+
+@pytest.fixture
+def make_bot(gemini_env):
+    """Build category.MedicalChatbot instances that talk to the fake server"""
+    from category import MedicalChatbot
+
+    def make(**kwargs):
+        bot = MedicalChatbot(use_model_cache=False, **kwargs)
+        bot.severity_classifier = None
+        return bot
+
+    return make
+
+
+@pytest.fixture
+def requests_seen(fake_gemini, monkeypatch):
+    """Bodies of the generateContent requests the fake server receives, in order"""
+    fake, _ = fake_gemini
+    bodies = []
+    generate = fake.generate
+
+    def record(model, body):
+        bodies.append(body)
+        return generate(model, body)
+
+    monkeypatch.setattr(fake, "generate", record)
+    return bodies
@@ -0,0 +1,66 @@
+import asyncio
+
+FOLLOW_UP = "What about for my son?"
+
+
+def answer_requests(bodies, question):
+    """Answer calls (they carry the system prompt) whose last message is question"""
+    return [
+        body for body in bodies
+        if "systemInstruction" in body and body["contents"][-1]["parts"][0]["text"] == question
+    ]
+
+
+def test_follow_ups_are_not_shared_between_users(make_bot, requests_seen):
+    bot = make_bot()
+    asyncio.run(bot.respond("alice", "My throat is a bit scratchy, what can I do?"))
+    alice = asyncio.run(bot.respond("alice", FOLLOW_UP))
+    bob = asyncio.run(bot.respond("bob", FOLLOW_UP))
+
+    assert alice.severity == "mild" and alice.success and bob.success
+    # Bob's question went to the model instead of reusing Alice's answer
+    assert len(answer_requests(requests_seen, FOLLOW_UP)) == 2
+    # and Alice's history was not part of it
+    bob_request = answer_requests(requests_seen, FOLLOW_UP)[1]
+    assert len(bob_request["contents"]) == 1
+
+
+def test_first_questions_are_still_shared(make_bot, requests_seen):
+    bot = make_bot()
+    question = "How can I ease a mild headache?"
+    first = asyncio.run(bot.respond("carol", question))
+    second = asyncio.run(bot.respond("dave", question))
+
+    assert first.severity == "mild" and first.response == second.response
+    assert len(answer_requests(requests_seen, question)) == 1
+    assert bot.answer_cache.stats()["hits"] == 1
+
+
+def test_bots_share_one_cache(make_bot, requests_seen):
+    """One bot per connected user still reuses every other bot's answers"""
+    first, second = make_bot(), make_bot()
+    question = "How can I ease a mild headache?"
+    asyncio.run(first.respond("carol", question))
+    asyncio.run(second.respond("dave", question))
+
+    assert first.answer_cache is second.answer_cache and first.severity_cache is second.severity_cache
+    assert len(answer_requests(requests_seen, question)) == 1
+
+
+def test_faq_answers_only_open_a_conversation(make_bot, requests_seen, tmp_path):
+    from faq_store import load_store, write_store
+
+    bot = make_bot()
+    path = str(tmp_path / "faq.bin")
+    write_store(path, [(FOLLOW_UP, "Stored standalone answer.", "mild", bot.faq_prompt_version)])
+    bot.faq_store = load_store(path)
+
+    asyncio.run(bot.respond("alice", "My throat is a bit scratchy, what can I do?"))
+    alice = asyncio.run(bot.respond("alice", FOLLOW_UP))
+    bob = asyncio.run(bot.respond("bob", FOLLOW_UP))
+
+    # Alice's follow-up went to the model with her history; Bob's opener used the store
+    assert alice.source != "faq" and alice.response != "Stored standalone answer."
+    assert bob.source == "faq" and bob.response == "Stored standalone answer."
+    assert len(answer_requests(requests_seen, FOLLOW_UP)) == 1
+    bot.faq_store.close()
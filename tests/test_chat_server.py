@@ -0,0 +1,129 @@
+import json
+import threading
+from http.cookiejar import CookieJar
+from http.server import ThreadingHTTPServer
+from urllib.parse import urlencode
+from urllib.request import HTTPCookieProcessor, Request, build_opener
+
+import pytest
+
+from chat_server import ALLOWED_ORIGIN, SESSION_COOKIE, make_handler
+
+
+@pytest.fixture
+def chat_url(make_bot):
+    bot = make_bot()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(bot))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield bot, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+class Browser:
+    """An HTTP client that keeps the server's cookies, like one browser profile"""
+
+    def __init__(self, url):
+        self.url = url
+        self.cookies = CookieJar()
+        self.opener = build_opener(HTTPCookieProcessor(self.cookies))
+
+    def open(self, path, method="GET"):
+        return self.opener.open(Request(f"{self.url}{path}", method=method), timeout=30)
+
+    @property
+    def session(self):
+        return next(cookie.value for cookie in self.cookies if cookie.name == SESSION_COOKIE)
+
+
+def stream(browser, message, **params):
+    """(event, payload) pairs of one /api/chat/stream response"""
+    query = urlencode({"message": message, **params})
+    with browser.open(f"/api/chat/stream?{query}") as response:
+        body = response.read().decode("utf-8")
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields.get("event"), json.loads(fields["data"])))
+    return events
+
+
+def test_keyword_emergencies_get_no_answer(chat_url):
+    _, url = chat_url
+    events = stream(Browser(url), "my father is having chest pain")
+
+    assert [event for event, _ in events] == ["triage", "done"]
+    triage = events[0][1]
+    assert triage["severity"] == "emergency"
+    assert triage["emergency_matches"][0]["keyword"] == "chest pain"
+
+
+def test_model_emergencies_stream_their_answer(chat_url, fake_gemini, monkeypatch):
+    """Same as the command line chat: routed to emergency care, then answered"""
+    _, url = chat_url
+    fake, _ = fake_gemini
+    monkeypatch.setattr(fake, "severity_for", lambda text: "emergency" if "tight band" in text else "mild")
+    events = stream(Browser(url), "a tight band around my ribs when I climb stairs")
+
+    event, triage = events[0]
+    assert event == "triage" and triage["severity"] == "emergency" and not triage["emergency_matches"]
+    text = "".join(payload["text"] for event, payload in events if event is None)
+    assert text == fake.answer
+    assert events[-1][0] == "done" and events[-1][1]["total_ms"] is not None
+
+
+def test_concurrent_messages_from_one_user_stay_in_order(chat_url, fake_gemini, monkeypatch):
+    bot, url = chat_url
+    fake, _ = fake_gemini
+    monkeypatch.setattr(fake, "sample_latency", lambda rng: 50.0)
+    messages = ["How do I treat a blister?", "Should I pop it?", "How long does it take to heal?"]
+    browser = Browser(url)
+    browser.open("/api/health").close()
+    threads = [threading.Thread(target=stream, args=(browser, message)) for message in messages]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    turns = bot.conversations.get(f"web:{browser.session}").turns
+    assert [turn.role for turn in turns] == ["user", "model"] * 3
+
+
+def test_only_the_app_origin_may_read_responses(chat_url):
+    _, url = chat_url
+    with Browser(url).open("/api/health") as response:
+        assert response.headers["Access-Control-Allow-Origin"] == ALLOWED_ORIGIN != "*"
+        assert response.headers["Access-Control-Allow-Credentials"] == "true"
+        assert "HttpOnly" in response.headers["Set-Cookie"]
+
+
+def test_conversations_follow_the_session_cookie_not_the_url(chat_url, requests_seen):
+    bot, url = chat_url
+    alice, mallory = Browser(url), Browser(url)
+    stream(alice, "My throat is a bit scratchy, what can I do?")
+    stream(mallory, "What about for my son?", user_id=f"web:{alice.session}")
+
+    assert alice.session != mallory.session
+    assert len(bot.conversations.get(f"web:{alice.session}").turns) == 2
+    # Mallory's question was asked without Alice's history
+    assert len(requests_seen[-1]["contents"]) == 1
+
+
+def test_new_chat_starts_a_new_session(chat_url):
+    bot, url = chat_url
+    browser = Browser(url)
+    stream(browser, "My throat is a bit scratchy, what can I do?")
+    old = browser.session
+    browser.open("/api/chat/new", method="POST").close()
+
+    assert browser.session != old
+    assert bot.conversations.get(f"web:{old}").is_empty
+
+
+def test_malformed_session_cookies_are_replaced(chat_url):
+    _, url = chat_url
+    request = Request(f"{url}/api/health", headers={"Cookie": f"{SESSION_COOKIE}=web"})
+    with build_opener().open(request, timeout=30) as response:
+        assert response.headers["Set-Cookie"].startswith(f"{SESSION_COOKIE}=")
+        assert f"{SESSION_COOKIE}=web;" not in response.headers["Set-Cookie"]
@@ -0,0 +1,120 @@
+import asyncio
+import json
+import re
+
+import chatBot
+from category import parse_severity_batch
+from fake_gemini_server import DEFAULT_ANSWER, request_text
+
+
+def user_texts(body):
+    return [part.get("text") for content in body["contents"] if content.get("role") == "user"
+            for part in content["parts"]]
+
+
+def test_answers_reuse_registry_models(gemini_env, requests_seen):
+    bot = chatBot.MedicalChatbot(use_model_cache=False)
+    before = chatBot.MODEL_REGISTRY.stats()
+    for question in ("What helps a sore throat?", "How much water should I drink?", "Is coffee bad for me?"):
+        _, success = bot.get_medical_response(question, user_id="registry")
+        assert success
+    after = chatBot.MODEL_REGISTRY.stats()
+    assert after["constructions"] - before["constructions"] <= 1
+    assert after["constructions_avoided"] - before["constructions_avoided"] >= 2
+    assert len(requests_seen) == 3
+
+
+def test_second_turn_includes_the_first(gemini_env, requests_seen):
+    bot = chatBot.MedicalChatbot(use_model_cache=False)
+    bot.get_medical_response("I have had a cough for three days", user_id="alice")
+    bot.get_medical_response("Should I take honey for it?", user_id="alice")
+    bot.get_medical_response("What is a normal resting heart rate?", user_id="bob")
+
+    assert user_texts(requests_seen[1]) == ["I have had a cough for three days", "Should I take honey for it?"]
+    assert [content["role"] for content in requests_seen[1]["contents"]] == ["user", "model", "user"]
+    # Conversations are per user
+    assert user_texts(requests_seen[2]) == ["What is a normal resting heart rate?"]
+
+
+def test_streamed_answer_arrives_in_chunks_and_is_remembered(gemini_env, requests_seen):
+    bot = chatBot.MedicalChatbot(use_model_cache=False)
+    chunks = list(bot.stream_medical_response("What helps a sore throat?", user_id="carol"))
+    assert len(chunks) > 1
+    assert "".join(chunks) == DEFAULT_ANSWER
+
+    bot.get_medical_response("And for a blocked nose?", user_id="carol")
+    assert user_texts(requests_seen[1]) == ["What helps a sore throat?", "And for a blocked nose?"]
+
+
+def test_respond_stream_yields_the_answer_chunks(make_bot):
+    bot = make_bot()
+    triaged = []
+
+    async def run():
+        return [chunk async for chunk in bot.respond_stream("dave", "recurring headaches every afternoon",
+                                                            on_triage=triaged.append)]
+
+    chunks = asyncio.run(run())
+    [context] = triaged
+    assert len(chunks) > 1
+    assert context.success and context.source == "model"
+    assert "".join(chunks) == context.response == DEFAULT_ANSWER
+
+
+BATCH_QUERIES = [
+    "I have had a persistent cough for three weeks",
+    "my son has a high fever since yesterday",
+    "what are the benefits of regular exercise",
+    "my father is unconscious on the floor",
+]
+
+
+def test_batch_reply_as_json_array():
+    text = '[{"id": "q2", "severity": "urgent"}, {"id": "q1", "severity": "Mild"}, {"id": "q9", "severity": "mild"}]'
+    assert parse_severity_batch(text, 3) == ["mild", "urgent", None]
+
+
+def test_batch_reply_as_json_object():
+    text = '{"q1": "moderate", "3": "emergency", "q2": "not sure"}'
+    assert parse_severity_batch(text, 3) == ["moderate", None, "emergency"]
+
+
+def test_batch_reply_as_free_text():
+    text = "Here you go:\nq1 - Emergency\n**q3**: mild\nq4 was unclear"
+    assert parse_severity_batch(text, 4) == ["emergency", None, "mild", None]
+
+
+def test_batch_assessment_sends_one_prompt_per_chunk(make_bot, requests_seen):
+    bot = make_bot()
+    assert bot.assess_severity_batch(BATCH_QUERIES, chunk_size=3) == ["moderate", "urgent", "mild", "emergency"]
+    assert len(requests_seen) == 2
+
+
+def test_items_missing_from_a_batch_reply_are_retried_one_by_one(fake_gemini, make_bot, requests_seen):
+    fake, _ = fake_gemini
+    generate = fake.generate
+
+    def drop_ids(model, body):
+        reply = generate(model, body)
+        if "Categorize the severity level of each numbered medical query" in request_text(body):
+            # Only the first item comes back
+            return json.dumps(json.loads(reply)[:1])
+        return reply
+
+    fake.generate = drop_ids
+    bot = make_bot()
+    assert bot.assess_severity_batch(BATCH_QUERIES) == ["moderate", "urgent", "mild", "emergency"]
+    # One batch call, then one call for each of the three missing items
+    assert len(requests_seen) == 4
+    assert all("Respond ONLY" in request_text(body) for body in requests_seen[1:])
+
+
+def test_cli_reports_first_token_and_total_latency(gemini_env, monkeypatch, capsys):
+    bot = chatBot.MedicalChatbot(use_model_cache=False)
+    inputs = iter(["What helps a sore throat?", "exit"])
+    monkeypatch.setattr("builtins.input", lambda prompt="": next(inputs))
+    bot.medical_chat()
+
+    out = capsys.readouterr().out
+    assert f"🩺 Assistant: {DEFAULT_ANSWER}" in out
+    assert re.search(r"⏱️  First token \d+ ms, total \d+ ms", out)
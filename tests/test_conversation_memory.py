@@ -0,0 +1,90 @@
+from conversation_memory import (
+    SUMMARY_ACK,
+    SUMMARY_PREFIX,
+    ConversationMemory,
+    ConversationStore,
+    estimate_tokens,
+)
+
+
+def chat(memory, turns):
+    for number in range(turns):
+        memory.add_turn("user", f"Question {number}: my knee has hurt for {number} days. What should I do next?")
+        memory.add_turn("model", f"Answer {number}: rest it, use ice and see a doctor if it is not better. " * 3)
+
+
+def prompt_tokens(memory):
+    return sum(estimate_tokens(part) for content in memory.history() for part in content["parts"])
+
+
+def test_history_stays_under_budget_over_many_turns():
+    memory = ConversationMemory(budget_tokens=400, summary_tokens=100)
+    for number in range(200):
+        memory.add_turn("user", f"Question {number}: my knee has hurt for {number} days.")
+        memory.add_turn("model", f"Answer {number}: rest it and use ice. " * 4)
+        assert memory.total_tokens <= 400
+        assert prompt_tokens(memory) <= 400
+    assert memory.compactions > 0
+
+
+def test_the_most_recent_turns_are_kept_verbatim():
+    memory = ConversationMemory(budget_tokens=400, summary_tokens=100)
+    chat(memory, 50)
+
+    history = memory.history()
+    assert history[-2] == {"role": "user", "parts": ["Question 49: my knee has hurt for 49 days. What should I do next?"]}
+    assert history[-1]["parts"] == ["Answer 49: rest it, use ice and see a doctor if it is not better. " * 3]
+    turns = history[2:]
+    # Kept turns start on a user turn and alternate from there
+    assert [content["role"] for content in turns] == ["user", "model"] * (len(turns) // 2)
+
+
+def test_compaction_folds_old_turns_into_a_summary():
+    memory = ConversationMemory(budget_tokens=400, summary_tokens=100)
+    chat(memory, 3)
+    assert memory.compactions == 0
+    assert not memory.summary
+
+    chat(memory, 6)
+    history = memory.history()
+    assert memory.compactions > 0
+    assert history[0]["role"] == "user"
+    assert history[0]["parts"][0].startswith(SUMMARY_PREFIX)
+    assert history[1] == {"role": "model", "parts": [SUMMARY_ACK]}
+    # Evicted user turns survive as their first sentence; model replies do not
+    assert "- Question 0: my knee has hurt for 0 days." in memory.summary.split("\n")
+    assert "What should I do next" not in memory.summary
+    assert "Answer" not in memory.summary
+
+
+def test_the_summary_drops_its_oldest_lines_when_full():
+    memory = ConversationMemory(budget_tokens=400, summary_tokens=60)
+    chat(memory, 100)
+
+    lines = memory.summary.split("\n")
+    assert memory.summary_token_count <= 60
+    assert "Question 0:" not in memory.summary
+    # The newest summarized turn directly precedes the oldest kept one
+    oldest_kept = int(memory.turns[0].text.split(":")[0].split()[1])
+    assert lines[-1].startswith(f"- Question {oldest_kept - 1}:")
+
+
+def test_a_huge_message_keeps_its_end():
+    memory = ConversationMemory(budget_tokens=200, summary_tokens=50)
+    memory.add_turn("user", "x" * 5000 + " the important part")
+
+    assert memory.total_tokens <= 200
+    assert memory.turns[0].text.endswith(" the important part")
+
+
+def test_store_keeps_one_memory_per_user_up_to_max_users():
+    store = ConversationStore(max_users=2, budget_tokens=300)
+    first = store.get("a")
+    assert store.get("a") is first
+    assert first.budget_tokens == 300
+    second = store.get("b")
+    store.get("a")
+    store.get("c")
+    # "b" was the least recently used
+    assert store.get("a") is first
+    assert store.get("b") is not second
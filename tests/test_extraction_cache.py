@@ -0,0 +1,96 @@
+import pytest
+
+from extraction_cache import ExtractionCache
+from sample_documents import write_text_pdf
+
+
+def count(cache, table):
+    return cache._db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_eviction_drops_the_documents_that_used_the_pages(tmp_path):
+    cache = ExtractionCache(str(tmp_path / "cache.db"), max_bytes=1000)
+    for document in range(20):
+        pages = [(number, f"page-{document}-{number}", "x" * 100, "text", 0.0) for number in (1, 2)]
+        cache.put_document(f"doc-{document}", pages)
+
+    assert cache.stats()["bytes"] <= 1000
+    # Every document row left can still be served whole
+    dangling = cache._db.execute(
+        "SELECT COUNT(*) FROM extraction_document_pages d "
+        "LEFT JOIN extraction_pages p ON p.page_key = d.page_key WHERE p.page_key IS NULL"
+    ).fetchone()[0]
+    assert dangling == 0
+    assert count(cache, "extraction_documents") * 2 == count(cache, "extraction_document_pages")
+    assert cache.get_document("doc-0") is None
+    assert len(cache.get_document("doc-19")) == 2
+
+
+def ocr_counter(monkeypatch):
+    """Replace the OCR of scanned pages with a fake that records the pages it was given"""
+    import text_extraction
+
+    ocred = []
+
+    def fake_ocr_window(path, first, last, dpi):
+        ocred.extend(range(first, last + 1))
+        return [(number, f"scanned text {number}", 0.0) for number in range(first, last + 1)]
+
+    monkeypatch.setattr(text_extraction, "_ocr_window", fake_ocr_window)
+    return ocred
+
+
+def test_a_known_document_is_served_without_ocr(tmp_path, monkeypatch):
+    pytest.importorskip("pdfplumber")
+    from text_extraction import iter_pages
+
+    ocred = ocr_counter(monkeypatch)
+    cache = ExtractionCache(str(tmp_path / "cache.db"))
+    path = write_text_pdf(str(tmp_path / "notes.pdf"), pages=3, lines_per_page=5, scanned_every=2)
+
+    first = list(iter_pages(path, ocr_workers=1, cache=cache))
+    assert ocred == [2]
+    assert [page.method for page in first] == ["text", "ocr", "text"]
+
+    second = list(iter_pages(path, ocr_workers=1, cache=cache))
+    assert ocred == [2]
+    assert cache.hits == 1
+    assert all(page.cached for page in second)
+    assert [(page.text, page.method) for page in second] == [(page.text, page.method) for page in first]
+
+
+def test_pages_shared_with_an_earlier_document_are_reused(tmp_path, monkeypatch):
+    pytest.importorskip("pdfplumber")
+    from text_extraction import iter_pages
+
+    ocred = ocr_counter(monkeypatch)
+    cache = ExtractionCache(str(tmp_path / "cache.db"))
+    # Same seed: the longer file starts with the shorter file's three pages
+    short = write_text_pdf(str(tmp_path / "short.pdf"), pages=3, lines_per_page=5, scanned_every=3)
+    longer = write_text_pdf(str(tmp_path / "long.pdf"), pages=5, lines_per_page=5, scanned_every=3)
+
+    list(iter_pages(short, ocr_workers=1, cache=cache))
+    assert ocred == [3]
+    pages = list(iter_pages(longer, ocr_workers=1, cache=cache))
+
+    assert cache.hits == 0
+    assert cache.page_hits == 3
+    assert [page.cached for page in pages] == [True, True, True, False, False]
+    # The scanned page was not OCRed again
+    assert ocred == [3]
+
+
+def test_rotation_is_part_of_the_page_fingerprint(tmp_path):
+    pdfplumber = pytest.importorskip("pdfplumber")
+    from text_extraction import page_fingerprint
+
+    def fingerprints(path):
+        with pdfplumber.open(path) as pdf:
+            return [page_fingerprint(page, {}) for page in pdf.pages]
+
+    upright = fingerprints(write_text_pdf(str(tmp_path / "upright.pdf"), pages=2, lines_per_page=5))
+    again = fingerprints(write_text_pdf(str(tmp_path / "again.pdf"), pages=2, lines_per_page=5))
+    turned = fingerprints(write_text_pdf(str(tmp_path / "turned.pdf"), pages=2, lines_per_page=5, rotate=90))
+
+    assert upright == again
+    assert not set(upright) & set(turned)
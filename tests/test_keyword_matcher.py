@@ -0,0 +1,71 @@
+import pytest
+
+from keyword_matcher import get_fuzzy_matcher, get_matcher
+from triage_directory import load_directory
+
+
+@pytest.fixture(scope="module")
+def keywords():
+    return load_directory().emergency_keywords
+
+
+@pytest.mark.parametrize("text, keyword", [
+    ("I was poisoned", "poison"),
+    ("I poisoned myself", "poison"),
+    ("my son keeps fainting", "fainted"),
+    ("I feel faint", "fainted"),
+    ("he keeps having seizures", "seizure"),
+    ("she is having convulsions", "convulsion"),
+    ("I think he overdosed", "overdose"),
+    ("two emergencies at once", "emergency"),
+    ("chest pains since this morning", "chest pain"),
+    ("I get severe headaches", "severe headache"),
+    ("he has broken bones", "broken bone"),
+    ("severe burns on my arm", "severe burn"),
+    ("multiple stab wounds", "stab wound"),
+    ("arm pains and jaw pains", "arm pain"),
+    ("arm pains and jaw pains", "jaw pain"),
+    ("I think he had heart attacks", "heart attack"),
+    ("he passed out last night and hasn't woken up", "passed out"),
+    ("My grandma fainted yesterday and is still confused", "fainted"),
+    ("it's not urgent but I'm dying here", "urgent"),
+    ("he had strokes", "stroke"),
+    ("he is in a state of unconsciousness", "unconscious"),
+])
+def test_inflected_keywords_trigger_the_screen(keywords, text, keyword):
+    assert keyword in [hit.keyword for hit in get_matcher(keywords).search(text)]
+    assert keyword in [hit.keyword for hit in get_fuzzy_matcher(keywords).search(text)
+                       if hit.distance == 0]
+
+
+@pytest.mark.parametrize("text, keyword, distance", [
+    ("I cant breath properly", "can't breathe", 1),
+    ("chest pian since this morning", "chest pain", 1),
+    ("my son just had a siezure", "seizure", 1),
+    ("my dad is unconcious on the floor", "unconscious", 1),
+    ("sever headache since noon", "severe headache", 1),
+])
+def test_typos_match_fuzzily_with_their_distance(keywords, text, keyword, distance):
+    assert get_matcher(keywords).search(text) == []
+    assert [(hit.keyword, hit.distance) for hit in get_fuzzy_matcher(keywords).search(text)] == [(keyword, distance)]
+
+
+@pytest.mark.parametrize("text", [
+    "are poisonous mushrooms common here",
+    "I'm cutting back on salt",
+    "I painted my room",
+    "I'm overdosing on coffee haha",
+    "I have some palpitation",
+    "is cutting sugar good",
+    "I stroked the cat",
+    "stroking my dog",
+    "strokes of luck",
+    "new cutting boards for the kitchen",
+    "I was painting my room and got a headache",
+    "I love painting",
+    "my arm painting class",
+    "I'm so stoked about my new bike",
+])
+def test_other_words_do_not_trigger(keywords, text):
+    assert get_matcher(keywords).search(text) == []
+    assert get_fuzzy_matcher(keywords).search(text) == []
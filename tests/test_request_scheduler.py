@@ -0,0 +1,145 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from request_scheduler import HedgeCancelled, HedgePolicy, RequestScheduler
+
+
+def half_open_scheduler(models, **kwargs):
+    """A scheduler whose breakers for models were opened by a 503 and have timed out"""
+    scheduler = RequestScheduler(failure_threshold=1, reset_timeout=0.01, max_attempts=1, **kwargs)
+    for model in models:
+        scheduler.breaker(model).record_failure()
+    time.sleep(0.02)
+    for model in models:
+        assert scheduler.breaker(model).state == "half-open"
+    return scheduler
+
+
+def test_cancelled_async_call_frees_half_open_trial():
+    scheduler = half_open_scheduler(["a"])
+
+    async def hang(model):
+        await asyncio.Event().wait()
+
+    async def run():
+        task = asyncio.ensure_future(scheduler.call_async(hang, ["a"]))
+        await asyncio.sleep(0.01)
+        assert scheduler.breaker("a").trial_in_flight
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    breaker = scheduler.breaker("a")
+    assert not breaker.trial_in_flight
+    assert breaker.allow()
+
+
+def test_cancelled_sync_call_frees_half_open_trial():
+    scheduler = half_open_scheduler(["a"])
+    # An empty bucket makes the call sleep after taking the trial slot
+    scheduler.bucket("a").tokens = 0
+    cancelled = threading.Event()
+    errors = []
+
+    def run():
+        try:
+            scheduler.call(lambda model: "answer", ["a"], cancelled=cancelled)
+        except HedgeCancelled as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    time.sleep(0.05)
+    assert scheduler.breaker("a").trial_in_flight
+    cancelled.set()
+    thread.join(timeout=5)
+    assert errors
+    assert not scheduler.breaker("a").trial_in_flight
+    assert scheduler.breaker("a").allow()
+
+
+def test_cancelled_hedge_loser_frees_half_open_trial():
+    policy = HedgePolicy(percentile=50, min_samples=1, min_delay=0.0)
+    policy.record("answer", 0.01)
+    scheduler = half_open_scheduler(["a"], hedging=policy)
+
+    async def call(model):
+        if model == "a":
+            await asyncio.Event().wait()
+        return model
+
+    async def run():
+        result = await scheduler.hedged_call_async(call, ["a", "b"], "answer")
+        # Let the cancelled primary unwind
+        for _ in range(3):
+            await asyncio.sleep(0)
+        return result
+
+    assert asyncio.run(run()) == ("b", "b")
+    assert scheduler.hedge_wins == 1
+    breaker = scheduler.breaker("a")
+    assert breaker.state == "half-open"
+    assert not breaker.trial_in_flight
+    assert breaker.allow()
+
+
+def start_blocked_call(scheduler, models, calls, release):
+    """Run scheduler.call on a thread whose model call waits for release"""
+    started = threading.Event()
+
+    def func(model):
+        calls.append(model)
+        started.set()
+        release.wait(5)
+        return model
+
+    thread = threading.Thread(target=scheduler.call, args=(func, models))
+    thread.start()
+    assert started.wait(5)
+    return thread
+
+
+def test_only_one_probe_reaches_a_half_open_model():
+    scheduler = half_open_scheduler(["a"])
+    calls, release = [], threading.Event()
+    thread = start_blocked_call(scheduler, ["a"], calls, release)
+
+    # The second caller is held back instead of sending its own probe
+    with pytest.raises(Exception, match="circuit open"):
+        scheduler.call(lambda model: calls.append(model), ["a"])
+    release.set()
+    thread.join(timeout=5)
+    assert calls == ["a"]
+    assert scheduler.breaker("a").state == "closed"
+
+
+def test_every_breaker_open_fails_fast_without_calling():
+    scheduler = half_open_scheduler(["a", "b"])
+    calls, release = [], threading.Event()
+    threads = [start_blocked_call(scheduler, ["a", "b"], calls, release) for _ in range(2)]
+    assert sorted(calls) == ["a", "b"]
+
+    # Both trial slots are taken, so no model may be called
+    with pytest.raises(Exception, match="circuit open"):
+        scheduler.call(lambda model: calls.append(model), ["a", "b"])
+    assert sorted(calls) == ["a", "b"]
+    assert scheduler.breaker("a").trial_in_flight and scheduler.breaker("b").trial_in_flight
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+
+def test_open_breakers_are_not_waited_out_with_backoff():
+    sleeps = []
+    scheduler = RequestScheduler(failure_threshold=1, reset_timeout=60.0, max_attempts=3, sleep=sleeps.append)
+    for model in ("a", "b"):
+        scheduler.breaker(model).record_failure()
+
+    with pytest.raises(Exception, match="circuit open"):
+        scheduler.call(lambda model: pytest.fail("called an open model"), ["a", "b"])
+    assert sleeps == []
+    assert scheduler.retries == 0
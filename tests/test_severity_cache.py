@@ -0,0 +1,53 @@
+import asyncio
+
+from severity_cache import SeverityCache, normalize_query
+
+
+def test_tense_and_aspect_stay_in_the_key():
+    assert normalize_query("I had chest pain last year") != normalize_query("I am having chest pain")
+    assert normalize_query("I have a rash") != normalize_query("I had a rash")
+
+
+def test_contractions_and_filler_share_a_key():
+    assert normalize_query("I'm having a headache") == normalize_query("I am having a headache")
+    assert normalize_query("Hi, I have a headache please") == normalize_query("I have the headache")
+
+
+def test_keys_are_per_model():
+    cache = SeverityCache("prompt")
+    cache.put("I am having chest pain", "models/a", "emergency")
+    assert cache.get("I am having chest pain", "models/a") == "emergency"
+    assert cache.get("I am having chest pain", "models/b") is None
+    assert cache.get("I had chest pain last year", "models/a") is None
+
+
+def test_severities_from_a_failover_model_are_served(fake_gemini, make_bot):
+    fake, _ = fake_gemini
+    bot = make_bot()
+    fake.exhausted = frozenset({bot.selected_model})
+
+    assert bot.assess_severity("My knee has been sore for weeks") == "moderate"
+    requests = fake.requests
+    assert bot.assess_severity_local("My knee has been sore for weeks") == "moderate"
+    assert bot.assess_severity("My knee has been sore for weeks") == "moderate"
+    assert fake.requests == requests
+
+
+def test_combined_mode_leaves_the_severity_cache_alone(make_bot):
+    """Its severities are never looked up, so they are not written either"""
+    bot = make_bot(triage_mode="combined")
+    context = asyncio.run(bot.respond("local", "My knee has been sore for weeks"))
+    assert context.source == "combined" and context.severity == "moderate"
+    assert bot.severity_cache.stats()["entries"] == 0
+
+
+def test_editing_the_prompt_drops_its_rows(tmp_path):
+    db_path = str(tmp_path / "severity.db")
+    cache = SeverityCache("severity prompt v1", db_path=db_path)
+    cache.put("sore knee", "models/a", "mild")
+    cache.close()
+
+    cache = SeverityCache("severity prompt v2", db_path=db_path)
+    assert cache.get("sore knee", "models/a") is None
+    rows = cache._db.execute("SELECT COUNT(*) FROM severity_cache").fetchone()[0]
+    assert rows == 0
@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+from severity_classifier import SeverityClassifier, load_classifier
+
+EXAMPLES = [
+    ("my father collapsed and is not breathing", "emergency"),
+    ("crushing chest pain spreading to my arm", "emergency"),
+    ("she is bleeding heavily after an accident", "emergency"),
+    ("high fever of 40 for two days", "urgent"),
+    ("deep cut on my hand that needs stitches", "urgent"),
+    ("swollen ankle and I cannot walk on it", "urgent"),
+    ("persistent cough for three weeks", "moderate"),
+    ("recurring headaches every afternoon", "moderate"),
+    ("a rash that keeps coming back", "moderate"),
+    ("runny nose and a mild cold", "mild"),
+    ("benefits of regular exercise", "mild"),
+    ("how to manage stress naturally", "mild"),
+]
+
+
+@pytest.fixture(scope="module")
+def model():
+    return SeverityClassifier(dimensions=2 ** 14).fit(EXAMPLES * 5, epochs=20)
+
+
+def test_fit_then_predict_returns_the_trained_labels(model):
+    for query, severity in EXAMPLES:
+        label, confidence = model.predict(query)
+        assert label == severity
+        assert confidence > 0.5
+    probabilities = model.predict_proba("my son is not breathing")
+    assert set(probabilities) == {"emergency", "urgent", "moderate", "mild"}
+    assert sum(probabilities.values()) == pytest.approx(1.0)
+
+
+def test_to_dict_and_from_dict_keep_predictions(model):
+    # Through JSON, as save() and load() do
+    restored = SeverityClassifier.from_dict(json.loads(json.dumps(model.to_dict())))
+    for query in [query for query, _ in EXAMPLES] + ["my grandmother has a bad cough", "is coffee healthy"]:
+        label, confidence = model.predict(query)
+        restored_label, restored_confidence = restored.predict(query)
+        assert restored_label == label
+        assert restored_confidence == pytest.approx(confidence, abs=1e-4)
+
+
+def test_unknown_format_versions_are_rejected(model):
+    data = model.to_dict()
+    data["format_version"] = 99
+    with pytest.raises(ValueError):
+        SeverityClassifier.from_dict(data)
+
+
+def test_missing_or_corrupt_model_files_load_as_none(tmp_path):
+    assert load_classifier(str(tmp_path / "missing.json")) is None
+    assert load_classifier("") is None
+    corrupt = tmp_path / "corrupt.json"
+    corrupt.write_text('{"format_version": 1, "dimensions":')
+    assert load_classifier(str(corrupt)) is None
+    incomplete = tmp_path / "incomplete.json"
+    incomplete.write_text('{"format_version": 1}')
+    assert load_classifier(str(incomplete)) is None
+
+
+def test_bot_with_a_corrupt_model_asks_gemini(gemini_env, tmp_path, monkeypatch):
+    fake, _ = gemini_env
+    corrupt = tmp_path / "severity_model.json"
+    corrupt.write_text("not json")
+    monkeypatch.setenv("SEVERITY_MODEL_PATH", str(corrupt))
+    from category import MedicalChatbot
+
+    bot = MedicalChatbot(use_model_cache=False)
+    assert bot.severity_classifier is None
+    before = fake.requests
+    assert bot.assess_severity("I have had a persistent cough for three weeks") == "moderate"
+    assert fake.requests == before + 1
@@ -0,0 +1,24 @@
+import pytest
+
+from triage_directory import load_directory
+
+
+@pytest.fixture(scope="module")
+def router():
+    return load_directory().specialist_router
+
+
+@pytest.mark.parametrize("text, specialist", [
+    ("my children have a fever", "Pediatrician"),
+    ("my child has a fever", "Pediatrician"),
+    ("my babies keep crying at night", "Pediatrician"),
+    ("recurring headaches every afternoon", "Neurologist"),
+    ("a question about women and menstrual cramps", "Gynecologist"),
+    ("health advice for a woman in her forties", "Gynecologist"),
+])
+def test_plural_and_singular_forms_route_alike(router, text, specialist):
+    assert router.rank(text, limit=1)[0].specialist == specialist
+
+
+def test_unmatched_text_has_no_candidates(router):
+    assert router.rank("what should I eat for lunch") == []
@@ -0,0 +1,38 @@
+import pytest
+
+pdfplumber = pytest.importorskip("pdfplumber")
+
+from sample_documents import write_text_pdf  # noqa: E402
+from text_extraction import MIN_TEXT_CHARS, iter_pages, route_page  # noqa: E402
+
+
+def routes(path):
+    with pdfplumber.open(path) as pdf:
+        return [route_page(page)[0] for page in pdf.pages]
+
+
+def test_pages_are_routed_by_their_text_layer_and_images(tmp_path):
+    path = write_text_pdf(str(tmp_path / "notes.pdf"), pages=4, lines_per_page=10, scanned_every=2)
+    assert routes(path) == ["text", "ocr", "text", "ocr"]
+
+
+def test_a_short_text_layer_without_images_is_kept(tmp_path):
+    # Only the "Page 1" heading: well under MIN_TEXT_CHARS, but real text
+    path = write_text_pdf(str(tmp_path / "cover.pdf"), pages=1, lines_per_page=0)
+    assert routes(path) == ["text"]
+
+    [page] = iter_pages(path, cache=False)
+    assert len(page.text.replace(" ", "")) < MIN_TEXT_CHARS
+    assert page.text == "Page 1"
+    assert page.method == "text"
+
+
+def test_iter_pages_yields_every_page_in_order(tmp_path):
+    path = write_text_pdf(str(tmp_path / "notes.pdf"), pages=5, lines_per_page=5, scanned_every=3)
+    pages = list(iter_pages(path, ocr=False, cache=False))
+
+    assert [page.number for page in pages] == [1, 2, 3, 4, 5]
+    assert [page.method for page in pages] == ["text", "text", "skipped", "text", "text"]
+    assert pages[0].text.startswith("Page 1\n")
+    assert pages[2].text == ""
+    assert not any(page.cached for page in pages)
@@ -0,0 +1,113 @@
+import asyncio
+import json
+import urllib.request
+
+import pytest
+
+import triage_metrics
+
+
+@pytest.fixture
+def metrics():
+    enabled = triage_metrics.is_enabled()
+    triage_metrics.enable()
+    triage_metrics.reset()
+    yield triage_metrics
+    triage_metrics.reset()
+    triage_metrics.enable(enabled)
+
+
+def test_nothing_is_recorded_while_disabled(metrics):
+    metrics.enable(False)
+    metrics.inc("triage_severity_total", severity="mild")
+    metrics.observe("triage_stage_seconds", 0.2, stage="severity")
+    assert metrics.snapshot() == {"counters": [], "histograms": []}
+    assert metrics.render_prometheus() == "\n"
+
+
+def test_snapshot_is_json_with_cumulative_buckets(metrics):
+    metrics.inc("triage_severity_total", severity="urgent")
+    metrics.inc("triage_severity_total", 2, severity="urgent")
+    metrics.observe("triage_stage_seconds", 0.003, stage="severity")
+    metrics.observe("triage_stage_seconds", 0.3, stage="severity")
+
+    data = json.loads(json.dumps(metrics.snapshot()))
+    assert data["counters"] == [{"name": "triage_severity_total", "labels": {"severity": "urgent"}, "value": 3}]
+    [histogram] = data["histograms"]
+    assert histogram["name"] == "triage_stage_seconds"
+    assert histogram["labels"] == {"stage": "severity"}
+    assert histogram["count"] == 2
+    assert histogram["sum"] == pytest.approx(0.303)
+    assert histogram["buckets"]["0.001"] == 0
+    assert histogram["buckets"]["0.005"] == 1
+    assert histogram["buckets"]["0.25"] == 1
+    assert histogram["buckets"]["0.5"] == 2
+    assert histogram["buckets"]["+Inf"] == 2
+
+
+def test_render_prometheus_text_format(metrics):
+    metrics.inc("faq_store_hits_total")
+    metrics.observe("triage_stage_seconds", 0.02, stage="answer")
+
+    lines = metrics.render_prometheus().splitlines()
+    assert lines[:3] == [
+        f"# HELP faq_store_hits_total {metrics.HELP['faq_store_hits_total']}",
+        "# TYPE faq_store_hits_total counter",
+        "faq_store_hits_total 1",
+    ]
+    assert "# TYPE triage_stage_seconds histogram" in lines
+    assert 'triage_stage_seconds_bucket{stage="answer",le="0.01"} 0' in lines
+    assert 'triage_stage_seconds_bucket{stage="answer",le="0.05"} 1' in lines
+    assert 'triage_stage_seconds_bucket{stage="answer",le="+Inf"} 1' in lines
+    assert 'triage_stage_seconds_sum{stage="answer"} 0.02' in lines
+    assert 'triage_stage_seconds_count{stage="answer"} 1' in lines
+
+
+def test_label_values_are_escaped(metrics):
+    metrics.inc("gemini_failovers_total", model='gemini "pro"\\beta\nline two')
+
+    lines = metrics.render_prometheus().splitlines()
+    assert 'gemini_failovers_total{model="gemini \\"pro\\"\\\\beta\\nline two"} 1' in lines
+    # The raw value is kept as is in the JSON snapshot
+    assert metrics.snapshot()["counters"][0]["labels"]["model"] == 'gemini "pro"\\beta\nline two'
+
+
+def test_timed_counts_errors_for_sync_and_async_stages(metrics):
+    @metrics.timed("lookup")
+    def lookup(fail):
+        if fail:
+            raise RuntimeError("down")
+        return "ok"
+
+    @metrics.timed("answer")
+    async def answer():
+        await asyncio.sleep(0.01)
+        return "done"
+
+    assert lookup(False) == "ok"
+    with pytest.raises(RuntimeError):
+        lookup(True)
+    assert asyncio.run(answer()) == "done"
+
+    data = metrics.snapshot()
+    assert data["counters"] == [{"name": "triage_stage_errors_total", "labels": {"stage": "lookup"}, "value": 1}]
+    counts = {histogram["labels"]["stage"]: histogram for histogram in data["histograms"]}
+    assert counts["lookup"]["count"] == 2
+    # The coroutine is timed until it finishes
+    assert counts["answer"]["sum"] >= 0.01
+
+
+def test_serve_exposes_both_formats(metrics):
+    metrics.inc("triage_emergency_keyword_total")
+    server = metrics.serve(port=0)
+    try:
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        with urllib.request.urlopen(base + "/metrics") as response:
+            assert response.headers["Content-Type"].startswith("text/plain")
+            assert "triage_emergency_keyword_total 1" in response.read().decode()
+        with urllib.request.urlopen(base + "/metrics.json") as response:
+            assert response.headers["Content-Type"] == "application/json"
+            assert json.load(response) == metrics.snapshot()
+    finally:
+        server.shutdown()
+        server.server_close()
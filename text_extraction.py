@@ -0,0 +1,580 @@
+"""Headless text extraction from PDFs and images.
+
+Each PDF page is routed on its own, from signals pdfplumber gives for free:
+
+    text      a text layer and little of the page covered by images, or a
+              short text layer and no images at all: the text layer only
+    text+ocr  a usable text layer, but large images (scanned inserts,
+              photographed results): the text layer plus OCR of just
+              those image regions
+    ocr       (almost) no text layer but images: the whole page is
+              rasterized (pdf2image) and OCRed
+    empty     neither text nor images: nothing to read
+
+Images go straight to OCR. Nothing here needs a display, so servers and
+batch jobs can call it directly:
+
+    from text_extraction import extract, iter_pages
+    text = extract("report.pdf")
+    text = extract(upload_bytes, file_type="image")
+    for page in iter_pages("report.pdf"):
+        print(page.number, page.method, f"{page.seconds:.2f} s")
+
+iter_pages yields each page as soon as it and every page before it are
+done, so consumers can start on page 1 while the rest is still being read
+or OCRed.
+
+Whole-page OCR is the expensive part, so it runs in its own process pool
+(EXTRACT_OCR_WORKERS, one per core by default). Each task renders a short
+window of pages and OCRs it inside the worker, so rendered pages never
+cross process boundaries, and windows are sized so that workers x window
+x page size stays under EXTRACT_OCR_MEMORY_MB. At most workers + 1
+windows are queued at a time, and routing of later pages continues while
+they run.
+
+The command line extracts whole directories across a process pool and
+writes one .txt per input:
+
+    python text_extraction.py scans/ more.pdf -o extracted/ --workers 8 --report
+
+With EXTRACTION_CACHE_DB set (--cache on the command line), results go
+to an ExtractionCache: re-uploaded files come back without any extraction,
+and pages already seen in another file are not read or OCRed again.
+
+TESSERACT_CMD and POPPLER_PATH point at the OCR binaries when they are not
+on PATH (typically on Windows).
+"""
+import argparse
+import hashlib
+import io
+import os
+import sys
+import tempfile
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+
+from extraction_cache import ExtractionCache, bytes_digest, file_digest, settings_key
+
+# pdfplumber, pdf2image, pytesseract and PIL are imported where they are
+# used, so importing this module does no work
+
+PDF_EXTENSIONS = [".pdf"]
+IMAGE_EXTENSIONS = [".png", ".jpg", ".jpeg", ".tiff", ".bmp"]
+
+# Routing thresholds: characters for a usable text layer, share of the page
+# covered by images before those images are OCRed too, and the smallest
+# image (share of the page) worth OCRing on its own
+MIN_TEXT_CHARS = 25
+OCR_IMAGE_COVERAGE = 0.3
+MIN_REGION_COVERAGE = 0.05
+OCR_DPI = 200
+
+# Part of every extraction cache key; bump it when extraction output changes
+EXTRACTOR_VERSION = "5"
+
+# Rendered page memory allowed across OCR workers, when EXTRACT_OCR_MEMORY_MB is not set
+OCR_MEMORY_MB = 512
+
+# One extracted page; number starts at 1, seconds is the time spent on it,
+# cached is True when the text came from the extraction cache
+PageResult = namedtuple("PageResult", ["number", "text", "method", "seconds", "cached"], defaults=(False,))
+
+# One input of a batch run: pages are PageResults without their text; error is None on success
+BatchResult = namedtuple("BatchResult", ["path", "output", "pages", "seconds", "error"])
+
+
+def file_type_of(name):
+    """"pdf", "image" or None, from a file name's extension"""
+    ext = os.path.splitext(str(name))[1].lower()
+    if ext in PDF_EXTENSIONS:
+        return "pdf"
+    elif ext in IMAGE_EXTENSIONS:
+        return "image"
+    return None
+
+
+def sniff_type(data):
+    """"pdf" or "image" from the first bytes of a file"""
+    return "pdf" if bytes(data[:5]) == b"%PDF-" else "image"
+
+
+def _ocr(image):
+    import pytesseract
+
+    if os.environ.get("TESSERACT_CMD"):
+        pytesseract.pytesseract.tesseract_cmd = os.environ["TESSERACT_CMD"]
+    return pytesseract.image_to_string(image)
+
+
+def _open_source(path_or_bytes, file_type):
+    """(source for the libraries, file type): paths stay paths, bytes become a buffer"""
+    if isinstance(path_or_bytes, (bytes, bytearray, memoryview)):
+        return io.BytesIO(path_or_bytes), file_type or sniff_type(path_or_bytes)
+    if hasattr(path_or_bytes, "read"):
+        data = path_or_bytes.read()
+        return io.BytesIO(data), file_type or sniff_type(data)
+    path = os.fspath(path_or_bytes)
+    file_type = file_type or file_type_of(path)
+    if file_type is None:
+        raise ValueError(f"Unsupported file type: {path}")
+    return path, file_type
+
+
+def _render_pages(path, first_page, last_page, dpi):
+    """PDF pages first_page..last_page (1-based, inclusive) as images for OCR"""
+    from pdf2image import convert_from_path
+
+    return convert_from_path(path, dpi=dpi, first_page=first_page, last_page=last_page,
+                             poppler_path=os.environ.get("POPPLER_PATH") or None)
+
+
+def image_regions(page):
+    """Bounding boxes of the page's images, clipped to the page"""
+    regions = []
+    for image in page.images:
+        x0, top = max(image["x0"], 0), max(image["top"], 0)
+        x1, bottom = min(image["x1"], page.width), min(image["bottom"], page.height)
+        if x1 > x0 and bottom > top:
+            regions.append((x0, top, x1, bottom))
+    return regions
+
+
+def route_page(page, min_chars=MIN_TEXT_CHARS, image_coverage=OCR_IMAGE_COVERAGE):
+    """("text" | "text+ocr" | "ocr" | "empty", image regions) for a pdfplumber page"""
+    chars = sum(1 for char in page.chars if not char["text"].isspace())
+    regions = image_regions(page)
+    area = float(page.width * page.height) or 1.0
+    # Overlapping images can count twice; capped, that only errs towards OCR
+    covered = min(1.0, sum((x1 - x0) * (bottom - top) for x0, top, x1, bottom in regions) / area)
+    if chars < min_chars:
+        # A short text layer with no images is still the page's text ("Diagnosis: influenza A")
+        if regions:
+            return "ocr", regions
+        return ("text" if chars else "empty"), regions
+    if covered >= image_coverage:
+        return "text+ocr", regions
+    return "text", regions
+
+
+def _ocr_regions(page, regions, dpi):
+    """OCR text of the larger image regions of a page, top to bottom"""
+    area = float(page.width * page.height) or 1.0
+    texts = []
+    for bbox in sorted(regions, key=lambda box: (box[1], box[0])):
+        if (bbox[2] - bbox[0]) * (bbox[3] - bbox[1]) / area < MIN_REGION_COVERAGE:
+            continue
+        image = page.crop(bbox, strict=False).to_image(resolution=dpi).original
+        text = _ocr(image).strip()
+        if text:
+            texts.append(text)
+    return "\n".join(texts)
+
+
+def page_image_bytes(page, dpi):
+    """Memory of one page rendered as RGB at dpi"""
+    return int(page.width * dpi / 72.0) * int(page.height * dpi / 72.0) * 3
+
+
+def ocr_settings(workers=None, memory_mb=None):
+    """(workers, memory cap in MB), from the arguments or the environment"""
+    workers = workers or int(os.environ.get("EXTRACT_OCR_WORKERS", "0")) or os.cpu_count() or 1
+    memory_mb = memory_mb or float(os.environ.get("EXTRACT_OCR_MEMORY_MB", OCR_MEMORY_MB))
+    return workers, memory_mb
+
+
+def _ocr_window(path, first, last, dpi):
+    """OCR task: render pages first..last in one call, OCR each; [(number, text, seconds)]"""
+    start = time.perf_counter()
+    images = _render_pages(path, first, last, dpi)
+    render_share = (time.perf_counter() - start) / len(images) if images else 0.0
+    results = []
+    number = first
+    while images:
+        # Free every page as soon as it is read, not at the end of the window
+        image = images.pop(0)
+        start = time.perf_counter()
+        results.append((number, _ocr(image), render_share + time.perf_counter() - start))
+        image.close()
+        number += 1
+    return results
+
+
+@lru_cache(maxsize=None)
+def get_ocr_pool(workers):
+    """Process pool for OCR tasks, shared by every extraction in the process"""
+    return ProcessPoolExecutor(max_workers=workers)
+
+
+class OcrStage:
+    """Pages waiting for whole-page OCR, grouped into windows of consecutive pages.
+
+    A window is sent off when it is full or its run of pages ends; its
+    length keeps workers x window x page bytes under the memory cap. With
+    one worker windows run in this process as they are sent.
+    """
+
+    def __init__(self, path, dpi=OCR_DPI, workers=None, memory_mb=None):
+        self.path = path
+        self.dpi = dpi
+        self.workers, self.memory_mb = ocr_settings(workers, memory_mb)
+        self.page_bytes = 1
+        self._window = []
+        self._queued = deque()
+        self._done = {}
+
+    def window_length(self):
+        return max(1, int(self.memory_mb * 2 ** 20 // (self.workers * self.page_bytes)))
+
+    def add(self, number, page_bytes):
+        """Queue page number, rendered size page_bytes, for OCR"""
+        self.page_bytes = max(self.page_bytes, page_bytes)
+        if self._window and self._window[-1] != number - 1:
+            self.send()
+        self._window.append(number)
+        if len(self._window) >= self.window_length():
+            self.send()
+
+    def send(self):
+        """Send off the open window, if any"""
+        if not self._window:
+            return
+        first, last = self._window[0], self._window[-1]
+        self._window = []
+        if self.workers == 1:
+            self._store(_ocr_window(self.path, first, last, self.dpi))
+            return
+        # Backpressure: only workers + 1 windows waiting or running at a time
+        while len(self._queued) > self.workers:
+            self._store(self._queued.popleft().result())
+        self._queued.append(get_ocr_pool(self.workers).submit(_ocr_window, self.path, first, last, self.dpi))
+
+    def _store(self, results):
+        for number, text, seconds in results:
+            self._done[number] = (text, seconds)
+
+    def result(self, number, wait=False):
+        """(text, seconds) for page number once OCRed, else None; wait=True blocks until it is"""
+        if number not in self._done and wait:
+            if number in self._window:
+                self.send()
+            # Windows finish in page order from the caller's point of view
+            while number not in self._done and self._queued:
+                self._store(self._queued.popleft().result())
+        while self._queued and self._queued[0].done():
+            self._store(self._queued.popleft().result())
+        return self._done.pop(number, None)
+
+    def close(self):
+        for future in self._queued:
+            future.cancel()
+        self._queued.clear()
+
+
+def page_fingerprint(page, memo):
+    """Hash of what a page draws: its content streams and the images and fonts they use.
+
+    The media box and /Rotate (inherited from the page tree) are part of it,
+    since OCR of a turned page reads differently. Walks the page's PDF objects without any layout analysis. Identical
+    pages in different files hash the same; memo maps object ids to digests
+    so resources shared across a document's pages are hashed once.
+    """
+    from pdfminer.pdftypes import PDFObjRef, PDFStream
+
+    def digest(obj, depth):
+        if isinstance(obj, PDFObjRef):
+            if obj.objid not in memo:
+                memo[obj.objid] = b"..."  # breaks reference cycles
+                memo[obj.objid] = digest(obj.resolve(), depth)
+            return memo[obj.objid]
+        if depth > 8:
+            return b"..."
+        if isinstance(obj, PDFStream):
+            data = obj.get_rawdata()
+            return hashlib.blake2b(digest(obj.attrs, depth + 1) + (data if data is not None else obj.get_data()),
+                                   digest_size=16).digest()
+        if isinstance(obj, dict):
+            parts = [repr(key).encode() + digest(value, depth + 1)
+                     for key, value in sorted(obj.items(), key=lambda item: repr(item[0])) if key != "Parent"]
+            return hashlib.blake2b(b"{" + b",".join(parts), digest_size=16).digest()
+        if isinstance(obj, (list, tuple)):
+            return hashlib.blake2b(b"[" + b",".join(digest(item, depth + 1) for item in obj), digest_size=16).digest()
+        return repr(obj).encode()
+
+    page_obj = page.page_obj
+    parts = [repr(tuple(page_obj.mediabox)).encode(), repr(page_obj.rotate).encode(), digest(page_obj.resources, 0)]
+    parts += [digest(stream, 0) for stream in page_obj.contents]
+    return hashlib.blake2b(b"|".join(parts), digest_size=16).hexdigest()
+
+
+@lru_cache(maxsize=None)
+def get_extraction_cache(db_path, max_mb=256.0):
+    """Shared ExtractionCache for a database file"""
+    return ExtractionCache(db_path, max_bytes=int(max_mb * 2 ** 20))
+
+
+def default_cache():
+    """The cache configured by EXTRACTION_CACHE_DB (and EXTRACTION_CACHE_MB), or None"""
+    db_path = os.environ.get("EXTRACTION_CACHE_DB")
+    if not db_path:
+        return None
+    return get_extraction_cache(db_path, float(os.environ.get("EXTRACTION_CACHE_MB", "256")))
+
+
+def iter_pages(path_or_bytes, file_type=None, ocr=True, min_chars=MIN_TEXT_CHARS,
+               image_coverage=OCR_IMAGE_COVERAGE, dpi=OCR_DPI, ocr_workers=None, ocr_memory_mb=None, cache=None):
+    """Yield a PageResult for every page, in order, as soon as it is ready.
+
+    path_or_bytes is a path, the file's bytes or a binary file object;
+    file_type ("pdf" or "image") is taken from the extension or the content
+    when not given. Pages are routed by route_page; with ocr=False pages
+    that need OCR keep whatever text layer they have, with method "skipped".
+    Whole-page OCR goes through an OcrStage with ocr_workers and
+    ocr_memory_mb, while the following pages are read.
+
+    cache is an ExtractionCache; None uses default_cache() and False turns
+    caching off. A known file is served whole from the cache, and known
+    pages of a new file are reused without being read or OCRed again.
+    """
+    source, file_type = _open_source(path_or_bytes, file_type)
+    if cache is None:
+        cache = default_cache()
+    options = dict(ocr=ocr, min_chars=min_chars, image_coverage=image_coverage, dpi=dpi,
+                   ocr_workers=ocr_workers, ocr_memory_mb=ocr_memory_mb)
+    if not cache:
+        for _, result in _extract(source, file_type, None, None, **options):
+            yield result
+        return
+
+    start = time.perf_counter()
+    # Worker count and memory cap change how pages are made, not their text
+    settings = settings_key(EXTRACTOR_VERSION, file_type=file_type, ocr=ocr, min_chars=min_chars,
+                            image_coverage=image_coverage, dpi=dpi)
+    digest = bytes_digest(source.getbuffer()) if isinstance(source, io.BytesIO) else file_digest(source)
+    document_key = f"{digest}:{settings}"
+    pages = cache.get_document(document_key)
+    if pages is not None:
+        share = (time.perf_counter() - start) / max(len(pages), 1)
+        for number, text, method, _ in pages:
+            yield PageResult(number, text, method, share, cached=True)
+        return
+
+    stored = []
+    for page_key, result in _extract(source, file_type, cache, settings, document_key=document_key, **options):
+        stored.append((result.number, page_key, result.text, result.method, result.seconds))
+        yield result
+    # Only documents read to the end are stored
+    cache.put_document(document_key, stored)
+
+
+def _extract(source, file_type, cache, settings, ocr, min_chars, image_coverage, dpi, ocr_workers, ocr_memory_mb,
+             document_key=None):
+    """(page_key, PageResult) for every page, in order; page_key is None without a cache"""
+    if file_type == "image":
+        from PIL import Image
+
+        start = time.perf_counter()
+        with Image.open(source) as image:
+            text = _ocr(image)
+        yield document_key, PageResult(1, text, "ocr", time.perf_counter() - start)
+        return
+
+    import pdfplumber
+
+    stage = spill = None
+    memo = {}
+    # Finished pages, and pages waiting for OCR, not yet yielded
+    pending = deque()
+    try:
+        with pdfplumber.open(source) as pdf:
+            for number, page in enumerate(pdf.pages, start=1):
+                start = time.perf_counter()
+                page_key = found = None
+                if cache is not None:
+                    page_key = f"{page_fingerprint(page, memo)}:{settings}"
+                    found = cache.get_page(page_key)
+                if found is not None:
+                    text, method, _ = found
+                    cached = True
+                else:
+                    cached = False
+                    method, regions = route_page(page, min_chars, image_coverage)
+                    text = (page.extract_text() or "") if method != "empty" else ""
+                    if not ocr and method in ("ocr", "text+ocr"):
+                        method = "skipped" if method == "ocr" else "text"
+                    elif method == "ocr":
+                        if stage is None:
+                            if isinstance(source, io.BytesIO):
+                                # The renderer reads files, so uploads are spilled to a temporary one
+                                with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as spill:
+                                    spill.write(source.getvalue())
+                            stage = OcrStage(spill.name if spill else source, dpi, ocr_workers, ocr_memory_mb)
+                        stage.add(number, page_image_bytes(page, dpi))
+                    elif method == "text+ocr":
+                        text = "\n".join(part for part in (text, _ocr_regions(page, regions, dpi)) if part)
+                if stage is not None and (cached or method != "ocr"):
+                    # A run of scanned pages ended; start on it while later pages are read
+                    stage.send()
+                pending.append((page_key, PageResult(number, text, method, time.perf_counter() - start, cached)))
+                # Drop the page's parsed objects; long documents otherwise keep them all
+                page.close()
+                yield from _ready_pages(pending, stage, wait=False)
+            yield from _ready_pages(pending, stage, wait=True)
+    finally:
+        if stage is not None:
+            stage.close()
+        if spill is not None:
+            os.remove(spill.name)
+
+
+def _ready_pages(pending, stage, wait):
+    """Pop and yield the leading pending pages that are finished"""
+    while pending:
+        page_key, result = pending[0]
+        if result.method == "ocr" and not result.cached:
+            ocr_result = stage.result(result.number, wait)
+            if ocr_result is None:
+                return
+            result = result._replace(text=ocr_result[0], seconds=result.seconds + ocr_result[1])
+        pending.popleft()
+        yield page_key, result
+
+
+def extract_pages(path_or_bytes, file_type=None, ocr=True, **options):
+    """Every PageResult of iter_pages, as a list"""
+    return list(iter_pages(path_or_bytes, file_type, ocr, **options))
+
+
+def extract(path_or_bytes, file_type=None, ocr=True, **options):
+    """All text of a PDF or image, one line break after each page with text"""
+    return "".join([page.text + "\n" for page in iter_pages(path_or_bytes, file_type, ocr, **options) if page.text])
+
+
+def output_path_for(path, root, output_dir):
+    """Where the text of path goes: mirrored under output_dir, or next to the input"""
+    if output_dir is None:
+        return path + ".txt"
+    relative = os.path.relpath(path, root) if root else os.path.basename(path)
+    return os.path.join(output_dir, relative + ".txt")
+
+
+def extract_to_file(path, output, options=None):
+    """Batch worker: extract one file and write its text; never raises"""
+    start = time.perf_counter()
+    try:
+        os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+        pages = []
+        # Pages are written as they arrive; the output appears complete or not at all
+        with open(output + ".part", "w", encoding="utf-8") as f:
+            for page in iter_pages(path, **(options or {})):
+                if page.text:
+                    f.write(page.text + "\n")
+                # Only the report goes back to the parent process; the text is on disk
+                pages.append(page._replace(text=None))
+        os.replace(output + ".part", output)
+        return BatchResult(path, output, pages, time.perf_counter() - start, None)
+    except Exception as e:
+        return BatchResult(path, output, [], time.perf_counter() - start, f"{type(e).__name__}: {e}")
+
+
+def find_inputs(paths, output_dir=None):
+    """(input, output) pairs for files and every supported file under directories"""
+    jobs = []
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, _, names in os.walk(path):
+                for name in sorted(names):
+                    if file_type_of(name) is not None:
+                        full = os.path.join(directory, name)
+                        jobs.append((full, output_path_for(full, path, output_dir)))
+        else:
+            jobs.append((path, output_path_for(path, None, output_dir)))
+    return jobs
+
+
+def extract_batch(jobs, workers=None, options=None):
+    """Run (input, output) jobs across a process pool; yields BatchResults as they finish.
+
+    options are extract_pages keyword arguments.
+    """
+    workers = workers or os.cpu_count() or 1
+    # Biggest files first so one large scan doesn't finish alone at the end
+    jobs = sorted(jobs, key=lambda job: -os.path.getsize(job[0]) if os.path.exists(job[0]) else 0)
+    if workers == 1 or len(jobs) < 2:
+        for path, output in jobs:
+            yield extract_to_file(path, output, options)
+        return
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+        futures = [pool.submit(extract_to_file, path, output, options) for path, output in jobs]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract text from PDFs and images, one .txt per input")
+    parser.add_argument("inputs", nargs="+", help="Files or directories (searched recursively)")
+    parser.add_argument("-o", "--output-dir", help="Write outputs here instead of next to the inputs")
+    parser.add_argument("--workers", type=int, default=None, help="Processes (default: one per core)")
+    parser.add_argument("--no-ocr", action="store_true", help="Never OCR; pages without a text layer stay empty")
+    parser.add_argument("--min-chars", type=int, default=MIN_TEXT_CHARS,
+                        help="Characters a page's text layer needs to skip OCR")
+    parser.add_argument("--image-coverage", type=float, default=OCR_IMAGE_COVERAGE,
+                        help="Share of a text page covered by images before they are OCRed too")
+    parser.add_argument("--dpi", type=int, default=OCR_DPI, help="Rasterization resolution for OCR")
+    parser.add_argument("--ocr-workers", type=int, default=None,
+                        help="OCR processes per file (default: one per core for a single file, else 1)")
+    parser.add_argument("--ocr-memory-mb", type=float, default=None,
+                        help=f"Cap on rendered pages in memory (default: EXTRACT_OCR_MEMORY_MB or {OCR_MEMORY_MB})")
+    parser.add_argument("--report", action="store_true", help="Print the method and time of every page")
+    parser.add_argument("--cache", help="Extraction cache database (default: EXTRACTION_CACHE_DB)")
+    parser.add_argument("--cache-mb", type=float, default=None, help="Text the cache may hold before evicting")
+    args = parser.parse_args()
+    # Set in the environment so every worker process opens the same cache
+    if args.cache:
+        os.environ["EXTRACTION_CACHE_DB"] = args.cache
+    if args.cache_mb:
+        os.environ["EXTRACTION_CACHE_MB"] = str(args.cache_mb)
+
+    jobs = find_inputs(args.inputs, args.output_dir)
+    if not jobs:
+        print("No PDF or image files found")
+        return 1
+
+    start = time.perf_counter()
+    pages = failures = 0
+    # Files already run in parallel, so by default each file's OCR stays in its worker
+    ocr_workers = args.ocr_workers or (None if len(jobs) == 1 or args.workers == 1 else 1)
+    options = dict(ocr=not args.no_ocr, min_chars=args.min_chars, image_coverage=args.image_coverage, dpi=args.dpi,
+                   ocr_workers=ocr_workers, ocr_memory_mb=args.ocr_memory_mb)
+    methods = {}
+    cached = 0
+    for result in extract_batch(jobs, args.workers, options):
+        if result.error:
+            failures += 1
+            print(f"❌ {result.path}: {result.error}")
+            continue
+        pages += len(result.pages)
+        cached += sum(1 for page in result.pages if page.cached)
+        counts = {}
+        for page in result.pages:
+            counts[page.method] = counts.get(page.method, 0) + 1
+            methods[page.method] = methods.get(page.method, 0) + 1
+        summary = ", ".join(f"{count} {method}" for method, count in sorted(counts.items()))
+        print(f"✅ {result.path} -> {result.output} ({len(result.pages)} pages: {summary}; {result.seconds:.2f} s)")
+        if args.report:
+            for page in result.pages:
+                print(f"   page {page.number:>4}  {page.method:<9} {page.seconds * 1000:>8.1f} ms"
+                      f"{'  cached' if page.cached else ''}")
+    elapsed = time.perf_counter() - start
+    print(f"\n{len(jobs) - failures}/{len(jobs)} files, {pages} pages in {elapsed:.1f} s "
+          f"({pages / elapsed if elapsed else 0:.1f} pages/s)")
+    if methods:
+        print("Pages by method: " + ", ".join(f"{method} {count}" for method, count in sorted(methods.items())))
+    if os.environ.get("EXTRACTION_CACHE_DB"):
+        print(f"From the extraction cache: {cached}/{pages} pages")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+"""Severity labels, emergency keywords, specialists and volunteer contacts.
+
+The tables live in triage_directory.json (TRIAGE_DIRECTORY_PATH overrides
+it) and are loaded once per process into read-only mappings and tuples,
+together with the typo-tolerant emergency matcher and specialist router.
+Every bot instance shares the same objects instead of rebuilding its own
+copies.
+"""
+import json
+import os
+from collections import namedtuple
+from functools import lru_cache
+from types import MappingProxyType
+
+from keyword_matcher import get_fuzzy_matcher
+from specialist_router import freeze_conditions, get_router
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "triage_directory.json")
+
+Directory = namedtuple("Directory", [
+    "severity_levels", "emergency_keywords", "specialists", "volunteer_contacts",
+    "emergency_matcher", "specialist_router",
+])
+
+
+def freeze(value):
+    """Read-only copy of nested JSON data: dicts become mappingproxies, lists tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+@lru_cache(maxsize=None)
+def load_directory(path=None):
+    """Shared Directory for the process, loaded on first use"""
+    path = path or os.environ.get("TRIAGE_DIRECTORY_PATH") or DEFAULT_PATH
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+
+    specialists = freeze(data["specialists"])
+    emergency_keywords = freeze(data["emergency_keywords"])
+    return Directory(
+        severity_levels=freeze(data["severity_levels"]),
+        emergency_keywords=emergency_keywords,
+        specialists=specialists,
+        volunteer_contacts=freeze(data["volunteer_contacts"]),
+        # EMERGENCY_FUZZY_DISTANCE=0 turns typo tolerance off
+        emergency_matcher=get_fuzzy_matcher(
+            emergency_keywords, max_distance=int(os.environ.get("EMERGENCY_FUZZY_DISTANCE", "2"))
+        ),
+        # Emergency Department is reached through severity, never by condition match
+        specialist_router=get_router(freeze_conditions(specialists, exclude=("Emergency Department",))),
+    )
@@ -0,0 +1,228 @@
+"""Counters and stage timers for the triage flow.
+
+Disabled by default; set TRIAGE_METRICS=1 or call enable() from any entry
+point. When disabled every hook is a single flag check. Metrics can be read
+as a JSON snapshot, rendered in Prometheus text format, or served over HTTP
+with serve(port) at /metrics and /metrics.json.
+"""
+import bisect
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+
+# Stage latency buckets in seconds: local stages land in the first few,
+# Gemini round trips in the rest
+BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HELP = {
+    "triage_stage_seconds": "Time spent in each stage of the triage flow",
+    "triage_stage_errors_total": "Failures in a triage stage, including ones answered with a fallback",
+    "triage_stream_ttft_seconds": "Time to the first streamed answer chunk",
+    "triage_severity_total": "Messages by assessed severity",
+    "triage_emergency_keyword_total": "Messages stopped by the emergency keyword screen",
+    "gemini_retries_total": "Scheduler retry rounds after rate limits or transient errors",
+    "gemini_failovers_total": "Requests answered by a model other than the selected one",
+    "gemini_hedges_total": "Hedged second requests, by stage and which request answered first",
+    "model_switches_total": "Changes of the selected model",
+    "faq_store_hits_total": "Messages answered from the precomputed FAQ store",
+    "answer_cache_total": "Semantic answer cache lookups for cacheable severities",
+}
+
+_enabled = os.environ.get("TRIAGE_METRICS", "") not in ("", "0")
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+
+
+def enable(enabled=True):
+    global _enabled
+    _enabled = enabled
+
+
+def is_enabled():
+    return _enabled
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def inc(name, amount=1, **labels):
+    """Add to a counter"""
+    if not _enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def observe(name, seconds, **labels):
+    """Record one duration in a histogram"""
+    if not _enabled:
+        return
+    _observe(_key(name, labels), seconds)
+
+
+def _observe(key, seconds):
+    index = bisect.bisect_left(BUCKETS, seconds)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = [[0] * (len(BUCKETS) + 1), 0, 0.0]
+        histogram[0][index] += 1
+        histogram[1] += 1
+        histogram[2] += seconds
+
+
+def timed(stage):
+    """Decorator timing a triage stage and counting the exceptions it raises.
+
+    Label keys are built once here so a call only pays for two clock reads
+    and one locked histogram update. Coroutine functions are timed until
+    they finish, not until they return a coroutine.
+    """
+    timer_key = _key("triage_stage_seconds", {"stage": stage})
+    error_key = _key("triage_stage_errors_total", {"stage": stage})
+
+    def decorate(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not _enabled:
+                    return await func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                except BaseException:
+                    with _lock:
+                        _counters[error_key] = _counters.get(error_key, 0) + 1
+                    raise
+                finally:
+                    _observe(timer_key, time.perf_counter() - start)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except BaseException:
+                with _lock:
+                    _counters[error_key] = _counters.get(error_key, 0) + 1
+                raise
+            finally:
+                _observe(timer_key, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+def snapshot():
+    """All metrics as plain JSON-serialisable data"""
+    with _lock:
+        counters = list(_counters.items())
+        histograms = [(key, ([*value[0]], value[1], value[2])) for key, value in _histograms.items()]
+    return {
+        "counters": [
+            {"name": name, "labels": dict(labels), "value": value}
+            for (name, labels), value in sorted(counters)
+        ],
+        "histograms": [
+            {
+                "name": name,
+                "labels": dict(labels),
+                "count": count,
+                "sum": total,
+                "buckets": dict(zip([str(bound) for bound in BUCKETS] + ["+Inf"], _cumulative(buckets))),
+            }
+            for (name, labels), (buckets, count, total) in sorted(histograms)
+        ],
+    }
+
+
+def _cumulative(buckets):
+    running = 0
+    result = []
+    for count in buckets:
+        running += count
+        result.append(running)
+    return result
+
+
+def _escape(value):
+    """A label value as Prometheus expects it: backslash, quote and newline escaped"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def render_prometheus():
+    """Metrics in the Prometheus text exposition format"""
+    data = snapshot()
+    lines = []
+    seen = set()
+
+    def header(name, kind):
+        if name not in seen:
+            seen.add(name)
+            lines.append(f"# HELP {name} {HELP.get(name, name)}")
+            lines.append(f"# TYPE {name} {kind}")
+
+    for counter in data["counters"]:
+        header(counter["name"], "counter")
+        lines.append(f"{counter['name']}{_labels(counter['labels'].items())} {counter['value']}")
+    for histogram in data["histograms"]:
+        name, labels = histogram["name"], histogram["labels"].items()
+        header(name, "histogram")
+        for bound, count in histogram["buckets"].items():
+            lines.append(f"{name}_bucket{_labels(labels, [('le', bound)])} {count}")
+        lines.append(f"{name}_sum{_labels(labels)} {histogram['sum']}")
+        lines.append(f"{name}_count{_labels(labels)} {histogram['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def serve(port=9108, host="127.0.0.1"):
+    """Enable metrics and serve them on a background thread"""
+    # Only processes that export metrics pay for importing the HTTP server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            path = self.path.split("?", 1)[0]
+            if path == "/metrics":
+                body, content_type = render_prometheus(), "text/plain; version=0.0.4"
+            elif path == "/metrics.json":
+                body, content_type = json.dumps(snapshot()), "application/json"
+            else:
+                self.send_error(404)
+                return
+            data = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    enable()
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server